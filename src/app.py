@@ -1,5 +1,6 @@
 """Punto de entrada de la aplicacion."""
 
+import multiprocessing
 from pathlib import Path
 import sys
 
@@ -9,4 +10,6 @@ sys.path.insert(0, str(src_dir.parent))
 from src.gui.main_window import run
 
 if __name__ == "__main__":
+    # Necesario para el backend de procesos en el ejecutable de PyInstaller
+    multiprocessing.freeze_support()
     run()
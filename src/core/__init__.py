@@ -1,13 +1,24 @@
 """Modulo core de procesamiento."""
 
 from .unit_converter import UnitConverter
-from .image_processor import ImageProcessor, ResizeMode
-from .batch_handler import BatchHandler, ProcessingResult
+from .image_processor import ImageProcessor, ResizeMode, ResizeResult
+from .probe import ImageProbe, ImageInfo
+from .manifest import BatchManifest
+from .batch_handler import BatchHandler, BatchProgress, PipelineConfig, ProcessingResult
+from .scanner import iter_images, scan_images
 
 __all__ = [
     "UnitConverter",
     "ImageProcessor",
     "ResizeMode",
+    "ResizeResult",
+    "ImageProbe",
+    "ImageInfo",
     "BatchHandler",
+    "BatchProgress",
+    "PipelineConfig",
     "ProcessingResult",
+    "BatchManifest",
+    "iter_images",
+    "scan_images",
 ]
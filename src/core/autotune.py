@@ -0,0 +1,206 @@
+"""Ajuste automatico del numero de workers por escalada de rendimiento."""
+
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+import uuid
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Optional
+
+from .probe import ImageInfo
+
+# Imagenes desde este numero de pixeles cuentan como carga "large"
+_LARGE_IMAGE_PIXELS = 4_000_000
+
+# Sistemas de archivos de red tratados como almacenamiento lento
+_NETWORK_FILESYSTEMS = ("nfs", "nfs4", "cifs", "smb3", "smbfs", "fuse.sshfs", "9p", "afs", "davfs")
+
+# Archivos minimos por medicion y mejora minima para aceptar un cambio
+_MIN_EPOCH_FILES = 8
+_MIN_IMPROVEMENT = 0.05
+_MAX_EPOCHS = 10
+
+
+def machine_id() -> str:
+    """Identifica la maquina por nombre, arquitectura y nucleos."""
+    return f"{platform.node()}-{platform.machine()}-{os.cpu_count() or 1}"
+
+
+def size_class(infos: Iterable[Optional[ImageInfo]]) -> str:
+    """Clasifica la carga por la mediana de pixeles de las imagenes."""
+    pixels = [info.pixels for info in infos if info is not None]
+    if pixels and statistics.median(pixels) >= _LARGE_IMAGE_PIXELS:
+        return "large"
+    return "small"
+
+
+def storage_class(path: Path) -> str:
+    """Distingue almacenamiento local de unidades de red ("slow")."""
+    try:
+        resolved = str(path.resolve())
+    except OSError:
+        resolved = str(path)
+
+    if sys.platform == "win32":
+        if resolved.startswith("\\\\"):
+            return "slow"
+        try:
+            import ctypes
+            drive = os.path.splitdrive(resolved)[0] + "\\"
+            # DRIVE_REMOTE = 4
+            return "slow" if ctypes.windll.kernel32.GetDriveTypeW(drive) == 4 else "local"
+        except Exception:
+            return "local"
+
+    try:
+        with open("/proc/mounts", encoding="utf-8") as mounts:
+            entries = [line.split()[1:3] for line in mounts if len(line.split()) >= 3]
+    except OSError:
+        return "local"
+
+    best_mount, best_type = "", ""
+    for mount_point, fs_type in entries:
+        mount_point = mount_point.replace("\\040", " ")
+        prefix = mount_point.rstrip("/") + "/"
+        if (resolved == mount_point or resolved.startswith(prefix)) and len(mount_point) > len(best_mount):
+            best_mount, best_type = mount_point, fs_type
+    return "slow" if best_type in _NETWORK_FILESYSTEMS else "local"
+
+
+def max_workers_for(backend: str, storage: str) -> int:
+    """Limite superior de workers para la calibracion."""
+    cpu_count = os.cpu_count() or 1
+    if backend == "processes":
+        # Windows no admite mas de 61 procesos por pool
+        return min(61, cpu_count * 2 if storage == "slow" else cpu_count)
+    return min(64, max(4, cpu_count * (4 if storage == "slow" else 2)))
+
+
+class TuningStore:
+    """Valores ajustados persistidos en JSON por maquina y clase de carga."""
+
+    def __init__(self, path: Optional[Path]):
+        self._path = path
+
+    def load(self, key: str) -> Optional[int]:
+        """Devuelve el numero de workers guardado para la clave, si existe."""
+        entry = self._read().get(key)
+        if isinstance(entry, dict) and isinstance(entry.get("workers"), int) and entry["workers"] > 0:
+            return entry["workers"]
+        return None
+
+    def save(self, key: str, workers: int, throughput: float):
+        """Guarda el resultado de una calibracion de forma atomica."""
+        if self._path is None:
+            return
+        data = self._read()
+        data[key] = {"workers": workers, "throughput": round(throughput, 3), "updated": int(time.time())}
+        temp_path = self._path.with_name(f".{self._path.name}.{uuid.uuid4().hex}.tmp")
+        try:
+            self._path.parent.mkdir(parents=True, exist_ok=True)
+            temp_path.write_text(json.dumps(data, indent=2, sort_keys=True), encoding="utf-8")
+            os.replace(temp_path, self._path)
+        except OSError:
+            # La cache es opcional: si no se puede escribir se vuelve a calibrar la proxima vez
+            if temp_path.exists():
+                try:
+                    temp_path.unlink()
+                except OSError:
+                    pass
+
+    def _read(self) -> Dict[str, dict]:
+        if self._path is None:
+            return {}
+        try:
+            data = json.loads(self._path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return {}
+        return data if isinstance(data, dict) else {}
+
+
+class WorkerTuner:
+    """
+    Calibra la concurrencia por escalada mientras el lote avanza.
+
+    Cada medicion cubre al menos el doble de archivos que workers activos. Si el
+    rendimiento mejora se sigue en la misma direccion; si no, se vuelve al mejor valor,
+    se invierte la direccion y se reduce el paso, hasta que el paso llega a cero.
+    """
+
+    def __init__(
+        self,
+        start: int,
+        maximum: int,
+        on_finish: Optional[Callable[[int, float], None]] = None,
+        clock: Callable[[], float] = time.perf_counter,
+    ):
+        self._maximum = max(1, maximum)
+        self._limit = min(max(1, start), self._maximum)
+        self._on_finish = on_finish
+        self._clock = clock
+        self._direction = 1
+        self._step = max(1, self._limit // 2)
+        self._best_limit = self._limit
+        self._best_rate = 0.0
+        self._epochs = 0
+        self._epoch_start: Optional[float] = None
+        self._epoch_files = 0
+        self._finished = False
+
+    @property
+    def limit(self) -> int:
+        """Numero de trabajos en curso permitido ahora."""
+        return self._limit
+
+    @property
+    def maximum(self) -> int:
+        return self._maximum
+
+    @property
+    def finished(self) -> bool:
+        return self._finished
+
+    def record(self):
+        """Registra un archivo terminado y ajusta el limite al cerrar cada medicion."""
+        if self._finished:
+            return
+        now = self._clock()
+        if self._epoch_start is None:
+            # La primera finalizacion marca el fin del arranque de los workers
+            self._epoch_start = now
+            return
+
+        self._epoch_files += 1
+        if self._epoch_files < max(_MIN_EPOCH_FILES, self._limit * 2):
+            return
+
+        elapsed = now - self._epoch_start
+        rate = self._epoch_files / elapsed if elapsed > 0 else float("inf")
+        self._epochs += 1
+        self._epoch_start = now
+        self._epoch_files = 0
+
+        if rate > self._best_rate * (1 + _MIN_IMPROVEMENT):
+            self._best_limit, self._best_rate = self._limit, rate
+        else:
+            self._direction = -self._direction
+            self._step //= 2
+
+        next_limit = self._best_limit + self._direction * self._step
+        if self._step and not 1 <= next_limit <= self._maximum:
+            # Fuera de rango: probar en la otra direccion con un paso menor
+            self._direction = -self._direction
+            self._step //= 2
+            next_limit = self._best_limit + self._direction * self._step
+
+        if not self._step or self._epochs >= _MAX_EPOCHS:
+            self._limit = self._best_limit
+            self._finished = True
+            if self._on_finish:
+                self._on_finish(self._best_limit, self._best_rate)
+            return
+
+        self._limit = min(max(1, next_limit), self._maximum)
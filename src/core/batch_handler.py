@@ -1,25 +1,92 @@
 """Procesamiento por lotes de imagenes."""
 
+import asyncio
+import json
 import os
-from dataclasses import dataclass
+import multiprocessing
+import sqlite3
+import time
+from collections import deque
+from itertools import chain, islice
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Callable, List, Optional, Tuple
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import AsyncIterator, Callable, Deque, Dict, Iterable, Iterator, List, Optional, Sized, Tuple, Union
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    BrokenExecutor,
+    Executor,
+    Future,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    wait,
+)
 import threading
 
-from PIL import Image, ImageOps
+from PIL import Image
 
-from ..utils import SUPPORTED_EXTENSIONS, FileSystemError
-from .image_processor import ImageProcessor, ResizeMode
+from ..utils import (
+    BATCH_BACKENDS,
+    DEDUP_MODES,
+    DEFAULT_ASYNC_BATCHES,
+    DEFAULT_BATCH_BACKEND,
+    DEFAULT_MEMORY_BUDGET_MB,
+    DEFAULT_OUTPUT_FORMAT,
+    DEFAULT_RESAMPLE,
+    DEFAULT_SCHEDULE,
+    ENCODER_PROFILES,
+    JOBS_DIR,
+    OUTPUT_FORMAT_EXTENSIONS,
+    OUTPUT_FORMATS,
+    SCHEDULE_POLICIES,
+    SUPPORTED_EXTENSIONS,
+    WORKER_TUNING_PATH,
+    ProcessingError,
+    ValidationError,
+)
+from .dedup import DuplicateIndex, materialize
+from .autotune import TuningStore, WorkerTuner, machine_id, max_workers_for, size_class, storage_class
+from .image_processor import ImageProcessor, PassthroughPlan, RenderedImage, ResizeMode, ResizeResult
+from .journal import BatchJournal
+from .manifest import BatchManifest, InputStat, ManifestEntry, params_digest
+from .probe import ImageInfo, ImageProbe
+from .scanner import scan_images
+from .sniff import FORMAT_EXTENSIONS, sniff_format
 from ..utils.config import VALID_UNITS
 from ..utils.i18n import tr
 
+# Con backend "auto" se usan procesos a partir de estos nucleos y archivos por worker
+_AUTO_PROCESS_MIN_CPUS = 4
+_AUTO_PROCESS_MIN_FILES_PER_WORKER = 2
+
+# Trabajos enviados al pool por worker y archivos por tramo de lectura de cabeceras
+_IN_FLIGHT_PER_WORKER = 2
+_PROBE_CHUNK = 256
+
+# Margen para el arranque de los procesos worker, que no se descuenta del limite por archivo
+_PROCESS_STARTUP_GRACE = 10.0
+
+# API asincrona: resultados en espera por lote
+_ASYNC_QUEUE = 64
+_ASYNC_END = object()
+
+_async_pool: Optional[ThreadPoolExecutor] = None
+_async_pool_lock = threading.Lock()
+
+
+def _get_async_pool() -> ThreadPoolExecutor:
+    """Pool compartido que conduce los lotes asincronos, para no crear un hilo por lote."""
+    global _async_pool
+    with _async_pool_lock:
+        if _async_pool is None:
+            _async_pool = ThreadPoolExecutor(max_workers=DEFAULT_ASYNC_BATCHES, thread_name_prefix="pycresizer-batch")
+        return _async_pool
+
 
 def _get_optimal_workers() -> int:
-    """Calcula el numero de workers segun nucleos de CPU."""
+    """Numero de workers inicial segun nucleos de CPU (punto de partida del autoajuste)."""
     try:
         cpu_count = os.cpu_count() or 4
-        return min(cpu_count + 1, 8)
+        return cpu_count + 1
     except Exception:
         return 4
 
@@ -33,7 +100,771 @@ class ProcessingResult:
     original_size: Tuple[int, int]
     final_size: Tuple[int, int] = (0, 0)
     error_message: str = ""
+    error_code: str = ""
     processing_time: float = 0.0
+    timings: Dict[str, float] = field(default_factory=dict)
+    skipped: bool = False
+    duplicate_of: Optional[Path] = None
+    # Calidad elegida para una salida con perdida y su SSIM, si se busco un objetivo
+    quality: Optional[int] = None
+    ssim: Optional[float] = None
+    # Salida copiada o enlazada desde la entrada sin decodificarla
+    passthrough: bool = False
+
+    def pack(self) -> tuple:
+        """Forma compacta de tipos basicos para devolver el resultado entre procesos."""
+        return (
+            str(self.input_path), str(self.output_path), self.success, self.original_size,
+            self.final_size, self.error_message, self.error_code, self.processing_time, tuple(self.timings.items()),
+            self.skipped, str(self.duplicate_of) if self.duplicate_of is not None else None,
+            self.quality, self.ssim, self.passthrough,
+        )
+
+    @classmethod
+    def unpack(cls, data: tuple) -> "ProcessingResult":
+        """Reconstruye un resultado empaquetado con pack()."""
+        (input_path, output_path, success, original_size, final_size, error, error_code, elapsed, timings,
+         skipped, duplicate_of, quality, ssim, passthrough) = data
+        return cls(
+            input_path=Path(input_path),
+            output_path=Path(output_path),
+            success=success,
+            original_size=original_size,
+            final_size=final_size,
+            error_message=error,
+            error_code=error_code,
+            processing_time=elapsed,
+            timings=dict(timings),
+            skipped=skipped,
+            duplicate_of=Path(duplicate_of) if duplicate_of is not None else None,
+            quality=quality,
+            ssim=ssim,
+            passthrough=passthrough,
+        )
+
+
+@dataclass(frozen=True)
+class BatchProgress:
+    """Avance de un lote en aiter_batch(with_progress=True): archivos terminados, total y ultimo archivo."""
+    done: int
+    total: int
+    filename: str
+
+
+@dataclass(frozen=True)
+class BatchJob:
+    """Parametros comunes a todos los archivos de un lote."""
+    output_dir: Path
+    width: Optional[float]
+    height: Optional[float]
+    width_unit: str
+    height_unit: str
+    mode: ResizeMode
+    suffix: str = "_resized"
+    # None = el perfil del procesador
+    encoder_profile: Optional[str] = None
+    output_format: str = DEFAULT_OUTPUT_FORMAT
+
+
+@dataclass(frozen=True)
+class PipelineConfig:
+    """
+    Etapas de lectura y de codificacion/escritura separadas del remuestreo.
+
+    read_workers hilos leen los archivos por adelantado, con hasta read_queue archivos
+    leidos o en lectura; write_workers hilos codifican y escriben, con hasta write_queue
+    imagenes renderizadas en espera. La etapa intermedia usa los workers del lote.
+    """
+    read_workers: int = 4
+    read_queue: int = 16
+    write_workers: int = 2
+    write_queue: int = 8
+
+
+@dataclass
+class _StagedImage:
+    """Imagen renderizada que espera la etapa de escritura."""
+    output_path: Path
+    result: ResizeResult
+    rendered: Optional[RenderedImage] = None
+    data: Optional[bytes] = None
+    # Entrada que la escritura copia tal cual, sin codificar
+    passthrough: Optional[PassthroughPlan] = None
+
+
+def _schedule_weight(info: Optional[ImageInfo]) -> Tuple[int, int]:
+    """Coste relativo de un archivo para ordenar el lote: pixeles y, a igualdad, bytes."""
+    if info is None:
+        # Un archivo sin cabecera legible falla enseguida
+        return (0, 0)
+    return (info.pixels, info.file_size)
+
+
+def _output_suffix(job: BatchJob, file_path: Path) -> str:
+    """Extension de salida: la del formato del lote, la de la entrada o la del formato de su firma."""
+    if job.output_format != "keep":
+        return OUTPUT_FORMAT_EXTENSIONS[job.output_format]
+    if file_path.suffix.lower() in SUPPORTED_EXTENSIONS:
+        return file_path.suffix
+    try:
+        image_format = sniff_format(file_path)
+    except OSError:
+        image_format = None
+    # Un archivo que no es imagen conserva su extension y fallara al renderizarse
+    return FORMAT_EXTENSIONS[image_format][0] if image_format else file_path.suffix
+
+
+def _output_path(job: BatchJob, file_path: Path) -> Path:
+    """Ruta de salida de un archivo del lote."""
+    suffix = _output_suffix(job, file_path)
+    output_name = f"{file_path.stem}{job.suffix}{suffix}"
+    output_path = job.output_dir / output_name
+
+    # Prevenir colisión destructiva (Input = Output)
+    try:
+        if file_path.resolve() == output_path.resolve():
+            output_name = f"{file_path.stem}_pyc{suffix}"
+            output_path = job.output_dir / output_name
+    except Exception:
+        pass
+    return output_path
+
+
+def _process_file(
+    processor: ImageProcessor,
+    job: BatchJob,
+    file_path: Path,
+    cancel_check: Callable[[], bool],
+) -> ProcessingResult:
+    """Procesa un archivo del lote y convierte cualquier error en un resultado fallido."""
+    if cancel_check():
+        return _cancelled_result(file_path)
+
+    try:
+        output_path = _output_path(job, file_path)
+
+        resized = processor.resize(
+            input_path=file_path,
+            output_path=output_path,
+            width=job.width,
+            height=job.height,
+            width_unit=job.width_unit,
+            height_unit=job.height_unit,
+            mode=job.mode,
+            cancel_check=cancel_check,
+            encoder_profile=job.encoder_profile,
+        )
+
+        return _success_result(file_path, output_path, resized)
+
+    except Exception as e:
+        return _error_result(job, file_path, e)
+
+
+def _read_file(file_path: Path) -> Tuple[Optional[bytes], float]:
+    """Etapa de lectura: devuelve el contenido del archivo y lo que tardo en leerse."""
+    start = time.perf_counter()
+    try:
+        data = file_path.read_bytes()
+    except OSError:
+        # La etapa de render vuelve a abrir la ruta e informa el error con su codigo
+        data = None
+    return data, time.perf_counter() - start
+
+
+def _render_file(
+    processor: ImageProcessor,
+    job: BatchJob,
+    file_path: Path,
+    data: Optional[bytes],
+    cancel_check: Callable[[], bool],
+    encode: bool = False,
+) -> Union[_StagedImage, ProcessingResult]:
+    """Etapa de remuestreo: decodifica desde memoria y, si encode, codifica el resultado."""
+    if cancel_check():
+        return _cancelled_result(file_path)
+
+    try:
+        output_path = _output_path(job, file_path)
+        plan = processor.plan_passthrough(
+            file_path, output_path, job.width, job.height, job.width_unit, job.height_unit, job.mode, data
+        )
+        if plan is not None:
+            return _StagedImage(output_path, plan.result, passthrough=plan)
+
+        rendered = processor.render(
+            input_path=file_path,
+            width=job.width,
+            height=job.height,
+            width_unit=job.width_unit,
+            height_unit=job.height_unit,
+            mode=job.mode,
+            cancel_check=cancel_check,
+            data=data,
+        )
+        if encode:
+            data = processor.encode(rendered, output_path, job.encoder_profile)
+            return _StagedImage(output_path, rendered.result, data=data)
+        return _StagedImage(output_path, rendered.result, rendered=rendered)
+
+    except Exception as e:
+        return _error_result(job, file_path, e)
+
+
+def _write_file(
+    processor: ImageProcessor,
+    job: BatchJob,
+    file_path: Path,
+    staged: _StagedImage,
+    cancel_check: Callable[[], bool],
+) -> ProcessingResult:
+    """Etapa de escritura: codifica si hace falta y escribe de forma atomica, o copia la entrada."""
+    if cancel_check():
+        return _cancelled_result(file_path)
+
+    try:
+        if staged.passthrough is not None:
+            result = processor.apply_passthrough(staged.passthrough, file_path, staged.output_path)
+            return _success_result(file_path, staged.output_path, result)
+
+        data = staged.data
+        if data is None:
+            data = processor.encode(staged.rendered, staged.output_path, job.encoder_profile)
+        processor.write(data, staged.output_path, staged.result)
+        return _success_result(file_path, staged.output_path, staged.result)
+
+    except Exception as e:
+        return _error_result(job, file_path, e)
+
+
+def _success_result(file_path: Path, output_path: Path, resized: ResizeResult) -> ProcessingResult:
+    """Resultado de un archivo procesado correctamente."""
+    return ProcessingResult(
+        input_path=file_path,
+        output_path=output_path,
+        success=True,
+        original_size=resized.original_size,
+        final_size=resized.final_size,
+        processing_time=resized.timings.get("total", 0.0),
+        timings=resized.timings,
+        quality=resized.quality,
+        ssim=resized.ssim,
+        passthrough=resized.passthrough,
+    )
+
+
+def _skipped_result(file_path: Path, entry: ManifestEntry) -> ProcessingResult:
+    """Resultado de un archivo cuya salida sigue vigente segun el manifiesto."""
+    return ProcessingResult(
+        input_path=file_path,
+        output_path=entry.output_path,
+        success=True,
+        original_size=entry.original_size,
+        final_size=entry.final_size,
+        skipped=True,
+    )
+
+
+def _duplicate_result(
+    job: BatchJob, file_path: Path, first: ProcessingResult, hardlink: bool
+) -> ProcessingResult:
+    """Resultado de un archivo repetido, a partir del resultado del primero con su contenido."""
+    if not first.success:
+        result = _failed_result(job, file_path, first.error_message, first.error_code)
+        result.duplicate_of = first.input_path
+        return result
+
+    start = time.perf_counter()
+    output_path = _output_path(job, file_path)
+    try:
+        materialize(first.output_path, output_path, hardlink)
+    except Exception as e:
+        return _error_result(job, file_path, e)
+    return ProcessingResult(
+        input_path=file_path,
+        output_path=output_path,
+        success=True,
+        original_size=first.original_size,
+        final_size=first.final_size,
+        processing_time=time.perf_counter() - start,
+        duplicate_of=first.input_path,
+    )
+
+
+def _cancelled_result(file_path: Path) -> ProcessingResult:
+    """Resultado de un archivo que no llego a procesarse por una cancelacion."""
+    return ProcessingResult(
+        input_path=file_path,
+        output_path=Path(),
+        success=False,
+        original_size=(0, 0),
+        error_message=tr.get("err.process_cancelled"),
+        error_code="CANCELLED",
+    )
+
+
+def _failed_result(job: BatchJob, file_path: Path, message: str, code: str = "") -> ProcessingResult:
+    """Resultado de un archivo que no se pudo procesar."""
+    return ProcessingResult(
+        input_path=file_path,
+        output_path=_output_path(job, file_path),
+        success=False,
+        original_size=(0, 0),
+        error_message=message,
+        error_code=code,
+    )
+
+
+def _error_result(job: BatchJob, file_path: Path, error: Exception) -> ProcessingResult:
+    """Resultado fallido a partir de una excepcion, conservando su codigo si lo tiene."""
+    return _failed_result(job, file_path, str(error), getattr(error, "code", None) or "")
+
+
+def _timeout_result(job: BatchJob, file_path: Path, seconds: float) -> ProcessingResult:
+    """Resultado de un archivo que supero el tiempo limite por archivo."""
+    error = ProcessingError(tr.get("err.file_timeout", seconds=f"{seconds:g}"), code="TIMEOUT")
+    return _error_result(job, file_path, error)
+
+
+# Estado de cada proceso worker, fijado una sola vez por _init_worker
+_worker_processor: Optional[ImageProcessor] = None
+_worker_cancel = None
+
+
+def _init_worker(processor: ImageProcessor, cancel_event, lang: str):
+    """Inicializa un proceso worker con la configuracion del procesador."""
+    global _worker_processor, _worker_cancel
+    _worker_processor = processor
+    _worker_cancel = cancel_event
+    tr.set_language(lang)
+
+
+def _process_in_worker(job: BatchJob, file_path: Path) -> tuple:
+    """Procesa un archivo dentro de un proceso worker."""
+    result = _process_file(_worker_processor, job, file_path, _worker_cancel.is_set)
+    return result.pack()
+
+
+def _warm_up_worker() -> int:
+    """Carga los plugins de formato de Pillow en un worker antes de recibir archivos."""
+    Image.init()
+    return os.getpid()
+
+
+def _render_in_worker(job: BatchJob, file_path: Path, data: Optional[bytes]) -> Union[_StagedImage, tuple]:
+    """Renderiza y codifica dentro de un proceso worker; la escritura queda en el proceso principal."""
+    staged = _render_file(_worker_processor, job, file_path, data, _worker_cancel.is_set, encode=True)
+    if isinstance(staged, ProcessingResult):
+        return staged.pack()
+    # La imagen ya va codificada: no viajan pixeles entre procesos
+    return staged
+
+
+class _ResultSink:
+    """
+    Destino de los resultados de un lote: manifiesto, diario, progreso, orden de salida y repetidos.
+
+    Tambien filtra cada tramo de entradas antes de procesarlo: las omitidas por el manifiesto y
+    las repetidas ya resueltas pasan a finished y las demas repetidas esperan a su primer archivo.
+    """
+
+    def __init__(
+        self,
+        job: BatchJob,
+        ordered: bool,
+        manifest: Optional[BatchManifest],
+        journal: Optional[BatchJournal],
+        duplicates: Optional[DuplicateIndex],
+        hardlink: bool,
+        on_result: Callable[[ProcessingResult], object],
+        is_cancelled: Callable[[], bool],
+    ):
+        self._job = job
+        self._ordered = ordered
+        self._manifest = manifest
+        self._journal = journal
+        self._duplicates = duplicates
+        self._hardlink = hardlink
+        self._on_result = on_result
+        self._is_cancelled = is_cancelled
+        # Resultados listos sin procesar y tamano/fecha de las entradas que se van a procesar
+        self.finished: Deque[Tuple[int, ProcessingResult]] = deque()
+        self._input_stats: Dict[int, InputStat] = {}
+        # Deduplicacion: resultados de los archivos procesados y repetidos que esperan al primero
+        self._first_results: Dict[Path, ProcessingResult] = {}
+        self._waiting: Dict[Path, List[Tuple[int, Path]]] = {}
+        # Resultados terminados fuera de orden (solo con ordered=True)
+        self.reorder: Dict[int, ProcessingResult] = {}
+        self._next_index = 0
+
+    def filter(self, chunk: List[Tuple[int, Path]]) -> List[Tuple[int, Path]]:
+        """Aparta las entradas omitidas o repetidas de un tramo y devuelve las que hay que procesar."""
+        job = self._job
+        digests: Dict[Path, str] = {}
+        if self._manifest is not None and chunk:
+            current, stats = self._manifest.up_to_date([(path, _output_path(job, path)) for _, path in chunk])
+            for index, path in chunk:
+                if path in current:
+                    self.finished.append((index, _skipped_result(path, current[path])))
+                elif path in stats:
+                    self._input_stats[index] = stats[path]
+                    if stats[path].digest:
+                        digests[path] = stats[path].digest
+            chunk = [(index, path) for index, path in chunk if path not in current]
+        if self._duplicates is not None and chunk:
+            # Con hash_inputs el manifiesto ya leyo las entradas: no se vuelven a hashear
+            repeated = self._duplicates.assign([path for _, path in chunk], digests)
+            for index, path in chunk:
+                first = repeated.get(path)
+                if first is None:
+                    continue
+                if first in self._first_results:
+                    result = _duplicate_result(job, path, self._first_results[first], self._hardlink)
+                    self.finished.append((index, result))
+                else:
+                    self._waiting.setdefault(first, []).append((index, path))
+            chunk = [(index, path) for index, path in chunk if path not in repeated]
+        return chunk
+
+    def emit(self, index: int, result: ProcessingResult) -> Iterator[ProcessingResult]:
+        """Anota un resultado terminado y entrega los que ya pueden salir."""
+        input_stat = self._input_stats.pop(index, None)
+        if self._manifest is not None and input_stat is not None and result.success:
+            self._manifest.record(
+                result.input_path, result.output_path, input_stat, result.original_size, result.final_size
+            )
+        if self._journal is not None and (result.success or not self._is_cancelled()):
+            # Los cancelados quedan pendientes para resume()
+            self._journal.record(result.input_path, result.success, result.error_message)
+        self._on_result(result)
+        if not self._ordered:
+            yield result
+        else:
+            self.reorder[index] = result
+            while self._next_index in self.reorder:
+                yield self.reorder.pop(self._next_index)
+                self._next_index += 1
+
+        if self._duplicates is not None and result.duplicate_of is None and not result.skipped:
+            # Los repetidos que lleguen despues reutilizan este resultado
+            self._first_results[result.input_path] = result
+            for waiting_index, waiting_path in self._waiting.pop(result.input_path, []):
+                yield from self.emit(waiting_index, _duplicate_result(self._job, waiting_path, result, self._hardlink))
+
+    def close(self):
+        """Guarda y cierra el manifiesto y el diario."""
+        if self._manifest is not None:
+            self._manifest.close()
+        if self._journal is not None:
+            self._journal.close()
+
+
+class _InputFeed:
+    """
+    Entradas de un lote leidas por tramos a medida que avanza.
+
+    Cada tramo pasa por el filtro de resultados, se leen sus cabeceras si el lote las necesita
+    (presupuesto de memoria, autoajuste u orden por tamano) y se ordena segun schedule antes de
+    quedar en pending con su coste estimado.
+    """
+
+    def __init__(
+        self,
+        handler: "BatchHandler",
+        job: BatchJob,
+        input_files: Iterable[Path],
+        sink: _ResultSink,
+        journal: Optional[BatchJournal],
+    ):
+        self._handler = handler
+        self._job = job
+        self._files = enumerate(input_files)
+        self._sink = sink
+        # Sin la lista completa de antemano el diario recibe las entradas tramo a tramo
+        self._journal = journal if not isinstance(input_files, Sized) else None
+        self._needs_probe = handler._memory_budget > 0 or not handler._max_workers or handler._schedule != "fifo"
+        # Para ordenar un lote con tamano conocido se leen todas las cabeceras de una vez
+        sort_all = handler._schedule != "fifo" and isinstance(input_files, Sized)
+        self._chunk_size = None if sort_all else _PROBE_CHUNK
+        self.pending: Deque[Tuple[int, Path, int]] = deque()
+        self.exhausted = False
+
+    def refill(self) -> Dict[Path, Optional[ImageInfo]]:
+        """Lee el siguiente tramo de entradas y devuelve sus cabeceras (vacio si no se leyeron)."""
+        handler, job = self._handler, self._job
+        chunk = list(islice(self._files, self._chunk_size))
+        self.exhausted = not chunk
+        if self._journal is not None:
+            self._journal.add_inputs([path for _, path in chunk])
+        chunk = self._sink.filter(chunk)
+        infos = handler._probe_files([path for _, path in chunk]) if self._needs_probe and chunk else {}
+        costs = handler._estimate_costs(infos, job.width, job.height, job.width_unit, job.height_unit, job.mode)
+        if handler._schedule != "fifo":
+            # Orden estable: a igual coste se conserva el orden de entrada
+            chunk.sort(
+                key=lambda entry: _schedule_weight(infos.get(entry[1])),
+                reverse=handler._schedule == "largest_first",
+            )
+        self.pending.extend((index, path, costs.get(path, 0)) for index, path in chunk)
+        return infos
+
+    def take(self) -> Tuple[int, Path, int]:
+        """Saca la siguiente entrada pendiente y, si era la ultima, lee el tramo siguiente."""
+        entry = self.pending.popleft()
+        if not self.pending:
+            self.refill()
+        return entry
+
+    def drain(self) -> Iterator[Tuple[int, Path]]:
+        """Saca lo pendiente y lo que quedaba por leer sin procesarlo, para cancelarlo."""
+        entries = [(index, path) for index, path, _ in self.pending]
+        self.pending.clear()
+        self.exhausted = True
+        return chain(entries, self._files)
+
+
+class _Scheduler:
+    """
+    Trabajos de un lote en cada etapa y memoria que reservan.
+
+    Sin pipeline cada archivo va entero a un worker (in_flight). Con pipeline pasa por la
+    lectura (reading y, ya leido, ready), el remuestreo (in_flight) y la escritura (to_write y
+    writing). Un archivo reserva su coste estimado desde que entra a remuestreo hasta que se
+    escribe. Tambien vigila file_timeout y reemplaza el pool cuando un trabajo lo supera.
+    """
+
+    def __init__(
+        self,
+        handler: "BatchHandler",
+        job: BatchJob,
+        feed: _InputFeed,
+        use_processes: bool,
+        workers: int,
+        tuner: Optional[WorkerTuner],
+    ):
+        self._handler = handler
+        self._job = job
+        self._feed = feed
+        self._pipeline = handler._pipeline
+        self._use_processes = use_processes
+        self._workers = workers
+        self._tuner = tuner
+
+        self.reading: Dict[Future, Tuple[int, Path, int]] = {}
+        self.ready: Deque[Tuple[int, Path, int, Optional[bytes], float]] = deque()
+        self.in_flight: Dict[Future, Tuple[int, Path, int, float, Optional[bytes]]] = {}
+        self.to_write: Deque[Tuple[int, Path, int, _StagedImage]] = deque()
+        self.writing: Dict[Future, Tuple[int, Path, int]] = {}
+        self.reserved = 0
+
+        # Limite por archivo: desde cuando se ve en ejecucion cada trabajo y archivos expirados
+        self._file_timeout = handler._file_timeout
+        self._running_since: Dict[Future, float] = {}
+        self._timed_out = set()
+        self._abandoned: List[Executor] = []
+
+        self._executor = handler._acquire_executor(use_processes, workers)
+        self._warm = not use_processes
+        pipeline = self._pipeline
+        self._read_pool = ThreadPoolExecutor(max_workers=pipeline.read_workers) if pipeline else None
+        self._write_pool = ThreadPoolExecutor(max_workers=pipeline.write_workers) if pipeline else None
+
+    @property
+    def window(self) -> int:
+        """
+        Trabajos enviados a la vez: unos pocos por worker para que ninguno quede ocioso.
+
+        Durante la calibracion la ventana es la propia concurrencia que se mide.
+        """
+        if self._tuner is not None:
+            return self._tuner.limit
+        return self._workers * _IN_FLIGHT_PER_WORKER
+
+    @property
+    def active(self) -> bool:
+        """Hay trabajos en algun pool."""
+        return bool(self.reading or self.in_flight or self.writing)
+
+    @property
+    def queued(self) -> bool:
+        """Hay archivos leidos o renderizados esperando su etapa siguiente."""
+        return bool(self.ready or self.to_write)
+
+    def drop_queued(self) -> List[Tuple[int, Path]]:
+        """Saca los archivos que esperan etapa sin enviarlos y libera su memoria, para cancelarlos."""
+        entries = [(index, file_path) for index, file_path, *_ in self.ready]
+        for index, file_path, cost, _ in self.to_write:
+            self.reserved -= cost
+            entries.append((index, file_path))
+        self.ready.clear()
+        self.to_write.clear()
+        return entries
+
+    def submit_reads(self):
+        """Lectura anticipada, acotada por read_queue."""
+        pipeline = self._pipeline
+        while pipeline is not None and self._feed.pending and len(self.reading) + len(self.ready) < pipeline.read_queue:
+            index, file_path, cost = self._feed.take()
+            self.reading[self._read_pool.submit(_read_file, file_path)] = (index, file_path, cost)
+
+    def admit(self, held: Callable[[], int]) -> Iterator[Tuple[int, ProcessingResult]]:
+        """
+        Envia trabajos en orden mientras quepan en la ventana y en el presupuesto de memoria.
+
+        held da los resultados fuera de orden en espera: si llenan una ventana, se deja terminar
+        lo que esta en curso. Entrega como fallidos los archivos que un pool roto no acepto.
+        """
+        handler = self._handler
+        source = self.ready if self._pipeline is not None else self._feed.pending
+        window = self.window
+        while source and len(self.in_flight) + len(self.to_write) < window and not handler._cancelled:
+            busy = self.in_flight or self.to_write or self.writing
+            if busy and self.reserved + source[0][2] > handler._memory_budget > 0:
+                break
+            if busy and held() >= window:
+                break
+            if self._pipeline is not None:
+                index, file_path, cost, data, read_time = self.ready.popleft()
+            else:
+                (index, file_path, cost), data, read_time = self._feed.take(), None, 0.0
+            try:
+                future = self._submit(file_path, data)
+            except BrokenExecutor as e:
+                yield index, _error_result(self._job, file_path, e)
+                continue
+            self.in_flight[future] = (index, file_path, cost, read_time, data)
+            self.reserved += cost
+
+    def submit_writes(self):
+        """Escritura, acotada por write_queue."""
+        handler, pipeline = self._handler, self._pipeline
+        while pipeline is not None and self.to_write and len(self.writing) < pipeline.write_queue:
+            index, file_path, cost, staged = self.to_write.popleft()
+            future = self._write_pool.submit(
+                _write_file, handler._processor, self._job, file_path, staged, lambda: handler._cancelled
+            )
+            self.writing[future] = (index, file_path, cost)
+
+    def step(self) -> Iterator[Tuple[int, ProcessingResult]]:
+        """Espera a que termine algun trabajo o venza un limite y entrega los archivos terminados."""
+        done, _ = wait(
+            list(chain(self.reading, self.in_flight, self.writing)),
+            timeout=self._wait_timeout(),
+            return_when=FIRST_COMPLETED,
+        )
+        for future in done:
+            yield from self._collect(future)
+        yield from self._expire()
+
+    def close(self):
+        """Espera a los trabajos de este lote (el pool persiste entre lotes) y cierra los pools propios."""
+        for future in self.in_flight:
+            future.cancel()
+        wait(list(self.in_flight))
+        for pool in (self._read_pool, self._write_pool):
+            if pool is not None:
+                pool.shutdown(wait=True)
+        for pool in self._abandoned:
+            # Un hilo colgado no se puede esperar: termina por su cuenta
+            pool.shutdown(wait=False)
+
+    def _submit(self, file_path: Path, data: Optional[bytes]) -> Future:
+        handler, job, executor = self._handler, self._job, self._executor
+        if self._pipeline is None and self._use_processes:
+            return executor.submit(_process_in_worker, job, file_path)
+        if self._pipeline is None:
+            return executor.submit(_process_file, handler._processor, job, file_path, self._cancel_check(file_path))
+        if self._use_processes:
+            return executor.submit(_render_in_worker, job, file_path, data)
+        return executor.submit(
+            _render_file, handler._processor, job, file_path, data, self._cancel_check(file_path)
+        )
+
+    def _cancel_check(self, file_path: Path) -> Callable[[], bool]:
+        return lambda: self._handler._cancelled or file_path in self._timed_out
+
+    def _time_limit(self) -> float:
+        # Hasta que un proceso worker entrega su primer resultado, el arranque no cuenta
+        return self._file_timeout if self._warm else self._file_timeout + _PROCESS_STARTUP_GRACE
+
+    def _wait_timeout(self) -> Optional[float]:
+        if not (self._file_timeout and self.in_flight):
+            return None
+        now = time.monotonic()
+        for future in self.in_flight:
+            if future not in self._running_since and future.running():
+                self._running_since[future] = now
+        # Despertar en el proximo vencimiento o, para ver que trabajos empiezan, cada poco
+        timeout = min(self._file_timeout / 4, 1.0)
+        for since in self._running_since.values():
+            timeout = min(timeout, max(since + self._time_limit() - now, 0.0))
+        return timeout
+
+    def _collect(self, future: Future) -> Iterator[Tuple[int, ProcessingResult]]:
+        handler, job = self._handler, self._job
+        if future in self.reading:
+            index, file_path, cost = self.reading.pop(future)
+            data, read_time = future.result()
+            if handler._cancelled:
+                yield index, _cancelled_result(file_path)
+            else:
+                self.ready.append((index, file_path, cost, data, read_time))
+            return
+
+        if future in self.writing:
+            index, file_path, cost = self.writing.pop(future)
+            self.reserved -= cost
+            yield index, handler._future_result(future, job, file_path)
+            return
+
+        index, file_path, cost, read_time, _ = self.in_flight.pop(future)
+        self._running_since.pop(future, None)
+        if not self._warm:
+            self._warm = True
+            now = time.monotonic()
+            for running in self._running_since:
+                self._running_since[running] = max(self._running_since[running], now)
+        result = handler._future_result(future, job, file_path)
+        if self._tuner is not None and not handler._cancelled:
+            self._tuner.record()
+        if isinstance(result, _StagedImage):
+            result.result.add_timing("read", read_time)
+            self.to_write.append((index, file_path, cost, result))
+            return
+        self.reserved -= cost
+        yield index, result
+
+    def _expire(self) -> Iterator[Tuple[int, ProcessingResult]]:
+        handler = self._handler
+        now = time.monotonic()
+        expired = [
+            future for future, since in self._running_since.items()
+            if not future.done() and now - since >= self._time_limit()
+        ]
+        if not expired or handler._cancelled:
+            return
+        for future in expired:
+            index, file_path, cost, _, _ = self.in_flight.pop(future)
+            self._running_since.pop(future)
+            self._timed_out.add(file_path)
+            self.reserved -= cost
+            yield index, _timeout_result(self._job, file_path, self._file_timeout)
+
+        # Pool nuevo para que el resto del lote no espere al trabajo colgado
+        handler._abandon_executor(self._executor, self._use_processes)
+        self._abandoned.append(self._executor)
+        if self._use_processes:
+            # Los workers se terminaron: los demas archivos en curso se vuelven a enviar
+            for index, file_path, cost, read_time, data in reversed(list(self.in_flight.values())):
+                self.reserved -= cost
+                if self._pipeline is not None:
+                    self.ready.appendleft((index, file_path, cost, data, read_time))
+                else:
+                    self._feed.pending.appendleft((index, file_path, cost))
+            self.in_flight.clear()
+            self._running_since.clear()
+        self._executor = handler._acquire_executor(self._use_processes, self._workers)
+        self._warm = not self._use_processes
 
 
 class BatchHandler:
@@ -44,13 +875,127 @@ class BatchHandler:
         processor: ImageProcessor,
         max_workers: int = 0,
         progress_callback: Optional[Callable[[int, int, str], None]] = None,
+        memory_budget_mb: int = DEFAULT_MEMORY_BUDGET_MB,
+        probe: Optional[ImageProbe] = None,
+        backend: str = DEFAULT_BATCH_BACKEND,
+        tuning_path: Optional[Path] = WORKER_TUNING_PATH,
+        pipeline: Optional[PipelineConfig] = None,
+        dedup: Optional[str] = None,
+        jobs_dir: Path = JOBS_DIR,
+        schedule: str = DEFAULT_SCHEDULE,
+        file_timeout: float = 0.0,
+        warm_up: bool = False,
+        probe_index: Optional[Path] = None,
+        async_executor: Optional[Executor] = None,
     ):
-        """Inicializa el manejador."""
+        """
+        Inicializa el manejador.
+
+        max_workers=0 ajusta la concurrencia automaticamente: se mide el rendimiento durante
+        los primeros archivos variando los trabajos en curso y el mejor valor se guarda en
+        tuning_path por maquina, backend y clase de carga (imagenes pequenas o grandes,
+        disco local o de red). Con tuning_path=None se calibra en cada lote.
+
+        memory_budget_mb limita la memoria estimada (segun la cabecera de cada archivo) de las
+        imagenes en proceso simultaneo; una imagen que no cabe sola se procesa sin otras en
+        paralelo. 0 desactiva el limite. probe permite compartir un indice de cabeceras; sin el,
+        cada lote usa un indice temporal en memoria salvo que se indique probe_index (por
+        ejemplo PROBE_INDEX_PATH): ese indice persistente se abre con el primer lote, evita
+        releer en ejecuciones siguientes las cabeceras de los archivos sin cambios y close()
+        lo cierra.
+
+        backend elige entre hilos ("threads"), procesos ("processes") o "auto", que usa
+        procesos en equipos con varios nucleos y lotes que los puedan ocupar. Los procesos
+        evitan que el trabajo en Python de cada archivo (EXIF, rutas, resultados) se
+        serialice en el GIL, a cambio de arrancar los workers y copiar el procesador.
+
+        pipeline separa la lectura y la codificacion/escritura en etapas con sus propios hilos
+        y colas, de modo que la CPU sigue remuestreando mientras hay lecturas en curso (por
+        ejemplo en unidades de red). Con procesos la codificacion se hace en el worker para no
+        devolver pixeles al proceso principal.
+
+        dedup ("hardlink" o "copy") procesa una sola vez cada contenido repetido en el lote:
+        los archivos se agrupan por tamano y solo los que coinciden se comparan por hash. Las
+        demas salidas se crean como enlace duro (o copia, si no es posible) de la primera y
+        su resultado indica en duplicate_of el archivo que se proceso.
+
+        schedule ordena el trabajo segun el tamano leido en la cabecera: "fifo" respeta el
+        orden de entrada, "largest_first" empieza por las imagenes mas grandes para que
+        ninguna quede sola al final con los demas workers ociosos, y "smallest_first" da
+        resultados antes. Con una lista se ordena el lote completo; con otros iterables,
+        cada tramo de lectura.
+
+        file_timeout limita los segundos de cada archivo desde que un worker lo empieza (0 = sin
+        limite); los que lo superan fallan con el codigo TIMEOUT. Con procesos el pool se
+        termina y se reemplaza, y los demas archivos en curso se vuelven a enviar; con hilos,
+        que no se pueden detener, el hilo colgado se abandona (su archivo ya no se escribe) y
+        el lote sigue en un pool nuevo.
+
+        jobs_dir guarda los diarios de los lotes con job_id, que permiten reanudarlos.
+
+        El pool de workers se crea con el primer lote y se reutiliza en los siguientes mientras
+        no cambien el backend, el numero de workers o (con procesos) la configuracion del
+        procesador; close() o un bloque with lo liberan. warm_up carga los plugins de Pillow
+        en todos los workers al crear el pool, antes de que lleguen los archivos.
+
+        async_executor conduce los lotes de aiter_batch y process_batch_async. Por defecto es
+        un pool compartido por todos los manejadores de DEFAULT_ASYNC_BATCHES hilos, y los
+        lotes de mas esperan a que termine otro. Con un pool propio (que el manejador no
+        cierra) se puede dar a un manejador mas lotes simultaneos o aislarlo de los demas.
+        """
+        if backend not in BATCH_BACKENDS:
+            raise ValidationError(tr.get("err.invalid_backend", backend=backend), code="INVALID_BACKEND")
+        if pipeline is not None and min(
+            pipeline.read_workers, pipeline.read_queue, pipeline.write_workers, pipeline.write_queue
+        ) < 1:
+            raise ValidationError(tr.get("err.invalid_pipeline"), code="INVALID_PIPELINE")
+        if dedup is not None and dedup not in DEDUP_MODES:
+            raise ValidationError(tr.get("err.invalid_dedup", mode=dedup), code="INVALID_DEDUP")
+        if schedule not in SCHEDULE_POLICIES:
+            raise ValidationError(tr.get("err.invalid_schedule", schedule=schedule), code="INVALID_SCHEDULE")
+        if file_timeout < 0:
+            raise ValidationError(tr.get("err.invalid_timeout"), code="INVALID_TIMEOUT")
+
         self._processor = processor
-        self._max_workers = max_workers if max_workers > 0 else _get_optimal_workers()
+        self._max_workers = max(max_workers, 0)
+        self._tuning = TuningStore(tuning_path)
+        self._memory_budget = max(memory_budget_mb, 0) * 1024 * 1024
+        self._probe = probe
+        self._probe_index = probe_index
+        self._owned_probe: Optional[ImageProbe] = None
+        self._backend = backend
+        self._pipeline = pipeline
+        self._dedup = dedup
+        self._jobs_dir = jobs_dir
+        self._schedule = schedule
+        self._file_timeout = file_timeout
         self._progress_callback = progress_callback
         self._lock = threading.Lock()
         self._cancelled = False
+        self._cancel_event = None
+        self._warm_up = warm_up
+        self._executor: Optional[Executor] = None
+        self._executor_key: Optional[tuple] = None
+        self._async_executor = async_executor
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def close(self):
+        """Cancela el lote en curso, si lo hay, y cierra el pool de workers y el indice de cabeceras propio."""
+        self.cancel()
+        with self._lock:
+            executor, self._executor, self._executor_key = self._executor, None, None
+            probe, self._owned_probe = self._owned_probe, None
+            if probe is not None:
+                self._probe = None
+        if executor is not None:
+            executor.shutdown(wait=True)
+        if probe is not None:
+            probe.close()
 
     def process_batch(
         self,
@@ -62,121 +1007,531 @@ class BatchHandler:
         height_unit: str,
         mode: ResizeMode,
         suffix: str = "_resized",
+        incremental: bool = False,
+        hash_inputs: bool = False,
+        job_id: Optional[str] = None,
+        encoder_profile: Optional[str] = None,
+        output_format: str = DEFAULT_OUTPUT_FORMAT,
     ) -> List[ProcessingResult]:
-        """Procesa un lote de imagenes."""
+        """Procesa un lote de imagenes y devuelve los resultados ordenados por ruta."""
+        results = list(
+            self.iter_batch(
+                input_files, output_dir, width, height, width_unit, height_unit, mode, suffix,
+                incremental=incremental, hash_inputs=hash_inputs, job_id=job_id,
+                encoder_profile=encoder_profile, output_format=output_format,
+            )
+        )
+        return sorted(results, key=lambda r: str(r.input_path))
+
+    def resume(self, job_id: str, only_failed: bool = False) -> List[ProcessingResult]:
+        """
+        Reanuda un lote desde su diario con los mismos parametros.
+
+        Procesa las entradas que no llegaron a terminar o, con only_failed=True, solo las
+        que fallaron. Los nuevos resultados se anaden al mismo diario. Si la configuracion
+        del procesador (dpi, calidad, max_bytes...) ya no es la del lote, se rechaza con
+        JOB_SETTINGS_CHANGED para no mezclar salidas distintas en un mismo trabajo.
+        """
+        state = BatchJournal.load(self._journal_path(job_id))
+        if state is None:
+            raise ValidationError(tr.get("err.job_not_found", job=job_id), code="JOB_NOT_FOUND")
+
+        params = state.params
+        job = BatchJob(
+            Path(params["output_dir"]), params["width"], params["height"], params["width_unit"],
+            params["height_unit"], ResizeMode[params["mode"]], params["suffix"],
+            params.get("encoder_profile"), params.get("output_format", DEFAULT_OUTPUT_FORMAT),
+        )
+        # Comparado tras pasar por JSON, como quedo en el diario
+        current = json.loads(json.dumps(self._batch_params(job), default=str))
+        changed = [key for key, value in current.items() if key in params and params[key] != value]
+        if changed:
+            raise ValidationError(
+                tr.get("err.job_settings_changed", job=job_id, settings=", ".join(changed)),
+                code="JOB_SETTINGS_CHANGED"
+            )
+
+        return self.process_batch(
+            input_files=state.failed if only_failed else state.remaining,
+            output_dir=job.output_dir,
+            width=job.width,
+            height=job.height,
+            width_unit=job.width_unit,
+            height_unit=job.height_unit,
+            mode=job.mode,
+            suffix=job.suffix,
+            incremental=params["incremental"],
+            hash_inputs=params["hash_inputs"],
+            job_id=job_id,
+            encoder_profile=job.encoder_profile,
+            output_format=job.output_format,
+        )
+
+    def iter_batch(
+        self,
+        input_files: Iterable[Path],
+        output_dir: Path,
+        width: Optional[float],
+        height: Optional[float],
+        width_unit: str,
+        height_unit: str,
+        mode: ResizeMode,
+        suffix: str = "_resized",
+        ordered: bool = False,
+        incremental: bool = False,
+        hash_inputs: bool = False,
+        job_id: Optional[str] = None,
+        encoder_profile: Optional[str] = None,
+        output_format: str = DEFAULT_OUTPUT_FORMAT,
+        progress_callback: Optional[Callable[[int, int, str], None]] = None,
+    ) -> Iterator[ProcessingResult]:
+        """
+        Procesa un lote de imagenes entregando cada resultado en cuanto termina.
+
+        Con ordered=True los resultados salen en el orden de entrada; los que terminan antes
+        esperan en un buffer y, mientras tenga una ventana de trabajos llena, no se envian
+        archivos nuevos. Requiere schedule="fifo": con otro orden el primer archivo podria
+        empezar el ultimo y todo el lote esperaria en el buffer. Si se deja de
+        consumir el iterador, el lote se cancela. input_files puede ser cualquier iterable;
+        si no tiene len() el total que recibe progress_callback es 0.
+
+        incremental=True guarda un manifiesto en output_dir y omite los archivos cuya salida
+        sigue vigente: misma entrada (tamano y fecha de modificacion), mismos parametros y
+        salida intacta. Se informan como exitosos con skipped=True. hash_inputs compara
+        ademas el contenido, para no repetir entradas tocadas o copiadas sin cambios.
+
+        Con job_id se anota el lote en un diario en jobs_dir (parametros del lote y del
+        procesador, entradas y cada archivo terminado, por tandas) que resume() usa tras un
+        cierre o una caida.
+
+        encoder_profile ("fastest", "balanced" o "smallest") sustituye en este lote al perfil
+        del codificador del procesador. output_format ("JPEG", "PNG", "WEBP", "AVIF") convierte
+        todas las salidas a ese formato; "keep" conserva el de cada entrada. progress_callback
+        sustituye en este lote al del manejador.
+        """
+        if encoder_profile is not None and encoder_profile not in ENCODER_PROFILES:
+            raise ValidationError(
+                tr.get("err.invalid_encoder_profile", profile=encoder_profile), code="INVALID_ENCODER_PROFILE"
+            )
+        output_format = self._check_output_format(output_format)
+        if ordered and self._schedule != "fifo":
+            raise ValidationError(
+                tr.get("err.ordered_schedule", schedule=self._schedule), code="ORDERED_SCHEDULE"
+            )
         self._cancelled = False
-        results: List[ProcessingResult] = []
-        total = len(input_files)
+        total = len(input_files) if isinstance(input_files, Sized) else 0
         processed = 0
+        progress_callback = progress_callback or self._progress_callback
 
         try:
             output_dir.mkdir(parents=True, exist_ok=True)
         except (OSError, PermissionError) as e:
-            return [
-                ProcessingResult(
-                    input_path=Path(""),
-                    output_path=output_dir,
-                    success=False,
-                    original_size=(0, 0),
-                    error_message=tr.get("msg.cant_create_dir", error=str(e))
-                )
-            ]
-
-        def process_single(file_path: Path) -> ProcessingResult:
-            if self._cancelled:
-                return ProcessingResult(
-                    input_path=file_path,
-                    output_path=Path(),
-                    success=False,
-                    original_size=(0, 0),
-                    error_message=tr.get("err.process_cancelled")
-                )
+            yield ProcessingResult(
+                input_path=Path(""),
+                output_path=output_dir,
+                success=False,
+                original_size=(0, 0),
+                error_message=tr.get("msg.cant_create_dir", error=str(e))
+            )
+            return
 
-            try:
-                with Image.open(file_path) as img:
-                    img = ImageOps.exif_transpose(img)
-                    original_size = img.size
-
-                output_name = f"{file_path.stem}{suffix}{file_path.suffix}"
-                output_path = output_dir / output_name
-                
-                # Prevenir colisión destructiva (Input = Output)
-                try:
-                    if file_path.resolve() == output_path.resolve():
-                        output_name = f"{file_path.stem}_pyc{file_path.suffix}"
-                        output_path = output_dir / output_name
-                except Exception:
-                    pass
-
-                final_size = self._processor.resize(
-                    input_path=file_path,
-                    output_path=output_path,
-                    width=width,
-                    height=height,
-                    width_unit=width_unit,
-                    height_unit=height_unit,
-                    mode=mode,
-                    cancel_check=lambda: self._cancelled,
-                )
-
-                return ProcessingResult(
-                    input_path=file_path,
-                    output_path=output_path,
-                    success=True,
-                    original_size=original_size,
-                    final_size=final_size,
-                )
-
-            except Exception as e:
-                return ProcessingResult(
-                    input_path=file_path,
-                    output_path=output_dir / f"{file_path.stem}{suffix}{file_path.suffix}",
-                    success=False,
-                    original_size=(0, 0),
-                    error_message=str(e),
-                )
+        job = BatchJob(output_dir, width, height, width_unit, height_unit, mode, suffix, encoder_profile, output_format)
+        is_cancelled = lambda: self._cancelled
 
         def update_progress(result: ProcessingResult):
             nonlocal processed
             with self._lock:
                 processed += 1
-                if self._progress_callback:
-                    self._progress_callback(processed, total, result.input_path.name)
+                if progress_callback:
+                    progress_callback(processed, total, result.input_path.name)
             return result
 
-        if self._max_workers == 1:
+        if (
+            self._max_workers == 1 and self._pipeline is None and self._schedule == "fifo"
+            and not (incremental or self._dedup or job_id or self._file_timeout)
+        ):
             for file_path in input_files:
-                result = process_single(file_path)
-                results.append(update_progress(result))
-        else:
-            with ThreadPoolExecutor(max_workers=self._max_workers) as executor:
-                future_to_file = {
-                    executor.submit(process_single, fp): fp for fp in input_files
-                }
-                for future in as_completed(future_to_file):
-                    result = future.result()
-                    results.append(update_progress(result))
+                yield update_progress(_process_file(self._processor, job, file_path, is_cancelled))
+            return
+
+        journal: Optional[BatchJournal] = None
+        if job_id:
+            # Los mismos parametros que el manifiesto: incluyen la configuracion del procesador
+            journal = BatchJournal(self._journal_path(job_id), {
+                "output_dir": str(output_dir),
+                "incremental": incremental,
+                "hash_inputs": hash_inputs,
+                **self._batch_params(job),
+            })
+            if isinstance(input_files, Sized):
+                # Con la lista completa de antemano se puede reanudar todo lo que falte
+                journal.add_inputs(list(input_files))
+        manifest: Optional[BatchManifest] = None
+        if incremental:
+            manifest = BatchManifest(output_dir, params_digest(self._batch_params(job)), hash_inputs)
+
+        sink = _ResultSink(
+            job, ordered, manifest, journal, DuplicateIndex() if self._dedup is not None else None,
+            self._dedup == "hardlink", update_progress, is_cancelled,
+        )
+        scheduler: Optional[_Scheduler] = None
+        try:
+            feed = _InputFeed(self, job, input_files, sink, journal)
+            first_infos = feed.refill()
+            backend = self._resolve_backend(total if isinstance(input_files, Sized) else None)
+            first_path = feed.pending[0][1] if feed.pending else None
+            workers, tuner = self._plan_workers(backend, first_path, first_infos.values())
+            del first_infos
+            scheduler = _Scheduler(self, job, feed, backend == "processes", workers, tuner)
 
+            while sink.finished or feed.pending or not feed.exhausted or scheduler.active or scheduler.queued:
+                while sink.finished:
+                    yield from sink.emit(*sink.finished.popleft())
+                if not feed.pending and not feed.exhausted and not self._cancelled:
+                    # Tramo completo omitido por el manifiesto: leer el siguiente
+                    feed.refill()
+
+                if self._cancelled:
+                    # Nada mas se envia: lo que no llego a un pool se marca cancelado
+                    for index, file_path in chain(scheduler.drop_queued(), feed.drain()):
+                        yield from sink.emit(index, _cancelled_result(file_path))
+                else:
+                    scheduler.submit_reads()
+                for index, result in scheduler.admit(lambda: len(sink.reorder)):
+                    yield from sink.emit(index, result)
+                scheduler.submit_writes()
+
+                if scheduler.active:
+                    for index, result in scheduler.step():
+                        yield from sink.emit(index, result)
+        except BaseException:
+            # Error o iterador abandonado: cancelar antes de que los pools esperen a sus trabajos
+            self.cancel()
+            raise
+        finally:
+            if scheduler is not None:
+                scheduler.close()
+            sink.close()
+
+    async def process_batch_async(
+        self,
+        input_files: List[Path],
+        output_dir: Path,
+        width: Optional[float],
+        height: Optional[float],
+        width_unit: str,
+        height_unit: str,
+        mode: ResizeMode,
+        suffix: str = "_resized",
+        **options,
+    ) -> List[ProcessingResult]:
+        """Version asincrona de process_batch; acepta las mismas opciones que iter_batch."""
+        options.pop("with_progress", None)
+        results = [
+            result async for result in self.aiter_batch(
+                input_files, output_dir, width, height, width_unit, height_unit, mode, suffix, **options
+            )
+        ]
         return sorted(results, key=lambda r: str(r.input_path))
 
+    async def aiter_batch(
+        self,
+        input_files: Iterable[Path],
+        output_dir: Path,
+        width: Optional[float],
+        height: Optional[float],
+        width_unit: str,
+        height_unit: str,
+        mode: ResizeMode,
+        suffix: str = "_resized",
+        with_progress: bool = False,
+        **options,
+    ) -> AsyncIterator[Union[ProcessingResult, BatchProgress]]:
+        """
+        Version asincrona de iter_batch: cada resultado llega al bucle de eventos en cuanto termina.
+
+        Con with_progress=True el flujo intercala un BatchProgress antes de cada archivo
+        terminado, de modo que el avance se consume con el mismo async for, sin callbacks. Un
+        progress_callback (el de las opciones o el del manejador) se sigue llamando, en el bucle
+        de eventos y no en el hilo del lote.
+
+        El lote se conduce desde async_executor: por defecto, un pool compartido de
+        DEFAULT_ASYNC_BATCHES hilos en el que los lotes de mas esperan turno, de modo que
+        muchos lotes a la vez no crean hilos sin limite. Cancelar la tarea (o dejar de iterar)
+        llama a cancel() y espera a que el lote se detenga. Cada manejador ejecuta un solo lote
+        a la vez.
+        """
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+        # Limita los resultados en espera si el consumidor va mas lento que el lote
+        slots = threading.Semaphore(_ASYNC_QUEUE)
+        stop = threading.Event()
+
+        def post(item):
+            call_in_loop(queue.put_nowait, item)
+
+        def call_in_loop(function, *args):
+            try:
+                loop.call_soon_threadsafe(function, *args)
+            except RuntimeError:
+                # Bucle de eventos ya cerrado
+                stop.set()
+
+        progress_callback = options.pop("progress_callback", None) or self._progress_callback
+
+        def on_progress(done: int, total: int, filename: str):
+            # Desde el hilo del lote, en orden con los resultados que se publican despues
+            if with_progress:
+                post(BatchProgress(done, total, filename))
+            if progress_callback is not None:
+                call_in_loop(progress_callback, done, total, filename)
+
+        if with_progress or progress_callback is not None:
+            options["progress_callback"] = on_progress
+
+        def drive():
+            if stop.is_set():
+                return
+            stream = self.iter_batch(
+                input_files, output_dir, width, height, width_unit, height_unit, mode, suffix, **options
+            )
+            try:
+                for result in stream:
+                    while not slots.acquire(timeout=0.1):
+                        if stop.is_set():
+                            return
+                    if stop.is_set():
+                        return
+                    post(result)
+            except BaseException as e:
+                post(e)
+            finally:
+                # Cerrar el iterador cancela lo que quede del lote
+                stream.close()
+                post(_ASYNC_END)
+
+        future = loop.run_in_executor(self._async_executor or _get_async_pool(), drive)
+        try:
+            while True:
+                item = await queue.get()
+                if item is _ASYNC_END:
+                    break
+                if isinstance(item, BatchProgress):
+                    # El avance no ocupa hueco: va uno por resultado
+                    yield item
+                    continue
+                slots.release()
+                if isinstance(item, BaseException):
+                    raise item
+                yield item
+        finally:
+            if not future.done():
+                stop.set()
+                self.cancel()
+                future.cancel()
+                # Esperar al lote para no dejar trabajo ni hilos en segundo plano
+                await asyncio.wait([future])
+
+    def _journal_path(self, job_id: str) -> Path:
+        return self._jobs_dir / f"{job_id}.jsonl"
+
+    def _batch_params(self, job: BatchJob) -> Dict[str, object]:
+        """Parametros efectivos de un lote, de los que depende cada salida."""
+        return {
+            "width": job.width,
+            "height": job.height,
+            "width_unit": job.width_unit,
+            "height_unit": job.height_unit,
+            "mode": job.mode.name,
+            "suffix": job.suffix,
+            "resample": DEFAULT_RESAMPLE,
+            **self._processor.settings(),
+            **({"encoder_profile": job.encoder_profile} if job.encoder_profile else {}),
+            "output_format": job.output_format,
+        }
+
+    @staticmethod
+    def _check_output_format(output_format: str) -> str:
+        """Normaliza el formato de salida y comprueba que Pillow pueda escribirlo."""
+        normalized = output_format if output_format == "keep" else output_format.upper()
+        if normalized not in BatchHandler.available_output_formats():
+            raise ValidationError(
+                tr.get("err.invalid_output_format", format=output_format), code="INVALID_OUTPUT_FORMAT"
+            )
+        return normalized
+
+    @staticmethod
+    def available_output_formats() -> Tuple[str, ...]:
+        """Formatos de OUTPUT_FORMATS que la instalacion de Pillow puede escribir, con "keep"."""
+        extensions = Image.registered_extensions()
+        return tuple(
+            name for name in OUTPUT_FORMATS
+            if name == "keep" or (extensions.get(OUTPUT_FORMAT_EXTENSIONS[name]) == name and name in Image.SAVE)
+        )
+
+    @staticmethod
+    def _future_result(
+        future: Future, job: BatchJob, file_path: Path
+    ) -> Union[ProcessingResult, _StagedImage]:
+        """Obtiene el resultado de un trabajo, desempaquetando el de un proceso worker."""
+        try:
+            result = future.result()
+        except Exception as e:
+            # Un worker terminado de forma abrupta solo hace fallar su archivo
+            return _error_result(job, file_path, e)
+        if isinstance(result, tuple):
+            return ProcessingResult.unpack(result)
+        return result
+
+    def _resolve_backend(self, file_count: Optional[int]) -> str:
+        """Resuelve el backend "auto" segun nucleos disponibles y tamano del lote (None = desconocido)."""
+        if self._backend != "auto":
+            return self._backend
+        workers = self._max_workers or _get_optimal_workers()
+        if (os.cpu_count() or 1) >= _AUTO_PROCESS_MIN_CPUS and (
+            file_count is None or file_count >= workers * _AUTO_PROCESS_MIN_FILES_PER_WORKER
+        ):
+            return "processes"
+        return "threads"
+
+    def _acquire_executor(self, use_processes: bool, workers: int) -> Executor:
+        """Devuelve el pool del manejador, creandolo o reemplazandolo si cambio su configuracion."""
+        key: tuple = (use_processes, workers)
+        if use_processes:
+            # Los procesos reciben una copia del procesador y el idioma al arrancar
+            key += (tuple(sorted(self._processor.settings().items())), tr.current_lang)
+
+        with self._lock:
+            executor = self._executor
+            if executor is not None and (key != self._executor_key or getattr(executor, "_broken", False)):
+                executor.shutdown(wait=True)
+                executor = None
+            if executor is None:
+                executor = self._create_executor(use_processes, workers)
+                if self._warm_up:
+                    for _ in range(workers):
+                        executor.submit(_warm_up_worker)
+                self._executor, self._executor_key = executor, key
+            elif self._cancel_event is not None:
+                # Evento de cancelacion del lote anterior
+                self._cancel_event.clear()
+            return executor
+
+    def _create_executor(self, use_processes: bool, workers: int) -> Executor:
+        """Crea el pool de hilos o de procesos del manejador."""
+        if not use_processes:
+            self._cancel_event = None
+            return ThreadPoolExecutor(max_workers=workers)
+
+        # spawn evita heredar con fork el estado de los hilos de la GUI
+        context = multiprocessing.get_context("spawn")
+        self._cancel_event = context.Event()
+        if self._cancelled:
+            self._cancel_event.set()
+        return ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=context,
+            initializer=_init_worker,
+            initargs=(self._processor, self._cancel_event, tr.current_lang),
+        )
+
+    def _abandon_executor(self, executor: Executor, use_processes: bool):
+        """Deja de usar un pool con un trabajo colgado; con procesos termina sus workers."""
+        with self._lock:
+            if self._executor is executor:
+                self._executor, self._executor_key = None, None
+        if use_processes:
+            kill_workers = getattr(executor, "kill_workers", None)
+            if kill_workers is not None:
+                kill_workers()
+            else:
+                for process in list((getattr(executor, "_processes", None) or {}).values()):
+                    process.kill()
+            executor.shutdown(wait=False, cancel_futures=True)
+        else:
+            executor.shutdown(wait=False)
+
+    def _plan_workers(
+        self, backend: str, first_path: Optional[Path], first_infos: Iterable[Optional[ImageInfo]]
+    ) -> Tuple[int, Optional[WorkerTuner]]:
+        """
+        Workers del lote: los fijados en max_workers, los guardados para esta clase de carga o,
+        si no los hay, un punto de partida con el calibrador que los medira.
+        """
+        if self._max_workers:
+            return self._max_workers, None
+        storage = storage_class(first_path.parent) if first_path is not None else "local"
+        key = "|".join((machine_id(), backend, size_class(first_infos), storage))
+        workers = self._tuning.load(key)
+        if workers is not None:
+            return workers, None
+        workers = max_workers_for(backend, storage)
+        tuner = WorkerTuner(_get_optimal_workers(), workers, on_finish=lambda n, rate: self._tuning.save(key, n, rate))
+        return workers, tuner
+
+    def _probe_files(self, input_files: List[Path]) -> Dict[Path, Optional[ImageInfo]]:
+        """Lee las cabeceras del lote con el indice compartido o uno temporal."""
+        probe = self._shared_probe() or ImageProbe()
+        try:
+            return probe.probe(input_files)
+        finally:
+            if probe is not self._probe:
+                probe.close()
+
+    def _shared_probe(self) -> Optional[ImageProbe]:
+        """Indice recibido o, si no hay, el persistente de probe_index, abierto una sola vez."""
+        with self._lock:
+            if self._probe is None and self._probe_index is not None:
+                try:
+                    self._probe = self._owned_probe = ImageProbe(self._probe_index)
+                except (OSError, sqlite3.Error):
+                    # Cache no escribible: cada lote usa un indice temporal
+                    self._probe_index = None
+            return self._probe
+
+    def _estimate_costs(
+        self,
+        infos: Dict[Path, Optional[ImageInfo]],
+        width: Optional[float],
+        height: Optional[float],
+        width_unit: str,
+        height_unit: str,
+        mode: ResizeMode,
+    ) -> Dict[Path, int]:
+        """Estima la memoria de cada archivo a partir de su cabecera."""
+        if self._memory_budget <= 0:
+            return {}
+
+        costs: Dict[Path, int] = {}
+        for path, info in infos.items():
+            if info is None:
+                continue
+            try:
+                costs[path] = self._processor.estimate_memory(info, width, height, width_unit, height_unit, mode)
+            except Exception:
+                # Los errores de dimensiones se informan al procesar el archivo
+                continue
+        return costs
+
     def cancel(self):
         """Cancela el procesamiento en curso."""
         self._cancelled = True
+        cancel_event = self._cancel_event
+        if cancel_event is not None:
+            cancel_event.set()
 
     @staticmethod
-    def scan_directory(directory: Path, recursive: bool = False) -> List[Path]:
-        """Escanea un directorio buscando imagenes."""
-        if not directory.exists():
-            raise FileSystemError(tr.get("err.dir_not_found", dir=str(directory)), code="DIR_NOT_FOUND")
-
-        files = []
-        pattern = "**/*" if recursive else "*"
-
-        for item in directory.glob(pattern):
-            if item.is_file() and item.suffix.lower() in SUPPORTED_EXTENSIONS:
-                files.append(item)
+    def scan_directory(directory: Path, recursive: bool = False, **options) -> List[Path]:
+        """
+        Escanea un directorio buscando imagenes y devuelve la lista ordenada.
 
-        return sorted(files)
+        Acepta las opciones de scanner.iter_images (include, exclude, symlinks); para empezar
+        a procesar antes de terminar la busqueda, pasar iter_images(...) a iter_batch. Como
+        en la interfaz, sniff esta activo salvo que se pase sniff=False: las imagenes sin
+        extension o con una extension ajena tambien se encuentran.
+        """
+        options.setdefault("sniff", True)
+        return scan_images(directory, recursive, **options)
 
     @staticmethod
     def validate_output_directory(directory: Path) -> bool:
@@ -0,0 +1,97 @@
+"""Deteccion de entradas con contenido identico dentro de un lote."""
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+
+from .manifest import file_digest
+from .passthrough import copy_file
+
+_HASH_WORKERS = 8
+
+
+class DuplicateIndex:
+    """
+    Agrupa los archivos de un lote por contenido a medida que llegan.
+
+    Primero se agrupan por tamano y extension (que decide el formato de salida); solo los
+    archivos que coinciden con otro se leen completos para calcular su hash. El primer
+    archivo de cada contenido es el que se procesa.
+    """
+
+    def __init__(self, max_workers: int = _HASH_WORKERS):
+        self._max_workers = max_workers
+        self._by_size: Dict[Tuple[int, str], List[Path]] = {}
+        self._key: Dict[Path, Tuple[int, str]] = {}
+        self._digests: Dict[Path, Optional[str]] = {}
+        self._by_digest: Dict[Tuple[str, str], Path] = {}
+        self._registered: Set[Path] = set()
+
+    def assign(self, paths: List[Path], digests: Optional[Dict[Path, str]] = None) -> Dict[Path, Path]:
+        """
+        Devuelve, para cada archivo repetido de paths, el primer archivo con su mismo contenido.
+
+        digests son hashes ya calculados (por ejemplo por el manifiesto) que no se vuelven a leer.
+        """
+        new_paths = [path for path in dict.fromkeys(paths) if path not in self._key]
+        with ThreadPoolExecutor(max_workers=self._max_workers) as executor:
+            sizes = list(executor.map(_file_size, new_paths))
+
+            touched = []
+            for path, size in zip(new_paths, sizes):
+                if size is None:
+                    continue
+                key = (size, path.suffix.lower())
+                self._key[path] = key
+                bucket = self._by_size.setdefault(key, [])
+                bucket.append(path)
+                if len(bucket) > 1:
+                    touched.append(bucket)
+
+            # Hash completo solo para los tamanos repetidos
+            to_hash = list(dict.fromkeys(
+                path for bucket in touched for path in bucket if path not in self._digests
+            ))
+            if digests:
+                self._digests.update((path, digests[path]) for path in to_hash if digests.get(path))
+                to_hash = [path for path in to_hash if path not in self._digests]
+            for path, digest in zip(to_hash, executor.map(_safe_digest, to_hash)):
+                self._digests[path] = digest
+
+        for bucket in touched:
+            # En orden de llegada, para que el primero de cada contenido sea el que se procesa
+            for path in bucket:
+                digest = self._digests.get(path)
+                if path not in self._registered and digest is not None:
+                    self._by_digest.setdefault((digest, self._key[path][1]), path)
+                    self._registered.add(path)
+
+        duplicates: Dict[Path, Path] = {}
+        for path in paths:
+            digest = self._digests.get(path)
+            if digest is None:
+                continue
+            first = self._by_digest[(digest, self._key[path][1])]
+            if first != path:
+                duplicates[path] = first
+        return duplicates
+
+
+def materialize(source: Path, target: Path, hardlink: bool = True):
+    """Crea target como enlace duro de source (o copia si no se puede enlazar) de forma atomica."""
+    copy_file(source, target, link=hardlink)
+
+
+def _file_size(path: Path) -> Optional[int]:
+    try:
+        return os.stat(path).st_size
+    except OSError:
+        return None
+
+
+def _safe_digest(path: Path) -> Optional[str]:
+    try:
+        return file_digest(path)
+    except OSError:
+        return None
@@ -1,22 +1,41 @@
 """Procesamiento de imagenes individuales."""
 
+import io
+import math
 import os
+import time
 import uuid
+from contextlib import contextmanager
+from dataclasses import dataclass, field
 from enum import Enum, auto
 from pathlib import Path
-from typing import Tuple, Union, Optional, Callable
+from typing import Dict, Tuple, Union, Optional, Callable
 
-from PIL import Image, ImageOps
+from PIL import Image
 import piexif
 
+try:
+    from PIL import ImageCms
+    CMS_AVAILABLE = True
+except ImportError:
+    CMS_AVAILABLE = False
+
 from ..utils import (
     DEFAULT_DPI,
-    SUPPORTED_EXTENSIONS,
+    DEFAULT_ENCODER_PROFILE,
+    DEFAULT_REDUCING_GAP,
+    ENCODER_OPTIONS,
+    ENCODER_PROFILES,
+    PASSTHROUGH_MODES,
     ProcessingError,
     ValidationError,
 )
 from ..utils.i18n import tr
 from .unit_converter import UnitConverter
+from .passthrough import Patch, copy_file, dpi_patch
+from .sniff import SNIFF_BYTES, sniff_format, sniff_header
+from .ssim import luma_plane, ssim
+from .probe import SWAPPED_ORIENTATIONS as _SWAPPED_ORIENTATIONS, ImageInfo, read_orientation
 
 Numeric = Union[int, float]
 
@@ -29,14 +48,226 @@ class ResizeMode(Enum):
     CROP = auto()
 
 
+@dataclass
+class ResizeResult:
+    """Resultado del redimensionamiento de una imagen."""
+    original_size: Tuple[int, int]
+    final_size: Tuple[int, int]
+    format: str = ""
+    mode: str = ""
+    timings: Dict[str, float] = field(default_factory=dict)
+    # Calidad del codificador con perdida y SSIM de la salida si se busco un objetivo
+    quality: Optional[int] = None
+    ssim: Optional[float] = None
+    # La salida es la entrada copiada o enlazada sin decodificar
+    passthrough: bool = False
+
+    def add_timing(self, stage: str, elapsed: float) -> None:
+        """Suma la duracion de una etapa al desglose y al total."""
+        self.timings[stage] = self.timings.get(stage, 0.0) + elapsed
+        self.timings["total"] = self.timings.get("total", 0.0) + elapsed
+
+
+@dataclass
+class RenderedImage:
+    """Imagen ya redimensionada en memoria, pendiente de codificar y escribir."""
+    image: Image.Image
+    result: ResizeResult
+    icc_profile: Optional[bytes] = None
+    exif: Optional[bytes] = None
+    # Color con el que se aplana la transparencia si el formato de salida no la admite
+    background: Tuple[int, int, int, int] = (255, 255, 255, 255)
+
+
+@dataclass
+class PassthroughPlan:
+    """Entrada que ya cumple el tamano pedido y el parche de resolucion que necesita su copia."""
+    result: ResizeResult
+    patch: Optional[Patch] = None
+
+
+@contextmanager
+def _processing_errors():
+    """Traduce los errores inesperados a ProcessingError con su codigo."""
+    try:
+        yield
+    except ProcessingError:
+        raise
+    except (OSError, IOError) as e:
+        raise ProcessingError(tr.get("err.io_error", error=str(e)), code="IO_ERROR")
+    except ValidationError:
+        raise
+    except Exception as e:
+        raise ProcessingError(tr.get("err.unexpected", error=str(e)), code="UNEXPECTED_ERROR")
+
+
+# Transposicion que corrige cada orientacion EXIF (igual que ImageOps.exif_transpose)
+_EXIF_TRANSPOSE = {
+    2: Image.Transpose.FLIP_LEFT_RIGHT,
+    3: Image.Transpose.ROTATE_180,
+    4: Image.Transpose.FLIP_TOP_BOTTOM,
+    5: Image.Transpose.TRANSPOSE,
+    6: Image.Transpose.ROTATE_270,
+    7: Image.Transpose.TRANSVERSE,
+    8: Image.Transpose.ROTATE_90,
+}
+
+# Esquina de origen (x al final, y al final) que la orientacion lleva a la esquina superior izquierda
+_ORIENTATION_ANCHOR = {
+    1: (False, False),
+    2: (True, False),
+    3: (True, True),
+    4: (False, True),
+    5: (False, False),
+    6: (False, True),
+    7: (True, True),
+    8: (True, False),
+}
+
+# Factores de escalado DCT que ofrece el decodificador JPEG
+_JPEG_DRAFT_SCALES = (8, 4, 2, 1)
+
+# Busqueda de calidad con max_bytes: formatos con perdida, calidad minima y codificaciones maximas
+_QUALITY_SEARCH_FORMATS = ("JPEG", "WEBP", "AVIF")
+_MIN_SEARCH_QUALITY = 5
+_MAX_QUALITY_ATTEMPTS = 8
+
+# Modos que se escriben tal cual en cada formato de salida; el resto se convierte antes
+_OUTPUT_MODES = {
+    "JPEG": ("L", "RGB", "CMYK"),
+    "PNG": ("1", "L", "LA", "P", "RGB", "RGBA", "I;16"),
+    "WEBP": ("RGB", "RGBA"),
+    "AVIF": ("RGB", "RGBA"),
+}
+_ALPHA_MODES = ("RGBA", "LA", "PA", "RGBa", "La")
+# Grises de mas de 8 bits: se escalan a la profundidad de salida en vez de recortarse
+_DEEP_GRAY_MODES = ("I", "I;16", "I;16L", "I;16B", "I;16N", "F")
+
+# Formatos en los que Pillow escribe la resolucion; en el resto la copia directa no la necesita
+_DPI_FORMATS = ("JPEG", "PNG", "TIFF", "BMP")
+
+
+def _bytes_per_pixel(mode: str) -> int:
+    """Bytes por pixel que Pillow reserva en memoria para un modo."""
+    if mode in ("1", "L", "P"):
+        return 1
+    if mode.startswith("I;16"):
+        return 2
+    # Los modos de 2 y 3 bandas (LA, RGB, YCbCr...) se almacenan en 4 bytes
+    return 4
+
+
 class ImageProcessor:
     """Procesador de imagenes."""
 
-    def __init__(self, dpi: int = DEFAULT_DPI, quality: int = 95):
+    def __init__(
+        self,
+        dpi: int = DEFAULT_DPI,
+        quality: int = 95,
+        draft_gap: Optional[float] = 2.0,
+        reducing_gap: Optional[float] = DEFAULT_REDUCING_GAP,
+        encoder_profile: str = DEFAULT_ENCODER_PROFILE,
+        encoder_options: Optional[Dict[str, Dict[str, object]]] = None,
+        max_bytes: int = 0,
+        target_ssim: Optional[float] = None,
+        passthrough: Optional[str] = None,
+        allow_upscale: bool = True,
+    ):
+        """
+        Inicializa el procesador.
+
+        draft_gap controla la decodificacion reducida de JPEG (escalado DCT 1/2, 1/4, 1/8):
+        el decodificador entrega al menos draft_gap veces el tamano a remuestrear y el filtro
+        configurado completa la reduccion. Con 2.0 la diferencia media frente a la
+        decodificacion completa queda por debajo de 1 nivel (sobre 255). None la desactiva.
+
+        reducing_gap activa la reduccion en dos etapas para todos los modos: un reduce()
+        por factor entero y el filtro final sobre al menos reducing_gap veces el tamano
+        destino. Frente a LANCZOS en una sola pasada (imagen con ruido y detalle fino,
+        reducciones de 3x a 30x) la diferencia media por canal es menor que 0.5 niveles con
+        3.0, menor que 1.0 con 2.0 y menor que 2.5 con 1.5, con picos aislados de hasta 10,
+        12 y 27 niveles respectivamente. None mantiene la pasada unica exacta.
+
+        encoder_profile elige las opciones del codificador de ENCODER_PROFILES ("fastest",
+        "balanced" o "smallest"); encoder_options las ajusta por formato, por ejemplo
+        {"PNG": {"compress_level": 3}}, con las claves de ENCODER_OPTIONS.
+
+        max_bytes limita el tamano de las salidas JPEG y WebP con perdida: si con quality el
+        archivo lo supera, se busca en memoria la calidad mas alta que cabe. 0 = sin limite.
+
+        target_ssim (entre 0 y 1, por ejemplo 0.98) elige para JPEG y WebP con perdida la
+        calidad mas baja, hasta quality, cuya salida alcanza esa SSIM frente a la imagen
+        redimensionada, medida sobre su luminancia reducida. Se combina con max_bytes, que
+        manda si ambos chocan.
+
+        passthrough ("hardlink" o "copy") evita decodificar y recodificar las entradas que ya
+        tienen el tamano final, el formato y el modo de la salida: se enlazan o se copian sin
+        pasar por memoria, parcheando solo la resolucion de JPEG y PNG si no coincide con dpi.
+        Con "hardlink" la salida comparte el archivo con la entrada. allow_upscale=False hace
+        que FIT no amplie las imagenes menores que el destino.
+        """
+        if reducing_gap is not None and reducing_gap < 1.0:
+            raise ValidationError(
+                tr.get("err.invalid_reducing_gap", value=reducing_gap),
+                code="INVALID_REDUCING_GAP"
+            )
+        if max_bytes < 0:
+            raise ValidationError(tr.get("err.invalid_max_bytes", value=max_bytes), code="INVALID_MAX_BYTES")
+        if target_ssim is not None and not 0.0 < target_ssim <= 1.0:
+            raise ValidationError(tr.get("err.invalid_target_ssim", value=target_ssim), code="INVALID_TARGET_SSIM")
+        if passthrough is not None and passthrough not in PASSTHROUGH_MODES:
+            raise ValidationError(tr.get("err.invalid_passthrough", mode=passthrough), code="INVALID_PASSTHROUGH")
+        self._check_encoder_profile(encoder_profile)
+        encoder_options = {fmt.upper(): dict(options) for fmt, options in (encoder_options or {}).items()}
+        for fmt, options in encoder_options.items():
+            for option in options:
+                if option not in ENCODER_OPTIONS.get(fmt, ()):
+                    raise ValidationError(
+                        tr.get("err.invalid_encoder_option", option=f"{fmt}.{option}"),
+                        code="INVALID_ENCODER_OPTION"
+                    )
+
         self.dpi = dpi
         self.quality = quality
+        self.draft_gap = draft_gap
+        self.reducing_gap = reducing_gap
+        self.encoder_profile = encoder_profile
+        self.encoder_options = encoder_options
+        self.max_bytes = max_bytes
+        self.target_ssim = target_ssim
+        self.passthrough = passthrough
+        self.allow_upscale = allow_upscale
         self._converter = UnitConverter()
 
+    def settings(self) -> Dict[str, object]:
+        """Configuracion del procesador que influye en el archivo de salida."""
+        return {
+            "dpi": self.dpi,
+            "quality": self.quality,
+            "draft_gap": self.draft_gap,
+            "reducing_gap": self.reducing_gap,
+            "encoder_profile": self.encoder_profile,
+            "encoder_options": self.encoder_options,
+            "max_bytes": self.max_bytes,
+            "target_ssim": self.target_ssim,
+            "passthrough": self.passthrough,
+            "allow_upscale": self.allow_upscale,
+        }
+
+    @staticmethod
+    def _check_encoder_profile(profile: str) -> None:
+        if profile not in ENCODER_PROFILES:
+            raise ValidationError(
+                tr.get("err.invalid_encoder_profile", profile=profile),
+                code="INVALID_ENCODER_PROFILE"
+            )
+
+    def encoder_settings(self, output_format: str, profile: Optional[str] = None) -> Dict[str, object]:
+        """Opciones del codificador para un formato de Pillow: perfil (o el del procesador) y ajustes."""
+        settings = dict(ENCODER_PROFILES[profile or self.encoder_profile].get(output_format, {}))
+        settings.update(self.encoder_options.get(output_format, {}))
+        return settings
+
     def resize(
         self,
         input_path: Path,
@@ -49,31 +280,81 @@ class ImageProcessor:
         resample: int = Image.Resampling.LANCZOS,
         background: Tuple[int, int, int, int] = (255, 255, 255, 255),
         cancel_check: Optional[Callable[[], bool]] = None,
-    ) -> Tuple[int, int]:
-        """Redimensiona una imagen."""
+        encoder_profile: Optional[str] = None,
+    ) -> ResizeResult:
+        """Redimensiona una imagen decodificandola una sola vez; encoder_profile sustituye al del procesador."""
+        if self.passthrough is not None:
+            plan = self.plan_passthrough(input_path, output_path, width, height, width_unit, height_unit, mode)
+            if plan is not None:
+                if cancel_check and cancel_check():
+                    raise ProcessingError(tr.get("err.process_cancelled"), code="CANCELLED")
+                return self.apply_passthrough(plan, input_path, output_path)
+
+        rendered = self.render(
+            input_path, width, height, width_unit, height_unit, mode, resample, background, cancel_check
+        )
+
+        if cancel_check and cancel_check():
+            raise ProcessingError(tr.get("err.process_cancelled"), code="CANCELLED")
+
+        data = self.encode(rendered, output_path, encoder_profile)
+        self.write(data, output_path, rendered.result, cancel_check)
+        return rendered.result
+
+    def render(
+        self,
+        input_path: Path,
+        width: Numeric,
+        height: Numeric,
+        width_unit: str = "px",
+        height_unit: str = "px",
+        mode: ResizeMode = ResizeMode.FIT,
+        resample: int = Image.Resampling.LANCZOS,
+        background: Tuple[int, int, int, int] = (255, 255, 255, 255),
+        cancel_check: Optional[Callable[[], bool]] = None,
+        data: Optional[bytes] = None,
+    ) -> RenderedImage:
+        """
+        Decodifica y redimensiona una imagen sin escribirla.
+
+        El formato se reconoce por la firma de la cabecera, no por la extension: un archivo que
+        no es imagen se rechaza sin llamar a Image.open. Con data la imagen se decodifica desde
+        esos bytes ya leidos; input_path solo se usa en los mensajes de error.
+        """
+        start = time.perf_counter()
+
         if cancel_check and cancel_check():
             raise ProcessingError(tr.get("err.process_cancelled"), code="CANCELLED")
 
-        if not input_path.exists():
+        if data is None and not input_path.exists():
             raise ValidationError(tr.get("err.file_not_found", path=str(input_path)), code="FILE_NOT_FOUND")
 
-        if input_path.suffix.lower() not in SUPPORTED_EXTENSIONS:
-            raise ValidationError(
-                tr.get("err.unsupported_format", ext=input_path.suffix),
-                code="UNSUPPORTED_FORMAT"
-            )
+        with _processing_errors():
+            image_format = sniff_header(data[:SNIFF_BYTES]) if data is not None else sniff_format(input_path)
+            if image_format is None:
+                raise ValidationError(
+                    tr.get("err.not_an_image", path=str(input_path)),
+                    code="UNSUPPORTED_FORMAT"
+                )
+            # Solo se prueba el decodificador del formato detectado
+            source = io.BytesIO(data) if data is not None else input_path
+            with Image.open(source, formats=(image_format,)) as img:
+                source_format = img.format or ""
+                source_mode = img.mode
 
-        try:
-            with Image.open(input_path) as img:
                 # Extraer metadatos antes de manipulaciones destructivas
                 icc_profile = img.info.get('icc_profile')
                 exif_data = img.info.get('exif')
 
-                img = ImageOps.exif_transpose(img)
+                # Geometria tomada de la cabecera, sin decodificar pixeles
+                # PNG no admite draft: si el EXIF va tras los datos, decodificar aqui no cuesta mas
+                orientation = read_orientation(img, allow_load=True)
                 original_size = img.size
-                
+                if orientation in _SWAPPED_ORIENTATIONS:
+                    original_size = (img.size[1], img.size[0])
+
                 target_width_px, target_height_px = self._resolve_dimensions(
-                    img, width, height, width_unit, height_unit, self.dpi
+                    original_size, width, height, width_unit, height_unit, self.dpi
                 )
 
                 if target_width_px <= 0 or target_height_px <= 0:
@@ -89,27 +370,189 @@ class ImageProcessor:
                 if cancel_check and cancel_check():
                     raise ProcessingError(tr.get("err.process_cancelled"), code="CANCELLED")
 
-                processed = self._apply_resize(img, final_size, mode, resample, background)
+                box = self._apply_draft(img, original_size, final_size, mode, orientation)
 
-                if cancel_check and cancel_check():
-                    raise ProcessingError(tr.get("err.process_cancelled"), code="CANCELLED")
+                decode_start = time.perf_counter()
+                img.load()
 
-                self._save_image(processed, output_path, self.dpi, icc_profile, exif_data)
+                # La orientacion EXIF se aplica despues, sobre la imagen ya reducida
+                resize_start = time.perf_counter()
+                processed = self._apply_resize(
+                    img, final_size, mode, resample, background, box, orientation
+                )
+                end = time.perf_counter()
 
-                return final_size
+                result = ResizeResult(
+                    original_size=original_size,
+                    final_size=processed.size,
+                    format=source_format,
+                    mode=source_mode,
+                    timings={
+                        "decode": resize_start - decode_start,
+                        "resize": end - resize_start,
+                        "total": end - start,
+                    },
+                )
+                return RenderedImage(processed, result, icc_profile, exif_data, background)
 
-        except ProcessingError:
-            raise
-        except (OSError, IOError) as e:
-            raise ProcessingError(tr.get("err.io_error", error=str(e)), code="IO_ERROR")
-        except ValidationError:
-            raise
-        except Exception as e:
-            raise ProcessingError(tr.get("err.unexpected", error=str(e)), code="UNEXPECTED_ERROR")
+    def plan_passthrough(
+        self,
+        input_path: Path,
+        output_path: Path,
+        width: Numeric,
+        height: Numeric,
+        width_unit: str = "px",
+        height_unit: str = "px",
+        mode: ResizeMode = ResizeMode.FIT,
+        data: Optional[bytes] = None,
+    ) -> Optional[PassthroughPlan]:
+        """
+        Comprueba, leyendo solo la cabecera, si la entrada puede copiarse tal cual.
 
-    def _resolve_dimensions(
+        Hace falta el mismo formato que la salida, un solo fotograma, orientacion normal, el
+        tamano final igual al original, un modo que el formato escribe sin convertir, caber en
+        max_bytes y una resolucion igual a dpi o que se pueda parchear. Si no, devuelve None y
+        la imagen sigue el camino normal, que es tambien el que informa los errores.
+        """
+        if self.passthrough is None:
+            return None
+        start = time.perf_counter()
+        output_format = Image.registered_extensions().get(output_path.suffix.lower())
+
+        try:
+            source = io.BytesIO(data) if data is not None else open(input_path, "rb")
+        except OSError:
+            return None
+        with _processing_errors(), source:
+            image_format = sniff_header(source.read(SNIFF_BYTES))
+            if image_format is None or image_format != output_format:
+                return None
+            source.seek(0)
+            with Image.open(source, formats=(image_format,)) as img:
+                # Sin decodificar: un eXIf de PNG tras los datos se copia intacto, con su orientacion
+                if getattr(img, "n_frames", 1) > 1 or read_orientation(img) != 1:
+                    return None
+
+                target_size = self._resolve_dimensions(img.size, width, height, width_unit, height_unit, self.dpi)
+                if min(target_size) <= 0:
+                    return None
+                if mode == ResizeMode.FIT:
+                    target_size = self._calculate_dimensions(img.size, *target_size, mode)
+                if target_size != img.size or self._needs_conversion(img, output_format):
+                    return None
+
+                file_size = len(data) if data is not None else os.fstat(source.fileno()).st_size
+                if self.max_bytes and file_size > self.max_bytes:
+                    return None
+
+                patch = None
+                dpi = img.info.get("dpi")
+                if image_format in _DPI_FORMATS and not (dpi and all(round(v) == self.dpi for v in dpi)):
+                    patch = dpi_patch(source, image_format, self.dpi)
+                    if patch is None:
+                        return None
+
+                result = ResizeResult(
+                    original_size=img.size,
+                    final_size=img.size,
+                    format=image_format,
+                    mode=img.mode,
+                    timings={"total": time.perf_counter() - start},
+                    passthrough=True,
+                )
+                return PassthroughPlan(result, patch)
+
+    def apply_passthrough(self, plan: PassthroughPlan, input_path: Path, output_path: Path) -> ResizeResult:
+        """Crea la salida de un plan de plan_passthrough() enlazando o copiando la entrada de forma atomica."""
+        start = time.perf_counter()
+        with _processing_errors():
+            output_path.parent.mkdir(parents=True, exist_ok=True)
+            copy_file(input_path, output_path, plan.patch, link=self.passthrough == "hardlink")
+        plan.result.add_timing("copy", time.perf_counter() - start)
+        return plan.result
+
+    def encode(self, rendered: RenderedImage, output_path: Path, encoder_profile: Optional[str] = None) -> bytes:
+        """Codifica en memoria una imagen renderizada segun la extension de salida."""
+        start = time.perf_counter()
+        if encoder_profile is not None:
+            self._check_encoder_profile(encoder_profile)
+        with _processing_errors():
+            data = self._encode_image(
+                rendered.image, output_path, self.dpi, rendered.icc_profile, rendered.exif, encoder_profile,
+                rendered.result, rendered.background,
+            )
+        rendered.result.add_timing("encode", time.perf_counter() - start)
+        return data
+
+    def write(
+        self,
+        data: bytes,
+        output_path: Path,
+        result: Optional[ResizeResult] = None,
+        cancel_check: Optional[Callable[[], bool]] = None,
+    ) -> None:
+        """Escribe bytes ya codificados de forma atomica; si cancel_check se cumple antes de renombrar, descarta el temporal."""
+        start = time.perf_counter()
+        with _processing_errors():
+            self._write_atomic(data, output_path, cancel_check)
+        if result is not None:
+            result.add_timing("write", time.perf_counter() - start)
+
+    def estimate_memory(
+        self,
+        info: ImageInfo,
+        width: Numeric,
+        height: Numeric,
+        width_unit: str = "px",
+        height_unit: str = "px",
+        mode: ResizeMode = ResizeMode.FIT,
+    ) -> int:
+        """
+        Estima en bytes la memoria maxima de resize() a partir de la cabecera.
+
+        Suma la imagen decodificada (reducida si aplica draft JPEG), el remuestreo
+        intermedio y el buffer de salida.
+        """
+        final_size = self._calculate_dimensions(
+            info.size, *self._resolve_dimensions(info.size, width, height, width_unit, height_unit, self.dpi), mode
+        )
+        scaled_w, scaled_h = self._resample_size(info.size, final_size, mode)
+
+        decoded_w, decoded_h = info.size
+        if self.draft_gap and info.format == "JPEG":
+            requested = (max(int(scaled_w * self.draft_gap), 1), max(int(scaled_h * self.draft_gap), 1))
+            ratio = min(decoded_w // requested[0], decoded_h // requested[1])
+            scale = next((s for s in _JPEG_DRAFT_SCALES if s <= ratio), 1)
+            decoded_w, decoded_h = -(-decoded_w // scale), -(-decoded_h // scale)
+
+        decoded = decoded_w * decoded_h * _bytes_per_pixel(info.mode)
+        return decoded + (scaled_w * scaled_h + final_size[0] * final_size[1]) * 4
+
+    def _apply_draft(
         self,
         img: Image.Image,
+        original_size: Tuple[int, int],
+        final_size: Tuple[int, int],
+        mode: ResizeMode,
+        orientation: int,
+    ) -> Optional[Tuple[float, float, float, float]]:
+        """Configura la decodificacion JPEG reducida y devuelve la caja de origen."""
+        if not self.draft_gap or img.format != "JPEG":
+            return None
+
+        scaled_w, scaled_h = self._resample_size(original_size, final_size, mode)
+        if orientation in _SWAPPED_ORIENTATIONS:
+            scaled_w, scaled_h = scaled_h, scaled_w
+
+        requested = (int(scaled_w * self.draft_gap), int(scaled_h * self.draft_gap))
+        result = img.draft(None, requested)
+        if result is None or img.size == original_size or img.size == original_size[::-1]:
+            return None
+        return result[1]
+
+    def _resolve_dimensions(
+        self,
+        original_size: Tuple[int, int],
         width: Numeric,
         height: Numeric,
         width_unit: str,
@@ -125,7 +568,7 @@ class ImageProcessor:
             h_px = self._converter.to_pixels(height, height_unit, dpi)
             return (w_px, h_px)
 
-        orig_w, orig_h = img.size
+        orig_w, orig_h = original_size
         orig_ratio = orig_w / orig_h
 
         if width_provided and not height_provided:
@@ -165,6 +608,8 @@ class ImageProcessor:
             else:
                 new_w = min(target_width, int(target_height * orig_ratio))
                 new_h = int(new_w / orig_ratio)
+            if not self.allow_upscale and new_w > orig_w:
+                return original_size
             return (new_w, new_h)
 
         elif mode == ResizeMode.FILL:
@@ -185,6 +630,41 @@ class ImageProcessor:
 
         return (target_width, target_height)
 
+    @staticmethod
+    def _resample_size(
+        source_size: Tuple[float, float],
+        size: Tuple[int, int],
+        mode: ResizeMode,
+    ) -> Tuple[int, int]:
+        """Calcula el tamano al que se remuestrea la imagen antes de componer o recortar."""
+        src_w, src_h = source_size
+        target_w, target_h = size
+        orig_ratio = src_w / src_h
+
+        if mode == ResizeMode.FILL:
+            # Mismo calculo que Image.thumbnail: nunca amplia
+            if target_w >= src_w and target_h >= src_h:
+                return (round(src_w), round(src_h))
+
+            def round_aspect(number, key):
+                return max(min(math.floor(number), math.ceil(number), key=key), 1)
+
+            if target_w / target_h >= orig_ratio:
+                target_w = round_aspect(target_h * orig_ratio, key=lambda n: abs(orig_ratio - n / target_h))
+            else:
+                target_h = round_aspect(
+                    target_w / orig_ratio,
+                    key=lambda n: 0 if n == 0 else abs(orig_ratio - target_w / n),
+                )
+            return (target_w, target_h)
+
+        if mode == ResizeMode.CROP:
+            if orig_ratio > target_w / target_h:
+                return (int(target_h * orig_ratio), target_h)
+            return (target_w, int(target_w / orig_ratio))
+
+        return (target_w, target_h)
+
     def _apply_resize(
         self,
         img: Image.Image,
@@ -192,41 +672,171 @@ class ImageProcessor:
         mode: ResizeMode,
         resample: int,
         background: Tuple[int, int, int, int],
+        box: Optional[Tuple[float, float, float, float]] = None,
+        orientation: int = 1,
+    ) -> Image.Image:
+        """Remuestrea en la orientacion de origen, transpone el resultado y lo compone."""
+        region = self._orient_box(box or (0, 0) + img.size, img.size, orientation)
+        source_size = (region[2] - region[0], region[3] - region[1])
+        scaled_size = self._resample_size(source_size, size, mode)
+
+        factor = self._reduce_factor(img, source_size, scaled_size, resample, self.reducing_gap)
+        if factor != (1, 1):
+            # La imagen reducida ya sale orientada; el remuestreo final no necesita transponer
+            img = self._reduce(img, factor, orientation)
+            box = (region[0] / factor[0], region[1] / factor[1], region[2] / factor[0], region[3] / factor[1])
+            orientation = 1
+
+        swapped = orientation in _SWAPPED_ORIENTATIONS
+        if swapped:
+            img = self._resample(img, (scaled_size[1], scaled_size[0]), resample, box, vertical_first=True)
+        else:
+            img = self._resample(img, scaled_size, resample, box)
+
+        transpose = _EXIF_TRANSPOSE.get(orientation)
+        if transpose is not None:
+            img = img.transpose(transpose)
+
+        return self._compose(img, size, mode, background)
+
+    @staticmethod
+    def _orient_box(
+        box: Tuple[float, float, float, float],
+        size: Tuple[int, int],
+        orientation: int,
+    ) -> Tuple[float, float, float, float]:
+        """Traslada una caja de la orientacion de origen a la orientacion EXIF corregida."""
+        x0, y0, x1, y1 = box
+        end_x, end_y = _ORIENTATION_ANCHOR.get(orientation, (False, False))
+        if end_x:
+            x0, x1 = size[0] - x1, size[0] - x0
+        if end_y:
+            y0, y1 = size[1] - y1, size[1] - y0
+        if orientation in _SWAPPED_ORIENTATIONS:
+            return (y0, x0, y1, x1)
+        return (x0, y0, x1, y1)
+
+    @staticmethod
+    def _reduce_factor(
+        img: Image.Image,
+        source_size: Tuple[float, float],
+        scaled_size: Tuple[int, int],
+        resample: int,
+        reducing_gap: Optional[float],
+    ) -> Tuple[int, int]:
+        """Calcula el factor entero de la reduccion previa (1, 1 si no corresponde)."""
+        if (
+            reducing_gap is None
+            or resample == Image.Resampling.NEAREST
+            or img.mode in ("1", "P")
+            or img.mode.startswith("I;16")
+        ):
+            return (1, 1)
+
+        factor_x = int(source_size[0] / scaled_size[0] / reducing_gap) or 1
+        factor_y = int(source_size[1] / scaled_size[1] / reducing_gap) or 1
+        return (factor_x, factor_y)
+
+    @staticmethod
+    def _reduce(img: Image.Image, factor: Tuple[int, int], orientation: int = 1) -> Image.Image:
+        """
+        Reduce por factores enteros (en ejes orientados) y devuelve el resultado orientado.
+
+        La reticula de bloques se ancla en la esquina que la orientacion EXIF lleva arriba a la
+        izquierda, de modo que el resultado coincide con reducir la imagen ya transpuesta
+        mientras la transposicion se aplica sobre una imagen varias veces menor.
+        """
+        factor_x, factor_y = factor
+        if orientation in _SWAPPED_ORIENTATIONS:
+            factor_x, factor_y = factor_y, factor_x
+
+        width, height = img.size
+        end_x, end_y = _ORIENTATION_ANCHOR.get(orientation, (False, False))
+        rest_x = width % factor_x if end_x else 0
+        rest_y = height % factor_y if end_y else 0
+
+        if not rest_x and not rest_y:
+            reduced = img.reduce((factor_x, factor_y))
+        else:
+            # El bloque incompleto queda al principio del eje y se reduce por separado
+            reduced = Image.new(img.mode, (-(-width // factor_x), -(-height // factor_y)))
+            spans_x = ([(0, rest_x, rest_x, 0)] if rest_x else []) + [(rest_x, width, factor_x, 1 if rest_x else 0)]
+            spans_y = ([(0, rest_y, rest_y, 0)] if rest_y else []) + [(rest_y, height, factor_y, 1 if rest_y else 0)]
+            for x0, x1, fx, out_x in spans_x:
+                for y0, y1, fy, out_y in spans_y:
+                    reduced.paste(img.reduce((fx, fy), box=(x0, y0, x1, y1)), (out_x, out_y))
+
+        transpose = _EXIF_TRANSPOSE.get(orientation)
+        if transpose is not None:
+            reduced = reduced.transpose(transpose)
+        return reduced
+
+    def _resample(
+        self,
+        img: Image.Image,
+        size: Tuple[int, int],
+        resample: int,
+        box: Optional[Tuple[float, float, float, float]] = None,
+        vertical_first: bool = False,
+    ) -> Image.Image:
+        """
+        Remuestrea la imagen.
+
+        Con vertical_first las pasadas se ejecutan en orden inverso al de Pillow, de modo que
+        el resultado transpuesto coincide con remuestrear la imagen ya transpuesta.
+        """
+        if box is None:
+            if size == img.size:
+                return img
+            box = (0, 0) + img.size
+
+        if not vertical_first:
+            return img.resize(size, resample, box=box)
+
+        if img.mode in ("1", "P"):
+            resample = Image.Resampling.NEAREST
+
+        if img.mode in ("LA", "RGBA") and resample != Image.Resampling.NEAREST:
+            premultiplied = img.convert({"LA": "La", "RGBA": "RGBa"}[img.mode])
+            return self._resample(premultiplied, size, resample, box, vertical_first).convert(img.mode)
+
+        img = img.resize((img.size[0], size[1]), resample, box=(0, box[1], img.size[0], box[3]))
+        return img.resize(size, resample, box=(box[0], 0, box[2], size[1]))
+
+    @staticmethod
+    def _compose(
+        img: Image.Image,
+        size: Tuple[int, int],
+        mode: ResizeMode,
+        background: Tuple[int, int, int, int],
     ) -> Image.Image:
-        """Aplica el redimensionamiento."""
+        """Centra en el lienzo (FILL) o recorta al tamano final (CROP)."""
         if mode == ResizeMode.FILL:
-            img.thumbnail(size, resample)
-            canvas = Image.new(img.mode, size, background[:3] if img.mode == "RGB" else background)
+            if img.mode in ("1", "P"):
+                # Una paleta o un lienzo de 1 bit no pueden representar el fondo
+                img = img.convert("RGBA" if "transparency" in img.info else ("L" if img.mode == "1" else "RGB"))
+            # El fondo RGBA se lleva al modo de la imagen (L, LA, CMYK, I;16...)
+            fill = Image.new("RGBA", (1, 1), background).convert(img.mode).getpixel((0, 0))
+            if img.mode in ("I", "I;16"):
+                # Escala de 8 a 16 bits
+                fill *= 257
+            canvas = Image.new(img.mode, size, fill)
             offset = ((size[0] - img.size[0]) // 2, (size[1] - img.size[1]) // 2)
             canvas.paste(img, offset)
             return canvas
 
         if mode == ResizeMode.CROP:
             target_w, target_h = size
-            
-            orig_ratio = img.size[0] / img.size[1]
-            target_ratio = target_w / target_h
-            
-            if orig_ratio > target_ratio:
-                new_h = target_h
-                new_w = int(new_h * orig_ratio)
-            else:
-                new_w = target_w
-                new_h = int(new_w / orig_ratio)
-            
-            img = img.resize((new_w, new_h), resample)
-            
+
             if img.size[0] > target_w:
                 left = (img.size[0] - target_w) // 2
                 img = img.crop((left, 0, left + target_w, target_h))
-            
+
             if img.size[1] > target_h:
                 top = (img.size[1] - target_h) // 2
                 img = img.crop((0, top, target_w, top + target_h))
-            
-            return img
 
-        return img.resize(size, resample)
+        return img
 
     @staticmethod
     def _reset_exif_orientation(exif_bytes: Optional[bytes]) -> Optional[bytes]:
@@ -250,18 +860,32 @@ class ImageProcessor:
             # lo retornamos intacto para no perder la data y no quebrar el pipeline.
             return exif_bytes
 
-    def _save_image(
+    def _encode_image(
         self,
         img: Image.Image,
         output_path: Path,
         dpi: int,
         icc_profile: Optional[bytes] = None,
         exif_data: Optional[bytes] = None,
-    ) -> None:
-        """Guarda la imagen procesada de forma atómica y segura."""
-        output_path.parent.mkdir(parents=True, exist_ok=True)
+        encoder_profile: Optional[str] = None,
+        result: Optional[ResizeResult] = None,
+        background: Tuple[int, int, int, int] = (255, 255, 255, 255),
+    ) -> bytes:
+        """
+        Serializa la imagen en memoria con el formato que corresponde a output_path.
 
-        save_kwargs = {}
+        El modo se adapta una sola vez, sobre la imagen ya reducida, a lo que admite el formato.
+        En los formatos con perdida anota en result la calidad usada y, con target_ssim, su SSIM.
+        """
+        output_format = Image.registered_extensions().get(output_path.suffix.lower())
+        if output_format is None:
+            raise ValidationError(
+                tr.get("err.unsupported_format", ext=output_path.suffix),
+                code="UNSUPPORTED_FORMAT"
+            )
+
+        save_kwargs = self.encoder_settings(output_format, encoder_profile)
+        img, icc_profile = self._convert_for_format(img, output_format, background, icc_profile)
 
         # Retener perfiles de color y metadatos EXIF
         if icc_profile:
@@ -269,22 +893,188 @@ class ImageProcessor:
         if exif_data:
             save_kwargs["exif"] = self._reset_exif_orientation(exif_data)
 
-        if output_path.suffix.lower() in (".jpg", ".jpeg"):
-            if img.mode in ("RGBA", "P"):
-                img = img.convert("RGB")
+        # En WebP sin perdida quality es el esfuerzo de compresion, no la calidad
+        if output_format in _QUALITY_SEARCH_FORMATS and not save_kwargs.get("lossless"):
             save_kwargs["quality"] = self.quality
-            save_kwargs["optimize"] = True
-        elif output_path.suffix.lower() == ".png":
-            save_kwargs["optimize"] = True
 
-        dpi_to_save = (dpi, dpi)
-        
+        save_kwargs["dpi"] = (dpi, dpi)
+
+        def encode_with(**overrides) -> bytes:
+            buffer = io.BytesIO()
+            img.save(buffer, format=output_format, **{**save_kwargs, **overrides})
+            return buffer.getvalue()
+
+        if output_format not in _QUALITY_SEARCH_FORMATS or save_kwargs.get("lossless"):
+            return encode_with()
+
+        quality = save_kwargs["quality"]
+        score: Optional[float] = None
+        if self.target_ssim is not None:
+            reference = luma_plane(img)
+            data, quality, score = self._search_ssim(encode_with, reference, quality)
+        else:
+            data = encode_with()
+        if self.max_bytes and len(data) > self.max_bytes:
+            data, quality = self._search_quality(encode_with, quality, len(data))
+            if score is not None:
+                score = self._score(reference, data)
+
+        if result is not None:
+            result.quality = quality
+            result.ssim = score
+        return data
+
+    @staticmethod
+    def _convert_for_format(
+        img: Image.Image,
+        output_format: str,
+        background: Tuple[int, int, int, int],
+        icc_profile: Optional[bytes],
+    ) -> Tuple[Image.Image, Optional[bytes]]:
+        """
+        Convierte la imagen a un modo que admite el formato de salida.
+
+        La transparencia se conserva si el formato la admite y si no se aplana sobre
+        background; las paletas se expanden y CMYK pasa a RGB a traves de su perfil ICC en los
+        formatos que no lo escriben. Los grises de 16 o 32 bits pasan a I;16 en PNG y a 8 bits
+        en el resto, escalados. Devuelve la imagen y el perfil ICC que le corresponde.
+        """
+        if not ImageProcessor._needs_conversion(img, output_format):
+            return img, icc_profile
+
+        modes = _OUTPUT_MODES[output_format]
+        grayscale = img.mode in ("1", "L", "LA", "La") + _DEEP_GRAY_MODES
+        if img.mode in _ALPHA_MODES or "transparency" in img.info:
+            if "RGBA" in modes:
+                return img.convert("LA" if grayscale and "LA" in modes else "RGBA"), icc_profile
+            rgba = img.convert("RGBA")
+            flat = Image.new("RGB", img.size, background[:3])
+            flat.paste(rgba, mask=rgba.getchannel("A"))
+            return (flat.convert("L") if grayscale else flat), icc_profile
+
+        if img.mode == "CMYK":
+            return ImageProcessor._cmyk_to_rgb(img, icc_profile)
+        if img.mode == "P":
+            return img.convert("RGB"), icc_profile
+        if img.mode in _DEEP_GRAY_MODES:
+            img = ImageProcessor._scale_depth(img, "I;16" if "I;16" in modes else "L")
+            if img.mode in modes:
+                return img, icc_profile
+        return img.convert("L" if grayscale else "RGB"), icc_profile
+
+    @staticmethod
+    def _scale_depth(img: Image.Image, target_mode: str) -> Image.Image:
+        """
+        Lleva un gris de 16 o 32 bits (I, I;16, F) a I;16 o L escalando sus valores.
+
+        El rango de origen es el de 16 bits o, si la imagen lo supera, su valor maximo; convert()
+        solo recortaria y una imagen con valores de 16 bits quedaria blanca en 8 bits.
+        """
+        img = img.convert("F")
+        top = max(img.getextrema()[1], 65535)
+        scale = (65535 if target_mode == "I;16" else 255) / top
+        # Los valores negativos quedan en 0 al convertir
+        return img.point(lambda value: value * scale).convert("I").convert(target_mode)
+
+    @staticmethod
+    def _needs_conversion(img: Image.Image, output_format: str) -> bool:
+        """Indica si el formato de salida no puede escribir la imagen en su modo actual."""
+        modes = _OUTPUT_MODES.get(output_format)
+        # Solo PNG guarda la transparencia por color (tRNS) de los modos sin alfa
+        keeps_transparency = "transparency" not in img.info or output_format == "PNG"
+        return modes is not None and not (img.mode in modes and keeps_transparency)
+
+    @staticmethod
+    def _cmyk_to_rgb(img: Image.Image, icc_profile: Optional[bytes]) -> Tuple[Image.Image, Optional[bytes]]:
+        """Convierte CMYK a sRGB con su perfil ICC si lo tiene; si no, con la conversion simple."""
+        if icc_profile and CMS_AVAILABLE:
+            try:
+                srgb = ImageCms.createProfile("sRGB")
+                source = ImageCms.ImageCmsProfile(io.BytesIO(icc_profile))
+                converted = ImageCms.profileToProfile(img, source, srgb, outputMode="RGB")
+                return converted, ImageCms.ImageCmsProfile(srgb).tobytes()
+            except (ImageCms.PyCMSError, OSError, ValueError):
+                pass
+        # El perfil CMYK no describe la imagen RGB resultante
+        return img.convert("RGB"), None
+
+    @staticmethod
+    def _score(reference: Image.Image, data: bytes) -> float:
+        """SSIM de una codificacion frente al plano de luminancia de la imagen redimensionada."""
+        with Image.open(io.BytesIO(data)) as candidate:
+            return ssim(reference, luma_plane(candidate))
+
+    def _search_ssim(
+        self, encode_with: Callable[..., bytes], reference: Image.Image, start_quality: int
+    ) -> Tuple[bytes, int, float]:
+        """
+        Busqueda binaria de la calidad mas baja, hasta start_quality, que alcanza target_ssim.
+
+        Si ninguna la alcanza se usa start_quality.
+        """
+        low, high = _MIN_SEARCH_QUALITY, start_quality
+        best: Optional[Tuple[bytes, int, float]] = None
+        attempts = 0
+        while low <= high and attempts < _MAX_QUALITY_ATTEMPTS:
+            quality = (low + high) // 2
+            data = encode_with(quality=quality)
+            score = self._score(reference, data)
+            attempts += 1
+            if score >= self.target_ssim:
+                best = (data, quality, score)
+                high = quality - 1
+            else:
+                low = quality + 1
+        if best is None:
+            data = encode_with(quality=start_quality)
+            best = (data, start_quality, self._score(reference, data))
+        return best
+
+    def _search_quality(
+        self, encode_with: Callable[..., bytes], start_quality: int, size: int
+    ) -> Tuple[bytes, int]:
+        """
+        Busqueda binaria de la calidad mas alta cuya salida cabe en max_bytes.
+
+        Cada intento codifica la misma imagen ya redimensionada en memoria; nada se escribe
+        hasta elegir el resultado. La primera codificacion, con start_quality, ya se hizo.
+        """
+        low, high = _MIN_SEARCH_QUALITY, start_quality - 1
+        best: Optional[Tuple[bytes, int]] = None
+        smallest = size
+        attempts = 1
+        while low <= high and attempts < _MAX_QUALITY_ATTEMPTS:
+            quality = (low + high) // 2
+            data = encode_with(quality=quality)
+            attempts += 1
+            smallest = min(smallest, len(data))
+            if len(data) <= self.max_bytes:
+                best = (data, quality)
+                low = quality + 1
+            else:
+                high = quality - 1
+        if best is None:
+            raise ProcessingError(
+                tr.get("err.max_bytes_unreachable", max_bytes=self.max_bytes, size=smallest),
+                code="MAX_BYTES_EXCEEDED"
+            )
+        return best
+
+    @staticmethod
+    def _write_atomic(data: bytes, output_path: Path, cancel_check: Optional[Callable[[], bool]] = None) -> None:
+        """Escribe en un temporal del mismo directorio y lo renombra sobre el destino."""
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+
         # Escritura atómica
         temp_filename = f".tmp_{uuid.uuid4().hex}_{output_path.name}"
         temp_path = output_path.parent / temp_filename
-        
+
         try:
-            img.save(temp_path, dpi=dpi_to_save, **save_kwargs)
+            with open(temp_path, "wb") as f:
+                f.write(data)
+            # Un archivo cancelado o expirado mientras se codificaba no llega a la salida
+            if cancel_check and cancel_check():
+                raise ProcessingError(tr.get("err.process_cancelled"), code="CANCELLED")
             os.replace(temp_path, output_path)
         except Exception:
             if temp_path.exists():
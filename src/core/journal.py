@@ -0,0 +1,127 @@
+"""Diario de lotes para reanudar trabajos interrumpidos."""
+
+import json
+import os
+import time
+import uuid
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional
+
+# Registros que se acumulan antes de escribirlos y sincronizarlos con el disco
+_FLUSH_EVERY = 256
+_FLUSH_INTERVAL = 2.0
+
+
+def new_job_id() -> str:
+    """Identificador unico y ordenable por fecha para un lote."""
+    return f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}"
+
+
+@dataclass
+class JobState:
+    """Estado de un lote reconstruido desde su diario."""
+    params: Dict[str, object]
+    inputs: List[Path] = field(default_factory=list)
+    # Ultimo resultado de cada entrada terminada: True si tuvo exito
+    done: Dict[Path, bool] = field(default_factory=dict)
+
+    @property
+    def remaining(self) -> List[Path]:
+        """Entradas que no llegaron a terminar."""
+        return [path for path in self.inputs if path not in self.done]
+
+    @property
+    def failed(self) -> List[Path]:
+        """Entradas cuyo ultimo intento fallo."""
+        return [path for path in self.inputs if self.done.get(path) is False]
+
+
+class BatchJournal:
+    """
+    Diario de solo anexado (JSON por linea) con los parametros, entradas y resultados de un lote.
+
+    Los registros se escriben por tandas y se sincronizan con el disco, de modo que una
+    caida pierde como mucho la ultima tanda. Una linea incompleta al final se ignora al leer.
+    """
+
+    def __init__(self, path: Path, params: Dict[str, object]):
+        self._path = path
+        self._lines: List[str] = []
+        self._last_flush = time.monotonic()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(path, "a", encoding="utf-8")
+        # Cada sesion (lote o reanudacion) deja sus parametros
+        self._append({"type": "job", "params": params, "started": int(time.time())})
+
+    def add_inputs(self, paths: List[Path]):
+        """Registra entradas del lote, para reconstruir el trabajo pendiente."""
+        if paths:
+            self._append({"type": "inputs", "paths": [str(path) for path in paths]})
+
+    def record(self, input_path: Path, success: bool, error: str = ""):
+        """Registra una entrada terminada."""
+        entry = {"type": "done", "path": str(input_path), "ok": success}
+        if error:
+            entry["error"] = error
+        self._append(entry)
+
+    def flush(self):
+        """Escribe los registros pendientes y los sincroniza con el disco."""
+        self._last_flush = time.monotonic()
+        if not self._lines:
+            return
+        lines, self._lines = self._lines, []
+        self._file.write("".join(lines))
+        self._file.flush()
+        try:
+            os.fsync(self._file.fileno())
+        except OSError:
+            pass
+
+    def close(self):
+        """Guarda lo pendiente y cierra el diario."""
+        if not self._file.closed:
+            self.flush()
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def _append(self, entry: dict):
+        self._lines.append(json.dumps(entry, separators=(",", ":")) + "\n")
+        if len(self._lines) >= _FLUSH_EVERY or time.monotonic() - self._last_flush >= _FLUSH_INTERVAL:
+            self.flush()
+
+    @staticmethod
+    def load(path: Path) -> Optional[JobState]:
+        """Reconstruye el estado de un lote desde su diario (None si no existe)."""
+        try:
+            with open(path, encoding="utf-8") as f:
+                lines = f.readlines()
+        except OSError:
+            return None
+
+        state: Optional[JobState] = None
+        inputs: Dict[Path, None] = {}
+        for line in lines:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                # Linea cortada por una caida durante la escritura
+                continue
+            kind = entry.get("type") if isinstance(entry, dict) else None
+            if kind == "job":
+                if state is None:
+                    state = JobState(params=entry.get("params", {}))
+            elif kind == "inputs":
+                inputs.update((Path(p), None) for p in entry.get("paths", []))
+            elif kind == "done" and state is not None:
+                state.done[Path(entry["path"])] = bool(entry.get("ok"))
+
+        if state is not None:
+            state.inputs = list(inputs)
+        return state
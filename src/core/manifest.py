@@ -0,0 +1,194 @@
+"""Manifiesto de lote para el modo incremental."""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from ..utils import MANIFEST_FILENAME
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS outputs (
+    output_name TEXT PRIMARY KEY,
+    input_path TEXT NOT NULL,
+    input_size INTEGER NOT NULL,
+    input_mtime_ns INTEGER NOT NULL,
+    input_hash TEXT,
+    params_hash TEXT NOT NULL,
+    output_size INTEGER NOT NULL,
+    output_mtime_ns INTEGER NOT NULL,
+    original_width INTEGER NOT NULL,
+    original_height INTEGER NOT NULL,
+    final_width INTEGER NOT NULL,
+    final_height INTEGER NOT NULL
+)
+"""
+
+# Limite de parametros por consulta IN (...) de SQLite
+_QUERY_CHUNK = 500
+_HASH_BLOCK = 1024 * 1024
+_STAT_WORKERS = 16
+# Salidas registradas que se acumulan antes de escribir una transaccion
+_FLUSH_EVERY = 256
+
+
+def params_digest(params: Dict[str, object]) -> str:
+    """Huella estable de los parametros efectivos de un lote."""
+    encoded = json.dumps(params, sort_keys=True, default=str).encode("utf-8")
+    return hashlib.sha256(encoded).hexdigest()
+
+
+def file_digest(path: Path) -> str:
+    """Hash SHA-256 del contenido de un archivo, leido por bloques."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(_HASH_BLOCK), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+@dataclass(frozen=True)
+class InputStat:
+    """Tamano, fecha de modificacion y, con hash_inputs, hash de una entrada que se va a procesar."""
+    size: int
+    mtime_ns: int
+    digest: Optional[str] = None
+
+
+@dataclass(frozen=True)
+class ManifestEntry:
+    """Salida registrada en el manifiesto."""
+    output_path: Path
+    original_size: Tuple[int, int]
+    final_size: Tuple[int, int]
+
+
+class BatchManifest:
+    """
+    Registro de las salidas de un directorio y de las entradas y parametros que las generaron.
+
+    Una salida sigue vigente si la entrada conserva tamano y fecha de modificacion (o, con
+    hash_inputs, el mismo contenido), los parametros tienen la misma huella y el archivo de
+    salida no se modifico ni se borro desde que se escribio.
+    """
+
+    def __init__(self, output_dir: Path, params_hash: str, hash_inputs: bool = False):
+        self._params_hash = params_hash
+        self._hash_inputs = hash_inputs
+        self._lock = threading.Lock()
+        self._pending: List[tuple] = []
+        self._conn = sqlite3.connect(str(output_dir / MANIFEST_FILENAME), timeout=30, check_same_thread=False)
+        self._conn.execute(_SCHEMA)
+        self._conn.commit()
+
+    def up_to_date(
+        self, items: List[Tuple[Path, Path]]
+    ) -> Tuple[Dict[Path, ManifestEntry], Dict[Path, InputStat]]:
+        """
+        Comprueba pares (entrada, salida).
+
+        Devuelve las entradas cuya salida sigue vigente y el InputStat de las demas, que se
+        usa al registrarlas tras procesarlas. Con hash_inputs el hash de esas entradas se
+        calcula aqui, en paralelo, y record() no vuelve a leerlas.
+        """
+        rows = self._lookup([output.name for _, output in items])
+
+        def check(item: Tuple[Path, Path]):
+            input_path, output_path = item
+            try:
+                stat = os.stat(input_path)
+            except OSError:
+                return input_path, None, None
+            row = rows.get(output_path.name)
+            reusable = row is not None and self._output_matches(row, input_path, output_path)
+            if reusable and (row[2], row[3]) == (stat.st_size, stat.st_mtime_ns):
+                return input_path, ManifestEntry(output_path, (row[8], row[9]), (row[10], row[11])), None
+            digest = None
+            if self._hash_inputs:
+                try:
+                    digest = file_digest(input_path)
+                except OSError:
+                    return input_path, None, None
+            # Entrada tocada o copiada: con hash se compara el contenido
+            if reusable and digest is not None and (row[2], row[4]) == (stat.st_size, digest):
+                return input_path, ManifestEntry(output_path, (row[8], row[9]), (row[10], row[11])), None
+            return input_path, None, InputStat(stat.st_size, stat.st_mtime_ns, digest)
+
+        with ThreadPoolExecutor(max_workers=min(_STAT_WORKERS, max(len(items), 1))) as executor:
+            checked = list(executor.map(check, items))
+
+        current = {path: entry for path, entry, _ in checked if entry is not None}
+        stats = {path: stat for path, entry, stat in checked if entry is None and stat is not None}
+        return current, stats
+
+    def record(
+        self,
+        input_path: Path,
+        output_path: Path,
+        input_stat: InputStat,
+        original_size: Tuple[int, int],
+        final_size: Tuple[int, int],
+    ):
+        """Registra una salida recien escrita; se guarda por tandas o al llamar a flush()."""
+        try:
+            output_stat = os.stat(output_path)
+        except OSError:
+            return
+        row = (
+            output_path.name, str(input_path), input_stat.size, input_stat.mtime_ns, input_stat.digest,
+            self._params_hash, output_stat.st_size, output_stat.st_mtime_ns, *original_size, *final_size,
+        )
+        with self._lock:
+            self._pending.append(row)
+            full = len(self._pending) >= _FLUSH_EVERY
+        if full:
+            self.flush()
+
+    def flush(self):
+        """Guarda en una sola transaccion las salidas registradas."""
+        with self._lock:
+            rows, self._pending = self._pending, []
+            if rows:
+                with self._conn:
+                    self._conn.executemany(
+                        "INSERT OR REPLACE INTO outputs VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows
+                    )
+
+    def close(self):
+        """Guarda lo pendiente y cierra el manifiesto."""
+        self.flush()
+        with self._lock:
+            self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def _output_matches(self, row: tuple, input_path: Path, output_path: Path) -> bool:
+        """La fila es de esta entrada y estos parametros, y la salida sigue como se escribio."""
+        if row[1] != str(input_path) or row[5] != self._params_hash:
+            return False
+        try:
+            output_stat = os.stat(output_path)
+        except OSError:
+            return False
+        return (output_stat.st_size, output_stat.st_mtime_ns) == (row[6], row[7])
+
+    def _lookup(self, names: List[str]) -> Dict[str, tuple]:
+        found: Dict[str, tuple] = {}
+        with self._lock:
+            for start in range(0, len(names), _QUERY_CHUNK):
+                chunk = names[start:start + _QUERY_CHUNK]
+                rows = self._conn.execute(
+                    f"SELECT * FROM outputs WHERE output_name IN ({','.join('?' * len(chunk))})", chunk
+                ).fetchall()
+                for row in rows:
+                    found[row[0]] = row
+        return found
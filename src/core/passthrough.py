@@ -0,0 +1,143 @@
+"""Copia de archivos sin decodificar: enlace, copia en el nucleo y parche de la resolucion (DPI)."""
+
+import os
+import shutil
+import struct
+import uuid
+import zlib
+from pathlib import Path
+from typing import BinaryIO, Optional, Tuple
+
+# Parche de bytes: (posicion, bytes que se reemplazan, bytes nuevos); 0 reemplazados = insercion
+Patch = Tuple[int, int, bytes]
+
+_PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+_COPY_CHUNK = 1 << 30
+
+
+def dpi_patch(f: BinaryIO, image_format: str, dpi: int) -> Optional[Patch]:
+    """
+    Parche que fija la resolucion de un JPEG (JFIF) o PNG (pHYs) sin tocar los datos de imagen.
+
+    Reescribe el segmento o bloque existente en su sitio o, si no hay, lo inserta donde lo
+    escribe Pillow. None si el formato no se sabe parchear.
+    """
+    if image_format == "JPEG":
+        return _jfif_patch(f, dpi)
+    if image_format == "PNG":
+        return _phys_patch(f, dpi)
+    return None
+
+
+def apply_patch(data: bytes, patch: Optional[Patch]) -> bytes:
+    """Aplica un parche a un contenido ya leido."""
+    if patch is None:
+        return data
+    offset, replaced, new = patch
+    return data[:offset] + new + data[offset + replaced:]
+
+
+def copy_file(source: Path, target: Path, patch: Optional[Patch] = None, link: bool = False):
+    """
+    Crea target con el contenido de source (con patch aplicado) de forma atomica.
+
+    Con link y sin parche se intenta un enlace duro; si no, los bytes se copian dentro del
+    nucleo con os.copy_file_range (que en Btrfs o XFS comparte bloques) o con la copia
+    rapida de shutil (sendfile), sin pasar por memoria de Python.
+    """
+    if source == target:
+        return
+    temp_path = target.parent / f".tmp_{uuid.uuid4().hex}_{target.name}"
+    try:
+        if link and patch is None:
+            try:
+                os.link(source, temp_path)
+            except OSError:
+                # Otro volumen o sistema de archivos sin enlaces duros
+                link = False
+        if not link or patch is not None:
+            if patch is None:
+                _copy_range(source, temp_path)
+            else:
+                offset, replaced, new = patch
+                with open(source, "rb") as src, open(temp_path, "wb") as dst:
+                    dst.write(src.read(offset))
+                    dst.write(new)
+                    src.seek(offset + replaced)
+                    _copy_stream(src, dst)
+        os.replace(temp_path, target)
+    except Exception:
+        if temp_path.exists():
+            try:
+                temp_path.unlink()
+            except OSError:
+                pass
+        raise
+
+
+def _copy_range(source: Path, target: Path):
+    with open(source, "rb") as src, open(target, "wb") as dst:
+        done, _ = _kernel_copy(src, dst, 0)
+    if not done:
+        # sendfile en Linux, fcopyfile en macOS
+        shutil.copyfile(source, target)
+
+
+def _copy_stream(src: BinaryIO, dst: BinaryIO):
+    """Copia desde la posicion actual de src hasta el final, en el nucleo si se puede."""
+    dst.flush()
+    done, offset = _kernel_copy(src, dst, src.tell())
+    if not done:
+        # Se sigue desde donde quedo la copia en el nucleo
+        src.seek(offset)
+        shutil.copyfileobj(src, dst)
+
+
+def _kernel_copy(src: BinaryIO, dst: BinaryIO, offset: int) -> Tuple[bool, int]:
+    """Copia src desde offset hasta el final con os.copy_file_range; devuelve si termino y hasta donde llego."""
+    if not hasattr(os, "copy_file_range"):
+        return False, offset
+    try:
+        while True:
+            copied = os.copy_file_range(src.fileno(), dst.fileno(), _COPY_CHUNK, offset)
+            if not copied:
+                return True, offset
+            offset += copied
+    except OSError:
+        # Sistema de archivos o kernel sin soporte
+        return False, offset
+
+
+def _jfif_patch(f: BinaryIO, dpi: int) -> Patch:
+    f.seek(0)
+    head = f.read(18)
+    density = struct.pack(">BHH", 1, dpi, dpi)
+    if head[2:4] == b"\xff\xe0" and head[6:11] == b"JFIF\x00":
+        # Unidades y densidad horizontal y vertical del segmento APP0
+        return (13, len(density), density)
+    # Segmento JFIF 1.01 tras el marcador SOI, como lo escribe Pillow
+    app0 = b"\xff\xe0" + struct.pack(">H", 16) + b"JFIF\x00\x01\x01" + density + b"\x00\x00"
+    return (2, 0, app0)
+
+
+def _phys_patch(f: BinaryIO, dpi: int) -> Optional[Patch]:
+    ppm = int(dpi / 0.0254 + 0.5)
+    data = struct.pack(">IIB", ppm, ppm, 1)
+    chunk = struct.pack(">I", len(data)) + b"pHYs" + data + struct.pack(">I", zlib.crc32(b"pHYs" + data))
+
+    f.seek(0)
+    if f.read(8) != _PNG_SIGNATURE:
+        return None
+    offset = 8
+    while True:
+        header = f.read(8)
+        if len(header) < 8:
+            return None
+        length, kind = struct.unpack(">I4s", header)
+        if kind == b"pHYs":
+            return (offset, len(chunk), chunk)
+        if kind in (b"IDAT", b"IEND"):
+            # pHYs tiene que ir antes de los datos de imagen
+            return (offset, 0, chunk)
+        offset += 12 + length
+        f.seek(offset)
@@ -0,0 +1,253 @@
+"""Lectura de cabeceras de imagen con indice persistente."""
+
+import os
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from PIL import Image
+
+from ..utils import ValidationError, ProcessingError
+from ..utils.i18n import tr
+from .sniff import sniff_format
+
+# Orientaciones EXIF que intercambian ancho y alto
+SWAPPED_ORIENTATIONS = (5, 6, 7, 8)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS probe (
+    path TEXT PRIMARY KEY,
+    file_size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    width INTEGER NOT NULL,
+    height INTEGER NOT NULL,
+    orientation INTEGER NOT NULL,
+    format TEXT NOT NULL,
+    mode TEXT NOT NULL,
+    dpi_x REAL,
+    dpi_y REAL
+)
+"""
+
+# Limite de parametros por consulta IN (...) de SQLite
+_QUERY_CHUNK = 500
+
+# Entradas que conserva un indice persistente; al abrirlo se descartan las mas antiguas
+_MAX_ENTRIES = 50_000
+
+
+def read_orientation(img: Image.Image, allow_load: bool = False) -> int:
+    """Lee la orientacion EXIF; sin allow_load nunca decodifica pixeles."""
+    # En PNG getexif() decodifica la imagen si el bloque eXIf va despues de los datos
+    if not allow_load and img.format == "PNG" and "exif" not in img.info:
+        return 1
+    try:
+        return int(img.getexif().get(0x0112, 1) or 1)
+    except Exception:
+        return 1
+
+
+@dataclass(frozen=True)
+class ImageInfo:
+    """Metadatos de cabecera de una imagen (tamano con la orientacion ya aplicada)."""
+    path: Path
+    width: int
+    height: int
+    orientation: int
+    format: str
+    mode: str
+    dpi: Optional[Tuple[float, float]]
+    file_size: int
+    mtime_ns: int
+
+    @property
+    def size(self) -> Tuple[int, int]:
+        return (self.width, self.height)
+
+    @property
+    def pixels(self) -> int:
+        return self.width * self.height
+
+
+class ImageProbe:
+    """
+    Obtiene dimensiones, orientacion, formato, modo y DPI leyendo solo cabeceras.
+
+    Los resultados se guardan en un indice SQLite indexado por ruta y validado por tamano y
+    fecha de modificacion: en ejecuciones repetidas solo se vuelven a abrir los archivos que
+    cambiaron. Sin index_path el indice vive en memoria; con el, al abrirlo se podan las
+    entradas de archivos que ya no existen y las que exceden max_entries.
+    """
+
+    def __init__(self, index_path: Optional[Path] = None, max_workers: int = 0, max_entries: int = _MAX_ENTRIES):
+        if index_path is not None:
+            index_path.parent.mkdir(parents=True, exist_ok=True)
+        self._index_path = index_path
+        self._max_workers = max_workers if max_workers > 0 else min(32, (os.cpu_count() or 4) * 4)
+        self._max_entries = max_entries
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            str(index_path) if index_path is not None else ":memory:",
+            timeout=30,
+            check_same_thread=False,
+        )
+        if index_path is not None:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(_SCHEMA)
+        self._conn.commit()
+        if index_path is not None:
+            self.prune()
+
+    def probe_one(self, path: Path) -> ImageInfo:
+        """Obtiene los metadatos de un archivo, desde el indice si sigue vigente."""
+        try:
+            stat = os.stat(path)
+        except OSError:
+            raise ValidationError(tr.get("err.file_not_found", path=str(path)), code="FILE_NOT_FOUND")
+
+        info = self._lookup([path]).get(str(path))
+        if info is not None and info.file_size == stat.st_size and info.mtime_ns == stat.st_mtime_ns:
+            return info
+
+        info = self._read_header(path, stat)
+        self._store([info])
+        return info
+
+    def probe(self, paths: Iterable[Path]) -> Dict[Path, Optional[ImageInfo]]:
+        """
+        Obtiene los metadatos de varios archivos en paralelo.
+
+        Devuelve None para los archivos que no existen o no se pueden leer como imagen.
+        """
+        paths = list(paths)
+        cached = self._lookup(paths)
+
+        def resolve(path: Path) -> Tuple[Optional[ImageInfo], bool]:
+            try:
+                stat = os.stat(path)
+            except OSError:
+                return None, False
+            info = cached.get(str(path))
+            if info is not None and info.file_size == stat.st_size and info.mtime_ns == stat.st_mtime_ns:
+                return info, False
+            try:
+                return self._read_header(path, stat), True
+            except (ValidationError, ProcessingError):
+                return None, False
+
+        if len(paths) > 1 and self._max_workers > 1:
+            with ThreadPoolExecutor(max_workers=min(self._max_workers, len(paths))) as executor:
+                resolved = list(executor.map(resolve, paths))
+        else:
+            resolved = [resolve(p) for p in paths]
+
+        fresh = [info for info, is_new in resolved if is_new]
+        if fresh:
+            self._store(fresh)
+
+        return {path: info for path, (info, _) in zip(paths, resolved)}
+
+    def prune(self) -> int:
+        """
+        Quita las entradas de archivos que ya no existen y, si aun quedan mas de max_entries,
+        las escritas hace mas tiempo. Devuelve cuantas se quitaron.
+        """
+        with self._lock:
+            paths = [row[0] for row in self._conn.execute("SELECT path FROM probe")]
+        missing = [(path,) for path in paths if not os.path.exists(path)]
+        excess = max(len(paths) - len(missing) - self._max_entries, 0)
+        with self._lock:
+            with self._conn:
+                self._conn.executemany("DELETE FROM probe WHERE path = ?", missing)
+                if excess:
+                    # INSERT OR REPLACE da un rowid nuevo: los menores son las lecturas mas antiguas
+                    self._conn.execute(
+                        "DELETE FROM probe WHERE rowid IN (SELECT rowid FROM probe ORDER BY rowid LIMIT ?)",
+                        (excess,),
+                    )
+        return len(missing) + excess
+
+    def close(self):
+        """Cierra el indice."""
+        with self._lock:
+            self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    @staticmethod
+    def _read_header(path: Path, stat: os.stat_result) -> ImageInfo:
+        """Abre la imagen de forma perezosa y lee su cabecera sin llamar a load()."""
+        try:
+            # Lo que no tiene firma de imagen se descarta sin probar todos los decodificadores
+            image_format = sniff_format(path)
+            if image_format is None:
+                raise ValidationError(tr.get("err.not_an_image", path=str(path)), code="UNSUPPORTED_FORMAT")
+            with Image.open(path, formats=(image_format,)) as img:
+                orientation = read_orientation(img)
+                width, height = img.size
+                if orientation in SWAPPED_ORIENTATIONS:
+                    width, height = height, width
+                dpi = img.info.get("dpi")
+                if dpi is not None and not isinstance(dpi, tuple):
+                    dpi = (dpi, dpi)
+                return ImageInfo(
+                    path=path,
+                    width=width,
+                    height=height,
+                    orientation=orientation,
+                    format=img.format or "",
+                    mode=img.mode,
+                    dpi=(float(dpi[0]), float(dpi[1])) if dpi else None,
+                    file_size=stat.st_size,
+                    mtime_ns=stat.st_mtime_ns,
+                )
+        except Image.UnidentifiedImageError as e:
+            raise ValidationError(tr.get("err.unsupported_format", ext=path.suffix), code="UNSUPPORTED_FORMAT") from e
+        except (OSError, ValueError) as e:
+            raise ProcessingError(tr.get("err.io_error", error=str(e)), code="IO_ERROR") from e
+
+    def _lookup(self, paths: List[Path]) -> Dict[str, ImageInfo]:
+        """Consulta el indice por lotes."""
+        found: Dict[str, ImageInfo] = {}
+        keys = [str(p) for p in paths]
+        with self._lock:
+            for start in range(0, len(keys), _QUERY_CHUNK):
+                chunk = keys[start:start + _QUERY_CHUNK]
+                rows = self._conn.execute(
+                    f"SELECT * FROM probe WHERE path IN ({','.join('?' * len(chunk))})", chunk
+                ).fetchall()
+                for row in rows:
+                    found[row[0]] = ImageInfo(
+                        path=Path(row[0]),
+                        width=row[3],
+                        height=row[4],
+                        orientation=row[5],
+                        format=row[6],
+                        mode=row[7],
+                        dpi=(row[8], row[9]) if row[8] is not None else None,
+                        file_size=row[1],
+                        mtime_ns=row[2],
+                    )
+        return found
+
+    def _store(self, infos: List[ImageInfo]):
+        """Guarda los resultados nuevos en una sola transaccion."""
+        rows = [
+            (
+                str(i.path), i.file_size, i.mtime_ns, i.width, i.height, i.orientation,
+                i.format, i.mode, i.dpi[0] if i.dpi else None, i.dpi[1] if i.dpi else None,
+            )
+            for i in infos
+        ]
+        with self._lock:
+            with self._conn:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO probe VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows
+                )
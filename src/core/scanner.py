@@ -0,0 +1,156 @@
+"""Busqueda de imagenes en directorios con os.scandir."""
+
+import os
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from fnmatch import fnmatch
+from pathlib import Path
+from typing import Iterable, Iterator, List, Optional, Sequence, Set, Tuple
+
+from ..utils import (
+    DEFAULT_SYMLINK_POLICY,
+    SUPPORTED_EXTENSIONS,
+    SYMLINK_POLICIES,
+    FileSystemError,
+    ValidationError,
+)
+from ..utils.i18n import tr
+from .sniff import FORMAT_EXTENSIONS, sniff_format
+
+# Directorios leidos a la vez en una busqueda recursiva
+_SCAN_WORKERS = 8
+
+
+class _Filter:
+    """Extensiones y patrones de inclusion/exclusion de una busqueda."""
+
+    def __init__(
+        self,
+        root: Path,
+        extensions: Iterable[str],
+        include: Sequence[str],
+        exclude: Sequence[str],
+        sniff: bool = False,
+    ):
+        self._prefix = len(os.path.join(str(root), ""))
+        self.extensions = frozenset(ext.lower() for ext in extensions)
+        self._include = tuple(include)
+        self._exclude = tuple(exclude)
+        self._sniff = sniff
+
+    def wants_file(self, name: str, path: str) -> bool:
+        ext = os.path.splitext(name)[1].lower()
+        # Con sniff, las extensiones que no son de imagen se deciden despues por su contenido
+        if ext not in self.extensions and not (self._sniff and ext not in SUPPORTED_EXTENSIONS):
+            return False
+        if self._include and not self._matches(self._include, name, path):
+            return False
+        return not (self._exclude and self._matches(self._exclude, name, path))
+
+    def is_image(self, name: str, path: str) -> bool:
+        """Acepta por extension o, si esta no es de imagen, por la firma de la cabecera."""
+        if os.path.splitext(name)[1].lower() in self.extensions:
+            return True
+        image_format = sniff_format(path)
+        return image_format is not None and not self.extensions.isdisjoint(FORMAT_EXTENSIONS[image_format])
+
+    def wants_dir(self, name: str, path: str) -> bool:
+        return not (self._exclude and self._matches(self._exclude, name, path))
+
+    def _matches(self, patterns: Tuple[str, ...], name: str, path: str) -> bool:
+        # Los patrones se comparan con el nombre y con la ruta relativa a la raiz, con "/"
+        relative = path[self._prefix:].replace(os.sep, "/")
+        return any(fnmatch(name, pattern) or fnmatch(relative, pattern) for pattern in patterns)
+
+
+def _scan_dir(directory: str, rules: _Filter, symlinks: str, recursive: bool) -> Tuple[List[Path], List[str]]:
+    """Lee un directorio; devuelve sus imagenes y, si recursive, sus subdirectorios."""
+    files: List[Path] = []
+    subdirs: List[str] = []
+    try:
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                try:
+                    # is_symlink/is_dir/is_file sin seguir enlaces usan d_type: sin stat extra
+                    is_link = entry.is_symlink()
+                    if is_link and symlinks == "skip":
+                        continue
+                    if entry.is_dir(follow_symlinks=False) or (is_link and symlinks == "follow" and entry.is_dir()):
+                        if recursive and rules.wants_dir(entry.name, entry.path):
+                            subdirs.append(entry.path)
+                        continue
+                    if not rules.wants_file(entry.name, entry.path):
+                        continue
+                    if entry.is_file(follow_symlinks=False) or (is_link and entry.is_file()):
+                        if rules.is_image(entry.name, entry.path):
+                            files.append(Path(entry.path))
+                except OSError:
+                    continue
+    except OSError:
+        # Subdirectorio sin permisos o desaparecido durante la busqueda
+        pass
+    return files, subdirs
+
+
+def iter_images(
+    directory: Path,
+    recursive: bool = False,
+    include: Sequence[str] = (),
+    exclude: Sequence[str] = (),
+    symlinks: str = DEFAULT_SYMLINK_POLICY,
+    extensions: Iterable[str] = SUPPORTED_EXTENSIONS,
+    max_workers: int = _SCAN_WORKERS,
+    sniff: bool = False,
+) -> Iterator[Path]:
+    """
+    Entrega las imagenes de un directorio a medida que se encuentran, sin orden definido.
+
+    include y exclude son patrones de fnmatch (el "*" tambien abarca "/") que se comparan con
+    el nombre y con la ruta relativa; exclude tambien poda directorios. symlinks decide los
+    enlaces simbolicos: "skip" los ignora, "files" acepta archivos enlazados sin entrar en
+    directorios enlazados y "follow" entra tambien en estos, sin repetir directorios. Con
+    sniff, los archivos sin extension de imagen se aceptan si su cabecera es de un formato
+    de extensions; los que si la tienen no se leen. En modo recursivo los subdirectorios se
+    leen en paralelo con max_workers hilos.
+    """
+    if symlinks not in SYMLINK_POLICIES:
+        raise ValidationError(tr.get("err.invalid_symlinks", policy=symlinks), code="INVALID_SYMLINK_POLICY")
+    root = Path(directory)
+    if not root.is_dir():
+        raise FileSystemError(tr.get("err.dir_not_found", dir=str(root)), code="DIR_NOT_FOUND")
+
+    rules = _Filter(root, extensions, include, exclude, sniff)
+    if not recursive:
+        yield from _scan_dir(str(root), rules, symlinks, False)[0]
+        return
+
+    visited: Optional[Set[Tuple[int, int]]] = None
+    if symlinks == "follow":
+        # Identidad de los directorios recorridos, para no entrar en ciclos de enlaces
+        stat = os.stat(root)
+        visited = {(stat.st_dev, stat.st_ino)}
+
+    pool = ThreadPoolExecutor(max_workers=max(1, max_workers))
+    try:
+        pending = {pool.submit(_scan_dir, str(root), rules, symlinks, True)}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                files, subdirs = future.result()
+                for subdir in subdirs:
+                    if visited is not None:
+                        try:
+                            stat = os.stat(subdir)
+                        except OSError:
+                            continue
+                        if (stat.st_dev, stat.st_ino) in visited:
+                            continue
+                        visited.add((stat.st_dev, stat.st_ino))
+                    pending.add(pool.submit(_scan_dir, subdir, rules, symlinks, True))
+                yield from files
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def scan_images(directory: Path, recursive: bool = False, **options) -> List[Path]:
+    """Lista ordenada de las imagenes de un directorio; acepta las opciones de iter_images."""
+    return sorted(iter_images(directory, recursive, **options))
@@ -0,0 +1,51 @@
+"""Deteccion del formato de imagen por su firma (magic bytes)."""
+
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+# Bytes de cabecera necesarios para reconocer cualquiera de los formatos
+SNIFF_BYTES = 32
+
+# Extensiones de salida de cada formato; la primera es la que se usa por defecto
+FORMAT_EXTENSIONS: Dict[str, Tuple[str, ...]] = {
+    "JPEG": (".jpg", ".jpeg"),
+    "PNG": (".png",),
+    "WEBP": (".webp",),
+    "TIFF": (".tiff", ".tif"),
+    "GIF": (".gif",),
+    "BMP": (".bmp",),
+}
+
+_SIGNATURES: Tuple[Tuple[bytes, str], ...] = (
+    (b"\xff\xd8\xff", "JPEG"),
+    (b"\x89PNG\r\n\x1a\n", "PNG"),
+    (b"GIF87a", "GIF"),
+    (b"GIF89a", "GIF"),
+    (b"II*\x00", "TIFF"),
+    (b"MM\x00*", "TIFF"),
+    # BigTIFF
+    (b"II+\x00", "TIFF"),
+    (b"MM\x00+", "TIFF"),
+)
+
+# Tamanos validos de la cabecera DIB que sigue a "BM"; "BM" solo es demasiado comun
+_BMP_HEADER_SIZES = (12, 40, 52, 56, 64, 108, 124)
+
+
+def sniff_header(header: bytes) -> Optional[str]:
+    """Formato de Pillow ("JPEG", "PNG"...) que indica una cabecera, o None si no es imagen."""
+    for signature, image_format in _SIGNATURES:
+        if header.startswith(signature):
+            return image_format
+    if header[:4] == b"RIFF" and header[8:12] == b"WEBP":
+        return "WEBP"
+    if header[:2] == b"BM" and len(header) >= 18:
+        if int.from_bytes(header[14:18], "little") in _BMP_HEADER_SIZES:
+            return "BMP"
+    return None
+
+
+def sniff_format(path: Path) -> Optional[str]:
+    """Lee solo la cabecera de un archivo y devuelve su formato (None si no es imagen); propaga OSError."""
+    with open(path, "rb") as f:
+        return sniff_header(f.read(SNIFF_BYTES))
@@ -0,0 +1,52 @@
+"""Similitud estructural (SSIM) entre imagenes sobre un plano de luminancia reducido."""
+
+import math
+from array import array
+
+from PIL import Image, ImageMath
+
+# Lado mayor del plano de luminancia que se compara
+_PLANE_SIZE = 512
+# Lado de los bloques sin solapamiento sobre los que se calcula la SSIM local
+_BLOCK = 8
+_C1 = (0.01 * 255) ** 2
+_C2 = (0.03 * 255) ** 2
+
+
+def luma_plane(img: Image.Image) -> Image.Image:
+    """Luminancia reducida por un factor entero hasta _PLANE_SIZE y recortada a bloques enteros."""
+    plane = img.convert("L") if img.mode != "L" else img
+    factor = math.ceil(max(plane.size) / _PLANE_SIZE)
+    if factor > 1:
+        plane = plane.reduce(factor)
+    block = _block_size(plane)
+    width, height = plane.width - plane.width % block, plane.height - plane.height % block
+    if (width, height) != plane.size:
+        plane = plane.crop((0, 0, width, height))
+    return plane
+
+
+def ssim(reference: Image.Image, candidate: Image.Image) -> float:
+    """
+    SSIM media por bloques entre dos planos de luma_plane() del mismo tamano (1.0 = identicos).
+
+    Se calcula con operaciones de Pillow en float32 sobre imagenes completas, sin bucles por
+    pixel en Python.
+    """
+    block = _block_size(reference)
+    x, y = reference.convert("F"), candidate.convert("F")
+    # reduce() en modo F promedia cada bloque: medias de x, y, x^2, y^2 y x*y
+    product = lambda a, b: ImageMath.lambda_eval(lambda e: e["a"] * e["b"], a=a, b=b).reduce(block)
+    scores = ImageMath.lambda_eval(
+        lambda e: ((2 * e["mx"] * e["my"] + _C1) * (2 * (e["xy"] - e["mx"] * e["my"]) + _C2))
+        / ((e["mx"] * e["mx"] + e["my"] * e["my"] + _C1)
+           * (e["xx"] - e["mx"] * e["mx"] + e["yy"] - e["my"] * e["my"] + _C2)),
+        mx=x.reduce(block), my=y.reduce(block), xx=product(x, x), yy=product(y, y), xy=product(x, y),
+    )
+    # Los datos crudos del modo F son float32 nativos
+    values = array("f", scores.tobytes())
+    return sum(values) / len(values)
+
+
+def _block_size(plane: Image.Image) -> int:
+    return max(1, min(_BLOCK, plane.width, plane.height))
@@ -8,7 +8,8 @@ from typing import List, Optional
 import ttkbootstrap as tb
 from ttkbootstrap.constants import *
 
-from ..utils import SUPPORTED_EXTENSIONS
+from ..core.scanner import scan_images
+from ..utils import SUPPORTED_EXTENSIONS, FileSystemError
 from ..utils.i18n import tr
 from .settings_window import SettingsWindow
 
@@ -215,15 +216,10 @@ class FileListPanel(tb.Frame):
             folder = Path(directory)
             if not folder.exists() or not folder.is_dir():
                 return
-            new_files = []
             try:
-                for f in folder.iterdir():
-                    if f.is_file() and f.suffix.lower() in SUPPORTED_EXTENSIONS:
-                        new_files.append(f)
-            except PermissionError:
-                pass
-            except OSError:
-                pass
+                new_files = scan_images(folder, sniff=True)
+            except (FileSystemError, OSError):
+                new_files = []
             self._add_files_list(new_files)
         except Exception:
             pass
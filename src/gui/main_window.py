@@ -14,8 +14,13 @@ from ttkbootstrap.dialogs import Messagebox
 from ..core import BatchHandler, ImageProcessor, ResizeMode, UnitConverter
 from ..utils import (
     DEFAULT_DPI,
+    DEFAULT_ENCODER_PROFILE,
+    DEFAULT_OUTPUT_FORMAT,
     DEFAULT_OUTPUT_SUFFIX,
+    ENCODER_PROFILES,
     OUTPUT_DIR,
+    PROBE_INDEX_PATH,
+    REDUCING_GAP_PRESETS,
     ValidationError,
     get_all_preset_names,
     get_preset_by_name,
@@ -42,13 +47,21 @@ class MainWindow(tb.Window):
         self._build_ui()
 
         self._processor = ImageProcessor(dpi=DEFAULT_DPI)
+        # Un solo manejador: su pool de workers se reutiliza entre lotes
         self._batch_handler: BatchHandler = BatchHandler(
             processor=self._processor,
             max_workers=0,
             progress_callback=self._on_progress_update,
+            backend="auto",
+            warm_up=True,
+            probe_index=PROBE_INDEX_PATH,
         )
         self._processing_thread = None
         self._total_files: int = 0
+        # Quien libera el manejador al cerrar: la ventana si esta libre, si no el hilo del lote
+        self._close_lock = threading.Lock()
+        self._batch_running = False
+        self._closing = False
         
         self.protocol("WM_DELETE_WINDOW", self._on_closing)
         tr.add_observer(self._refresh_ui)
@@ -63,11 +76,20 @@ class MainWindow(tb.Window):
                 buttons=['No:No', 'Sí:Yes']
             )
             if result == "Yes":
-                if self._batch_handler:
-                    self._batch_handler.cancel()
-                self.destroy()
+                self._shutdown()
         else:
-            self.destroy()
+            self._shutdown()
+
+    def _shutdown(self):
+        """Cierra la ventana sin esperar al lote en curso: se cancela y su hilo cierra el manejador al terminar."""
+        with self._close_lock:
+            self._closing = True
+            busy = self._batch_running
+        if busy:
+            self._batch_handler.cancel()
+        else:
+            self._batch_handler.close()
+        self.destroy()
 
     def _build_ui(self):
         main = tb.Frame(self, padding=10)
@@ -131,6 +153,9 @@ class MainWindow(tb.Window):
         self.label_unit.configure(text=tr.get("ui.label.unit"))
         self.label_mode.configure(text=tr.get("ui.label.mode"))
         self.label_dpi.configure(text=tr.get("ui.label.dpi"))
+        self.label_downscale.configure(text=tr.get("ui.label.downscale"))
+        self.label_encoder.configure(text=tr.get("ui.label.encoder"))
+        self.label_output_format.configure(text=tr.get("ui.label.output_format"))
         
         # Botones de acción
         if not self._icon_play: self.start_btn.configure(text=tr.get("ui.btn.start"))
@@ -144,6 +169,15 @@ class MainWindow(tb.Window):
             tr.get("ui.mode.fill"),
             tr.get("ui.mode.crop"),
         ))
+        downscale_key = self._downscale_key()
+        self.downscale_cb.configure(values=tuple(tr.get(f"ui.downscale.{key}") for key in REDUCING_GAP_PRESETS))
+        self.downscale_cb.current(list(REDUCING_GAP_PRESETS).index(downscale_key))
+        encoder_key = self._encoder_key()
+        self.encoder_cb.configure(values=tuple(tr.get(f"ui.encoder.{key}") for key in ENCODER_PROFILES))
+        self.encoder_cb.current(list(ENCODER_PROFILES).index(encoder_key))
+        output_format = self._output_format()
+        self.output_format_cb.configure(values=self._output_format_labels())
+        self.output_format_cb.current(self._output_formats.index(output_format))
         
         # Resetear status si está en listo
         if self.status_var.get() in ("Listo", "Ready"):
@@ -244,6 +278,44 @@ class MainWindow(tb.Window):
         self.dpi_entry = tb.Entry(advanced_inner, width=10, textvariable=self.dpi_var)
         self.dpi_entry.grid(row=1, column=1, columnspan=2, sticky=W, padx=2, pady=3)
 
+        self.label_downscale = tb.Label(advanced_inner, text=tr.get("ui.label.downscale"))
+        self.label_downscale.grid(row=2, column=0, sticky=W, padx=2, pady=3)
+        self.downscale_var = tk.StringVar(value=tr.get("ui.downscale.high"))
+        self.downscale_cb = tb.Combobox(
+            advanced_inner,
+            textvariable=self.downscale_var,
+            values=tuple(tr.get(f"ui.downscale.{key}") for key in REDUCING_GAP_PRESETS),
+            state="readonly",
+            width=18,
+        )
+        self.downscale_cb.grid(row=2, column=1, columnspan=2, sticky=W, padx=2, pady=3)
+
+        self.label_encoder = tb.Label(advanced_inner, text=tr.get("ui.label.encoder"))
+        self.label_encoder.grid(row=3, column=0, sticky=W, padx=2, pady=3)
+        self.encoder_var = tk.StringVar(value=tr.get(f"ui.encoder.{DEFAULT_ENCODER_PROFILE}"))
+        self.encoder_cb = tb.Combobox(
+            advanced_inner,
+            textvariable=self.encoder_var,
+            values=tuple(tr.get(f"ui.encoder.{key}") for key in ENCODER_PROFILES),
+            state="readonly",
+            width=18,
+        )
+        self.encoder_cb.grid(row=3, column=1, columnspan=2, sticky=W, padx=2, pady=3)
+
+        # AVIF solo aparece si Pillow puede escribirlo
+        self._output_formats = BatchHandler.available_output_formats()
+        self.label_output_format = tb.Label(advanced_inner, text=tr.get("ui.label.output_format"))
+        self.label_output_format.grid(row=4, column=0, sticky=W, padx=2, pady=3)
+        self.output_format_var = tk.StringVar(value=tr.get("ui.output_format.keep"))
+        self.output_format_cb = tb.Combobox(
+            advanced_inner,
+            textvariable=self.output_format_var,
+            values=self._output_format_labels(),
+            state="readonly",
+            width=18,
+        )
+        self.output_format_cb.grid(row=4, column=1, columnspan=2, sticky=W, padx=2, pady=3)
+
     def _setup_action_buttons(self, parent: tb.Frame):
         self._icon_play = _get_icon("play-fill", size=18, color="#ffffff")
         self._icon_cancel = _get_icon("x", size=18, color="#ffffff")
@@ -290,6 +362,26 @@ class MainWindow(tb.Window):
             return ResizeMode.CROP
         return ResizeMode.FIT
 
+    def _downscale_key(self) -> str:
+        """Obtiene la clave del preset de reduccion seleccionado (independiente del idioma)."""
+        keys = list(REDUCING_GAP_PRESETS)
+        index = self.downscale_cb.current()
+        return keys[index] if 0 <= index < len(keys) else "high"
+
+    def _encoder_key(self) -> str:
+        """Obtiene el perfil de codificacion seleccionado (independiente del idioma)."""
+        keys = list(ENCODER_PROFILES)
+        index = self.encoder_cb.current()
+        return keys[index] if 0 <= index < len(keys) else DEFAULT_ENCODER_PROFILE
+
+    def _output_format_labels(self) -> tuple:
+        return tuple(tr.get("ui.output_format.keep") if name == "keep" else name for name in self._output_formats)
+
+    def _output_format(self) -> str:
+        """Obtiene el formato de salida seleccionado (independiente del idioma)."""
+        index = self.output_format_cb.current()
+        return self._output_formats[index] if 0 <= index < len(self._output_formats) else DEFAULT_OUTPUT_FORMAT
+
     def _on_preset_focus(self, event=None):
         self.preset_cb['values'] = get_all_preset_names()
 
@@ -513,6 +605,8 @@ class MainWindow(tb.Window):
             return
 
         self._processor.dpi = dpi
+        self._processor.reducing_gap = REDUCING_GAP_PRESETS[self._downscale_key()]
+        self._processor.encoder_profile = self._encoder_key()
 
         self._total_files = len(files)
         self.progress["value"] = 0
@@ -524,16 +618,11 @@ class MainWindow(tb.Window):
         self.detail_btn.configure(state=DISABLED)
 
         mode = self._map_mode()
+        output_format = self._output_format()
 
         def run_batch():
             try:
-                handler = BatchHandler(
-                    processor=self._processor,
-                    max_workers=0,
-                    progress_callback=self._on_progress_update,
-                )
-                self._batch_handler = handler
-                results = handler.process_batch(
+                results = self._batch_handler.process_batch(
                     input_files=files,
                     output_dir=output_dir,
                     width=width,
@@ -542,11 +631,20 @@ class MainWindow(tb.Window):
                     height_unit=unit,
                     mode=mode,
                     suffix=DEFAULT_OUTPUT_SUFFIX,
+                    output_format=output_format,
                 )
                 self._on_batch_finished(results)
             except Exception as e:
                 self._on_batch_error(str(e))
-
+            finally:
+                with self._close_lock:
+                    self._batch_running = False
+                    closing = self._closing
+                # La ventana ya se cerro sin esperar: el pool y el indice se liberan aqui
+                if closing:
+                    self._batch_handler.close()
+
+        self._batch_running = True
         self._processing_thread = threading.Thread(target=run_batch, daemon=True)
         self._processing_thread.start()
 
@@ -557,6 +655,9 @@ class MainWindow(tb.Window):
         self.cancel_btn.configure(state=DISABLED)
 
     def _on_progress_update(self, current: int, total: int, filename: str):
+        if self._closing:
+            return
+
         def update():
             self.progress["value"] = current
             self.status_var.set(tr.get("ui.status.processing", current=current, total=total, file=filename))
@@ -566,6 +667,9 @@ class MainWindow(tb.Window):
         self.after(0, update)
 
     def _on_batch_finished(self, results):
+        if self._closing:
+            return
+
         def finalize():
             ok = sum(1 for r in results if r.success)
             fail = len(results) - ok
@@ -586,6 +690,9 @@ class MainWindow(tb.Window):
         self.after(0, finalize)
 
     def _on_batch_error(self, error_message: str):
+        if self._closing:
+            return
+
         def handle_error():
             self.status_var.set(f"Error: {error_message}")
             self.start_btn.configure(state=NORMAL)
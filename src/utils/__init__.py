@@ -4,12 +4,35 @@ from .config import (
     DEFAULT_DPI,
     SUPPORTED_FORMATS,
     SUPPORTED_EXTENSIONS,
+    OUTPUT_FORMAT_EXTENSIONS,
+    OUTPUT_FORMATS,
+    DEFAULT_OUTPUT_FORMAT,
     UNIT_CONVERSIONS,
     VALID_UNITS,
     RESAMPLE_FILTERS,
     DEFAULT_OUTPUT_SUFFIX,
     DEFAULT_RESAMPLE,
+    REDUCING_GAP_PRESETS,
+    DEFAULT_REDUCING_GAP,
+    ENCODER_PROFILES,
+    DEFAULT_ENCODER_PROFILE,
+    ENCODER_OPTIONS,
+    PASSTHROUGH_MODES,
+    DEFAULT_MEMORY_BUDGET_MB,
+    DEFAULT_ASYNC_BATCHES,
+    BATCH_BACKENDS,
+    DEFAULT_BATCH_BACKEND,
+    DEDUP_MODES,
+    SYMLINK_POLICIES,
+    DEFAULT_SYMLINK_POLICY,
+    SCHEDULE_POLICIES,
+    DEFAULT_SCHEDULE,
     OUTPUT_DIR,
+    CACHE_DIR,
+    PROBE_INDEX_PATH,
+    WORKER_TUNING_PATH,
+    JOBS_DIR,
+    MANIFEST_FILENAME,
     SIZE_PRESETS,
     SizePreset,
     get_preset_categories,
@@ -36,12 +59,35 @@ __all__ = [
     "DEFAULT_DPI",
     "SUPPORTED_FORMATS",
     "SUPPORTED_EXTENSIONS",
+    "OUTPUT_FORMAT_EXTENSIONS",
+    "OUTPUT_FORMATS",
+    "DEFAULT_OUTPUT_FORMAT",
     "UNIT_CONVERSIONS",
     "VALID_UNITS",
     "RESAMPLE_FILTERS",
     "DEFAULT_OUTPUT_SUFFIX",
     "DEFAULT_RESAMPLE",
+    "REDUCING_GAP_PRESETS",
+    "DEFAULT_REDUCING_GAP",
+    "ENCODER_PROFILES",
+    "DEFAULT_ENCODER_PROFILE",
+    "ENCODER_OPTIONS",
+    "PASSTHROUGH_MODES",
+    "DEFAULT_MEMORY_BUDGET_MB",
+    "DEFAULT_ASYNC_BATCHES",
+    "BATCH_BACKENDS",
+    "DEFAULT_BATCH_BACKEND",
+    "DEDUP_MODES",
+    "SYMLINK_POLICIES",
+    "DEFAULT_SYMLINK_POLICY",
+    "SCHEDULE_POLICIES",
+    "DEFAULT_SCHEDULE",
     "OUTPUT_DIR",
+    "CACHE_DIR",
+    "PROBE_INDEX_PATH",
+    "WORKER_TUNING_PATH",
+    "JOBS_DIR",
+    "MANIFEST_FILENAME",
     "SIZE_PRESETS",
     "SizePreset",
     "get_preset_categories",
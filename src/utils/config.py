@@ -2,13 +2,23 @@
 
 from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Tuple
 from .i18n import tr
 
 DEFAULT_DPI: int = 300
 SUPPORTED_FORMATS: Tuple[str, ...] = ("PNG", "JPEG", "JPG", "BMP", "TIFF", "WEBP", "GIF")
 SUPPORTED_EXTENSIONS: Tuple[str, ...] = tuple(f".{ext.lower()}" for ext in SUPPORTED_FORMATS)
 
+# Formatos de salida de un lote: "keep" conserva el de cada entrada. AVIF requiere Pillow con soporte AVIF
+OUTPUT_FORMAT_EXTENSIONS: Dict[str, str] = {
+    "JPEG": ".jpg",
+    "PNG": ".png",
+    "WEBP": ".webp",
+    "AVIF": ".avif",
+}
+OUTPUT_FORMATS: Tuple[str, ...] = ("keep",) + tuple(OUTPUT_FORMAT_EXTENSIONS)
+DEFAULT_OUTPUT_FORMAT: str = "keep"
+
 UNIT_CONVERSIONS: Dict[str, float] = {
     "px": 1.0,
     "cm": 1.0,
@@ -28,8 +38,81 @@ RESAMPLE_FILTERS = {
 DEFAULT_OUTPUT_SUFFIX: str = "_resized"
 DEFAULT_RESAMPLE: str = "LANCZOS"
 
+# Reduccion previa en dos etapas (reduce() entero + filtro final). None = una sola pasada.
+REDUCING_GAP_PRESETS: Dict[str, Optional[float]] = {
+    "exact": None,
+    "high": 3.0,
+    "fast": 2.0,
+}
+DEFAULT_REDUCING_GAP: Optional[float] = REDUCING_GAP_PRESETS["high"]
+
+# Opciones del codificador por formato de Pillow: velocidad frente a tamano de la salida.
+# PNG con optimize puede tardar varias veces lo que el remuestreo.
+ENCODER_PROFILES: Dict[str, Dict[str, Dict[str, object]]] = {
+    "fastest": {
+        "JPEG": {"optimize": False, "progressive": False},
+        "PNG": {"optimize": False, "compress_level": 1},
+        "WEBP": {"method": 0},
+        "AVIF": {"speed": 10},
+        "TIFF": {"compression": "raw"},
+    },
+    "balanced": {
+        "JPEG": {"optimize": True, "progressive": False},
+        "PNG": {"optimize": False, "compress_level": 6},
+        "WEBP": {"method": 4},
+        # Sin opciones TIFF: se conserva la compresion de la entrada
+    },
+    "smallest": {
+        "JPEG": {"optimize": True, "progressive": True},
+        "PNG": {"optimize": True, "compress_level": 9},
+        "WEBP": {"method": 6},
+        "AVIF": {"speed": 2},
+        "TIFF": {"compression": "tiff_adobe_deflate"},
+    },
+}
+DEFAULT_ENCODER_PROFILE: str = "balanced"
+# Opciones que se pueden ajustar por formato sobre el perfil
+ENCODER_OPTIONS: Dict[str, Tuple[str, ...]] = {
+    "JPEG": ("optimize", "progressive", "subsampling"),
+    "PNG": ("optimize", "compress_level"),
+    "WEBP": ("method", "lossless"),
+    "AVIF": ("speed",),
+    "TIFF": ("compression",),
+}
+
+# Entradas que ya cumplen el tamano pedido: se enlazan o se copian sin decodificar
+PASSTHROUGH_MODES: Tuple[str, ...] = ("hardlink", "copy")
+
+# Memoria estimada maxima de las imagenes en proceso simultaneo. 0 = sin limite.
+DEFAULT_MEMORY_BUDGET_MB: int = 1024
+
+# Lotes asincronos que conduce a la vez el pool compartido; los siguientes esperan turno
+DEFAULT_ASYNC_BATCHES: int = 4
+
+# Backends de ejecucion de BatchHandler
+BATCH_BACKENDS: Tuple[str, ...] = ("threads", "processes", "auto")
+DEFAULT_BATCH_BACKEND: str = "threads"
+
+# Orden en que se reparten los archivos de un lote
+SCHEDULE_POLICIES: Tuple[str, ...] = ("fifo", "largest_first", "smallest_first")
+DEFAULT_SCHEDULE: str = "fifo"
+
+# Enlaces simbolicos al buscar imagenes: ignorarlos, solo archivos enlazados o seguir directorios
+SYMLINK_POLICIES: Tuple[str, ...] = ("skip", "files", "follow")
+DEFAULT_SYMLINK_POLICY: str = "files"
+
+# Como se crean las salidas de entradas repetidas: enlace duro o copia del primer resultado
+DEDUP_MODES: Tuple[str, ...] = ("hardlink", "copy")
+
 BASE_DIR: Path = Path(__file__).resolve().parent.parent.parent
 OUTPUT_DIR: Path = Path.home() / "Downloads" / "PycResizer" / "output"
+CACHE_DIR: Path = Path.home() / ".pycresizer"
+PROBE_INDEX_PATH: Path = CACHE_DIR / "probe_index.sqlite3"
+WORKER_TUNING_PATH: Path = CACHE_DIR / "worker_tuning.json"
+JOBS_DIR: Path = CACHE_DIR / "jobs"
+
+# Manifiesto del modo incremental, dentro de cada directorio de salida
+MANIFEST_FILENAME: str = ".pycresizer_manifest.sqlite3"
 
 
 @dataclass
@@ -33,6 +33,16 @@ _TRANSLATIONS = {
         "ui.mode.stretch": "Estirar",
         "ui.mode.fill": "Rellenar (fill)",
         "ui.mode.crop": "Recortar (crop)",
+        "ui.label.downscale": "Reducción:",
+        "ui.downscale.exact": "Exacta",
+        "ui.downscale.high": "Alta calidad",
+        "ui.downscale.fast": "Rápida",
+        "ui.label.encoder": "Codificación:",
+        "ui.encoder.fastest": "Más rápida",
+        "ui.encoder.balanced": "Equilibrada",
+        "ui.encoder.smallest": "Más pequeña",
+        "ui.label.output_format": "Formato:",
+        "ui.output_format.keep": "Original",
         "err.empty_dpi": "DPI no puede estar vacío",
         "err.invalid_dpi": "DPI debe ser mayor que cero",
         "err.invalid_dpi_type": "DPI debe ser numérico",
@@ -49,7 +59,26 @@ _TRANSLATIONS = {
         "err.invalid_input_dir": "Directorio de entrada inválido: {path}",
         "err.file_not_found": "Archivo no existe: {path}",
         "err.unsupported_format": "Formato no soportado: {ext}",
+        "err.not_an_image": "El archivo no es una imagen reconocida: {path}",
         "err.invalid_dimensions": "Dimensiones deben ser mayores que cero",
+        "err.invalid_reducing_gap": "reducing_gap debe ser None o mayor o igual que 1.0: {value}",
+        "err.invalid_max_bytes": "max_bytes debe ser 0 (sin límite) o positivo: {value}",
+        "err.invalid_target_ssim": "target_ssim debe estar entre 0 y 1: {value}",
+        "err.max_bytes_unreachable": "No se pudo bajar de {max_bytes} bytes (mínimo obtenido: {size} bytes)",
+        "err.invalid_passthrough": "Modo de copia directa no válido: {mode}",
+        "err.invalid_backend": "Backend de ejecución no válido: {backend}",
+        "err.invalid_pipeline": "La concurrencia y las colas del pipeline deben ser mayores que cero",
+        "err.invalid_dedup": "Modo de deduplicación no válido: {mode}",
+        "err.job_not_found": "No existe el diario del lote: {job}",
+        "err.job_settings_changed": "La configuración del procesador cambió desde que empezó el lote {job}: {settings}",
+        "err.invalid_schedule": "Política de planificación no válida: {schedule}",
+        "err.ordered_schedule": "ordered=True requiere la planificación fifo, no {schedule}",
+        "err.invalid_encoder_profile": "Perfil de codificación no válido: {profile}",
+        "err.invalid_output_format": "Formato de salida no válido o no disponible: {format}",
+        "err.invalid_encoder_option": "Opción de codificador no válida: {option}",
+        "err.invalid_timeout": "El tiempo límite por archivo no puede ser negativo",
+        "err.file_timeout": "El archivo superó el tiempo límite de {seconds} s",
+        "err.invalid_symlinks": "Política de enlaces simbólicos no válida: {policy}",
         "err.negative_value": "El valor no puede ser negativo",
         "err.conversion_failed": "Error al convertir {value}{unit}: {error}",
         "err.unsupported_unit": "Conversión no implementada: {unit}",
@@ -154,6 +183,16 @@ _TRANSLATIONS = {
         "ui.mode.stretch": "Stretch",
         "ui.mode.fill": "Fill",
         "ui.mode.crop": "Crop",
+        "ui.label.downscale": "Downscale:",
+        "ui.downscale.exact": "Exact",
+        "ui.downscale.high": "High quality",
+        "ui.downscale.fast": "Fast",
+        "ui.label.encoder": "Encoding:",
+        "ui.encoder.fastest": "Fastest",
+        "ui.encoder.balanced": "Balanced",
+        "ui.encoder.smallest": "Smallest",
+        "ui.label.output_format": "Format:",
+        "ui.output_format.keep": "Keep original",
         "err.empty_dpi": "DPI cannot be empty",
         "err.invalid_dpi": "DPI must be greater than zero",
         "err.invalid_dpi_type": "DPI must be numeric",
@@ -170,7 +209,26 @@ _TRANSLATIONS = {
         "err.invalid_input_dir": "Invalid input directory: {path}",
         "err.file_not_found": "File does not exist: {path}",
         "err.unsupported_format": "Unsupported format: {ext}",
+        "err.not_an_image": "File is not a recognized image: {path}",
         "err.invalid_dimensions": "Dimensions must be greater than zero",
+        "err.invalid_reducing_gap": "reducing_gap must be None or at least 1.0: {value}",
+        "err.invalid_max_bytes": "max_bytes must be 0 (no limit) or positive: {value}",
+        "err.invalid_target_ssim": "target_ssim must be between 0 and 1: {value}",
+        "err.max_bytes_unreachable": "Could not get below {max_bytes} bytes (smallest result: {size} bytes)",
+        "err.invalid_passthrough": "Invalid pass-through mode: {mode}",
+        "err.invalid_backend": "Invalid execution backend: {backend}",
+        "err.invalid_pipeline": "Pipeline concurrency and queue sizes must be greater than zero",
+        "err.invalid_dedup": "Invalid deduplication mode: {mode}",
+        "err.job_not_found": "Batch journal not found: {job}",
+        "err.job_settings_changed": "Processor settings changed since batch {job} started: {settings}",
+        "err.invalid_schedule": "Invalid scheduling policy: {schedule}",
+        "err.ordered_schedule": "ordered=True requires the fifo schedule, not {schedule}",
+        "err.invalid_encoder_profile": "Invalid encoder profile: {profile}",
+        "err.invalid_output_format": "Invalid or unavailable output format: {format}",
+        "err.invalid_encoder_option": "Invalid encoder option: {option}",
+        "err.invalid_timeout": "The per-file time limit cannot be negative",
+        "err.file_timeout": "The file exceeded the {seconds} s time limit",
+        "err.invalid_symlinks": "Invalid symbolic link policy: {policy}",
         "err.negative_value": "Value cannot be negative",
         "err.conversion_failed": "Error converting {value}{unit}: {error}",
         "err.unsupported_unit": "Conversion not implemented: {unit}",
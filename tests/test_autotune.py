@@ -0,0 +1,125 @@
+"""Tests del autoajuste del numero de workers."""
+
+import sys
+import os
+import json
+import unittest
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PIL import Image
+
+from src.core import batch_handler
+from src.core.autotune import TuningStore, WorkerTuner, machine_id, size_class, storage_class
+from src.core.batch_handler import BatchHandler
+from src.core.image_processor import ImageProcessor, ResizeMode
+from src.core.probe import ImageInfo
+
+
+class FakeClock:
+    """Reloj manual para simular el rendimiento de cada nivel de concurrencia."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def simulate(tuner: WorkerTuner, clock: FakeClock, throughput, max_files: int = 10000) -> int:
+    """Alimenta el ajuste con archivos que tardan segun throughput(limite)."""
+    for _ in range(max_files):
+        if tuner.finished:
+            break
+        clock.now += 1.0 / throughput(tuner.limit)
+        tuner.record()
+    return tuner.limit
+
+
+class TestWorkerTuner(unittest.TestCase):
+    """Pruebas de la escalada y de la persistencia del ajuste."""
+
+    def test_converges_to_peak(self):
+        """Verifica que la escalada encuentre el maximo de una curva de rendimiento."""
+        def curve(limit):
+            return limit if limit <= 12 else max(12 - (limit - 12) * 0.8, 0.5)
+
+        finished = []
+        for start in (2, 5, 17, 30):
+            clock = FakeClock()
+            tuner = WorkerTuner(start, 32, on_finish=lambda n, rate: finished.append((n, rate)), clock=clock)
+            limit = simulate(tuner, clock, curve)
+            self.assertTrue(tuner.finished)
+            self.assertLessEqual(abs(limit - 12), 2, f"start={start} limit={limit}")
+        self.assertEqual(len(finished), 4)
+
+    def test_respects_maximum(self):
+        """Verifica que el limite nunca supere el maximo ni baje de 1."""
+        clock = FakeClock()
+        tuner = WorkerTuner(3, 4, clock=clock)
+        seen = set()
+        for _ in range(500):
+            clock.now += 1.0 / tuner.limit
+            seen.add(tuner.limit)
+            tuner.record()
+        self.assertTrue(tuner.finished)
+        self.assertEqual(tuner.limit, 4)
+        self.assertTrue(all(1 <= n <= 4 for n in seen))
+
+    def test_store_roundtrip(self):
+        """Verifica el guardado por clave y la tolerancia a un archivo corrupto."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = Path(tmpdir) / "cache" / "tuning.json"
+            store = TuningStore(path)
+            self.assertIsNone(store.load("a"))
+            store.save("a", 6, 10.0)
+            store.save("b", 3, 4.0)
+            self.assertEqual(TuningStore(path).load("a"), 6)
+            self.assertEqual(json.loads(path.read_text())["b"]["workers"], 3)
+
+            path.write_text("{no es json")
+            self.assertIsNone(TuningStore(path).load("a"))
+            self.assertIsNone(TuningStore(None).load("a"))
+
+    def test_size_class(self):
+        """Verifica la clasificacion por mediana de pixeles."""
+        def info(w, h):
+            return ImageInfo(Path("x"), w, h, 1, "JPEG", "RGB", None, 0, 0)
+
+        self.assertEqual(size_class([info(640, 480), info(800, 600), None]), "small")
+        self.assertEqual(size_class([info(6000, 4000), info(4000, 3000), info(640, 480)]), "large")
+        self.assertEqual(size_class([]), "small")
+
+    def test_batch_autotune(self):
+        """Verifica que un lote con max_workers=0 se procese completo y reutilice el valor guardado."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            tmp = Path(tmpdir)
+            files = []
+            for i in range(12):
+                path = tmp / f"img_{i}.png"
+                Image.new("RGB", (120, 90), (i * 10, 0, 0)).save(path, "PNG")
+                files.append(path)
+
+            tuning_path = tmp / "tuning.json"
+            with BatchHandler(ImageProcessor(), max_workers=0, tuning_path=tuning_path) as handler:
+                results = handler.process_batch(files, tmp / "out", 60, 60, "px", "px", ResizeMode.FIT)
+            self.assertEqual(len(results), 12)
+            self.assertTrue(all(r.success for r in results))
+
+            # Con un valor guardado para la maquina y la clase de carga no se vuelve a calibrar
+            key = "|".join((machine_id(), "threads", "small", storage_class(tmp)))
+            TuningStore(tuning_path).save(key, 2, 1.0)
+            original_tuner = batch_handler.WorkerTuner
+            batch_handler.WorkerTuner = None
+            try:
+                with BatchHandler(ImageProcessor(), max_workers=0, tuning_path=tuning_path) as handler:
+                    results = handler.process_batch(files, tmp / "out", 60, 60, "px", "px", ResizeMode.FIT)
+            finally:
+                batch_handler.WorkerTuner = original_tuner
+            self.assertTrue(all(r.success for r in results))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -382,6 +382,117 @@ def test_optimal_workers():
         print(f"\n  Workers optimos: {best_workers}")
 
 
+def test_backend_comparison():
+    """Compara los backends de hilos y procesos (pensado para equipos de 16+ nucleos)."""
+    print("\n" + "=" * 70)
+    print("TEST: Backend de hilos vs procesos")
+    print("=" * 70)
+
+    cpu_count = os.cpu_count() or 1
+    print(f"  CPUs disponibles: {cpu_count}")
+    if cpu_count < 16:
+        print("  Aviso: con menos de 16 nucleos la diferencia entre backends es menor")
+
+    img_count = max(64, cpu_count * 8)
+    workers = min(cpu_count, 32)
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        tmppath = Path(tmpdir)
+        input_dir = tmppath / "input"
+        input_dir.mkdir()
+
+        create_test_images(input_dir, img_count, (800, 3840))
+        files = list(input_dir.glob("*.jpg"))
+
+        for backend in ("threads", "processes"):
+            output_dir = tmppath / f"output_{backend}"
+            processor = ImageProcessor(dpi=300)
+            with BatchHandler(processor=processor, max_workers=workers, backend=backend) as handler:
+                start = time.perf_counter()
+                results = handler.process_batch(
+                    input_files=files,
+                    output_dir=output_dir,
+                    width=800,
+                    height=600,
+                    width_unit="px",
+                    height_unit="px",
+                    mode=ResizeMode.FIT,
+                )
+                elapsed = time.perf_counter() - start
+
+            success_count = sum(1 for r in results if r.success)
+            throughput = img_count / elapsed if elapsed > 0 else 0
+            print(f"  {backend} ({workers} workers): {elapsed:.2f}s ({throughput:.1f} img/s) - OK: {success_count}/{img_count}")
+
+
+def test_schedule_makespan():
+    """Compara el tiempo total de cada politica con tamanos muy desiguales y las grandes al final."""
+    print("\n" + "=" * 70)
+    print("TEST: Planificacion fifo vs largest_first vs smallest_first")
+    print("=" * 70)
+
+    workers = max(2, min(os.cpu_count() or 1, 8))
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        tmppath = Path(tmpdir)
+        input_dir = tmppath / "input"
+        input_dir.mkdir()
+
+        # Distribucion sesgada: muchas pequenas y unas pocas panoramicas al final de la lista
+        files = []
+        for i in range(workers * 12):
+            filepath = input_dir / f"small_{i:04d}.jpg"
+            Image.new("RGB", (800, 600), (i % 256, 80, 120)).save(filepath, "JPEG", quality=85)
+            files.append(filepath)
+        # Una panoramica mas que workers: con fifo la ultima se procesa sola
+        for i in range(workers + 1):
+            filepath = input_dir / f"zz_panorama_{i:02d}.png"
+            Image.effect_noise((6000, 3000), 40).convert("RGB").save(filepath, "PNG")
+            files.append(filepath)
+
+        for schedule in ("fifo", "largest_first", "smallest_first"):
+            handler = BatchHandler(
+                processor=ImageProcessor(dpi=300), max_workers=workers, schedule=schedule, tuning_path=None
+            )
+            start = time.perf_counter()
+            first_result = None
+            for result in handler.iter_batch(files, tmppath / f"output_{schedule}", 800, 600, "px", "px", ResizeMode.FIT):
+                if first_result is None:
+                    first_result = time.perf_counter() - start
+            elapsed = time.perf_counter() - start
+            print(f"  {schedule:15s}: total {elapsed:.2f}s, primer resultado {first_result:.3f}s ({workers} workers)")
+
+
+def test_encoder_profiles():
+    """Compara tiempo y tamano de salida de cada perfil del codificador con PNG y JPEG."""
+    print("\n" + "=" * 70)
+    print("TEST: Perfiles del codificador fastest vs balanced vs smallest")
+    print("=" * 70)
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        tmppath = Path(tmpdir)
+        input_dir = tmppath / "input"
+        input_dir.mkdir()
+
+        files = []
+        for i in range(8):
+            filepath = input_dir / f"scan_{i:02d}.png"
+            Image.effect_noise((2400, 1800), 20 + i).convert("RGB").save(filepath, "PNG", compress_level=1)
+            files.append(filepath)
+        create_test_images(input_dir, 8, (2400, 1800))
+        files.extend(sorted(input_dir.glob("*.jpg")))
+
+        for profile in ("fastest", "balanced", "smallest"):
+            output_dir = tmppath / f"output_{profile}"
+            handler = BatchHandler(processor=ImageProcessor(dpi=300, encoder_profile=profile), max_workers=2)
+            start = time.perf_counter()
+            results = handler.process_batch(files, output_dir, 1200, 900, "px", "px", ResizeMode.FIT)
+            elapsed = time.perf_counter() - start
+            total_bytes = sum(r.output_path.stat().st_size for r in results if r.success)
+            encode = sum(r.timings.get("encode", 0.0) for r in results)
+            print(f"  {profile:9s}: total {elapsed:.2f}s, codificacion {encode:.2f}s, salida {total_bytes / 1024:.0f} KB")
+
+
 if __name__ == "__main__":
     print("=" * 70)
     print("SUITE DE TESTS DE RENDIMIENTO")
@@ -391,6 +502,9 @@ if __name__ == "__main__":
     test_different_modes()
     test_different_presets()
     test_optimal_workers()
+    test_backend_comparison()
+    test_schedule_makespan()
+    test_encoder_profiles()
     test_memory_usage()
     test_error_handling()
     
@@ -11,7 +11,25 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from PIL import Image, ImageChops
 from src.core.image_processor import ImageProcessor, ResizeMode
 from src.core.batch_handler import BatchHandler
-from src.utils import ProcessingError
+from src.utils import ProcessingError, ValidationError
+
+
+class _HangingProcessor(ImageProcessor):
+    """Procesador que se cuelga con los archivos marcados, para probar el tiempo limite."""
+
+    def render(self, input_path, *args, **kwargs):
+        if "hang" in input_path.name:
+            time.sleep(2.0)
+        return super().render(input_path, *args, **kwargs)
+
+
+class _HangingEncoder(ImageProcessor):
+    """Procesador que se cuelga al codificar los archivos marcados."""
+
+    def encode(self, rendered, output_path, *args, **kwargs):
+        if "hang" in output_path.name:
+            time.sleep(2.0)
+        return super().encode(rendered, output_path, *args, **kwargs)
 
 
 class TestCoreResilience(unittest.TestCase):
@@ -27,6 +45,8 @@ class TestCoreResilience(unittest.TestCase):
         self.handler = BatchHandler(processor=self.processor, max_workers=1)
 
     def tearDown(self):
+        # Los manejadores conservan su pool entre lotes hasta close()
+        self.handler.close()
         self.temp_dir.cleanup()
 
     def _create_test_image(self, filename="test.jpg", color=(255, 0, 0), exif=b"fake_exif", icc=b"fake_icc"):
@@ -211,6 +231,722 @@ class TestCoreResilience(unittest.TestCase):
             out_exif_dict = piexif.load(img_out.info.get("exif"))
             self.assertEqual(out_exif_dict["0th"].get(piexif.ImageIFD.Make), b"TestCamera")
 
+    def test_batch_single_decode_with_header_size(self):
+        """Verifica que el lote decodifique una sola vez y tome el tamano original de la cabecera."""
+        from PIL import ImageFile
+
+        filepath = self.input_dir / "rotated.jpg"
+        exif = Image.Exif()
+        exif[0x0112] = 6
+        Image.new("RGB", (800, 600), (0, 0, 255)).save(filepath, "JPEG", exif=exif.tobytes())
+
+        loads = []
+        original_load = ImageFile.ImageFile.load
+
+        def counting_load(image):
+            if image.tile:
+                loads.append(image.size)
+            return original_load(image)
+
+        ImageFile.ImageFile.load = counting_load
+        try:
+            results = self.handler.process_batch(
+                input_files=[filepath],
+                output_dir=self.output_dir,
+                width=300,
+                height=300,
+                width_unit="px",
+                height_unit="px",
+                mode=ResizeMode.FIT,
+            )
+        finally:
+            ImageFile.ImageFile.load = original_load
+
+        res = results[0]
+        self.assertTrue(res.success)
+        self.assertEqual(res.original_size, (600, 800))
+        self.assertEqual(res.final_size, (225, 300))
+        self.assertEqual(len(loads), 1)
+        self.assertGreater(res.processing_time, 0)
+        self.assertIn("decode", res.timings)
+
+    def test_memory_budget_admission(self):
+        """Verifica que el lote respete el presupuesto de memoria y procese solas las imagenes grandes."""
+        from src.core.probe import ImageProbe
+
+        files = []
+        for i in range(8):
+            filepath = self.input_dir / f"small_{i}.png"
+            Image.new("RGB", (200, 200), (i * 20, 0, 0)).save(filepath, "PNG")
+            files.append(filepath)
+        large = self.input_dir / "large.png"
+        Image.new("RGB", (1200, 1200), (0, 255, 0)).save(large, "PNG")
+        files.insert(3, large)
+
+        processor = ImageProcessor()
+        budget = 1024 * 1024
+        with ImageProbe() as probe:
+            costs = {
+                path: processor.estimate_memory(info, 100, 100, "px", "px", ResizeMode.FIT)
+                for path, info in probe.probe(files).items()
+            }
+        self.assertGreater(costs[large], budget)
+
+        running = []
+        peaks = []
+        lock = threading.Lock()
+        original_resize = processor.resize
+
+        def tracking_resize(input_path, *args, **kwargs):
+            with lock:
+                running.append(input_path)
+                peaks.append(list(running))
+            try:
+                time.sleep(0.05)
+                return original_resize(input_path, *args, **kwargs)
+            finally:
+                with lock:
+                    running.remove(input_path)
+
+        processor.resize = tracking_resize
+        with BatchHandler(processor=processor, max_workers=8, memory_budget_mb=1) as handler:
+            results = handler.process_batch(
+                input_files=files,
+                output_dir=self.output_dir,
+                width=100,
+                height=100,
+                width_unit="px",
+                height_unit="px",
+                mode=ResizeMode.FIT,
+            )
+
+        self.assertTrue(all(r.success for r in results))
+        self.assertGreater(max(len(p) for p in peaks), 1)
+        for snapshot in peaks:
+            if large in snapshot:
+                self.assertEqual(snapshot, [large])
+            else:
+                self.assertLessEqual(sum(costs[p] for p in snapshot), budget)
+
+    def test_bounded_submission_window(self):
+        """Verifica que el pool nunca tenga mas de unos pocos trabajos por worker y que cancelar deje de enviar."""
+        from src.core import batch_handler
+
+        files = []
+        for i in range(60):
+            filepath = self.input_dir / f"tiny_{i}.png"
+            Image.new("RGB", (32, 32), (i, 0, 0)).save(filepath, "PNG")
+            files.append(filepath)
+
+        completed = 0
+        submitted = 0
+        outstanding = []
+
+        class CountingExecutor(batch_handler.ThreadPoolExecutor):
+            def submit(self, *args, **kwargs):
+                nonlocal submitted
+                submitted += 1
+                outstanding.append(submitted - completed)
+                return super().submit(*args, **kwargs)
+
+        def on_progress(current, total, name):
+            nonlocal completed
+            completed = current
+
+        original_executor = batch_handler.ThreadPoolExecutor
+        batch_handler.ThreadPoolExecutor = CountingExecutor
+        try:
+            with BatchHandler(processor=self.processor, max_workers=2, progress_callback=on_progress) as handler:
+                results = handler.process_batch(files, self.output_dir, 16, 16, "px", "px", ResizeMode.FIT)
+            self.assertTrue(all(r.success for r in results))
+            self.assertEqual(submitted, 60)
+            self.assertLessEqual(max(outstanding), 4)
+
+            submitted = 0
+
+            def cancel_early(current, total, name):
+                nonlocal completed
+                completed = current
+                if current == 3:
+                    handler.cancel()
+
+            with BatchHandler(processor=self.processor, max_workers=2, progress_callback=cancel_early) as handler:
+                results = handler.process_batch(files, self.output_dir, 16, 16, "px", "px", ResizeMode.FIT)
+        finally:
+            batch_handler.ThreadPoolExecutor = original_executor
+
+        self.assertEqual(len(results), 60)
+        self.assertLessEqual(submitted, 3 + 4)
+        self.assertGreaterEqual(sum(1 for r in results if not r.success), 60 - 7)
+
+    def test_iter_batch_streaming(self):
+        """Verifica que iter_batch entregue resultados incrementales, en orden si se pide, y cancele al abandonarse."""
+        files = []
+        for i in range(12):
+            filepath = self.input_dir / f"stream_{i:02d}.png"
+            Image.new("RGB", (40, 40), (i, 0, 0)).save(filepath, "PNG")
+            files.append(filepath)
+
+        original_resize = self.processor.resize
+        started = []
+
+        def uneven_resize(input_path, *args, **kwargs):
+            started.append(input_path)
+            # Los archivos pares tardan mas, para que terminen fuera de orden
+            time.sleep(0.04 if int(input_path.stem[-2:]) % 2 == 0 else 0.0)
+            return original_resize(input_path, *args, **kwargs)
+
+        self.processor.resize = uneven_resize
+        handler = BatchHandler(processor=self.processor, max_workers=3)
+        self.addCleanup(handler.close)
+
+        unordered = [r.input_path for r in handler.iter_batch(files, self.output_dir, 20, 20, "px", "px", ResizeMode.FIT)]
+        self.assertEqual(sorted(unordered), files)
+        self.assertNotEqual(unordered, files)
+
+        ordered = [
+            r.input_path
+            for r in handler.iter_batch(files, self.output_dir, 20, 20, "px", "px", ResizeMode.FIT, ordered=True)
+        ]
+        self.assertEqual(ordered, files)
+
+        # Con el primer archivo lento, el buffer de ordered=True detiene los envios
+        many = [self.input_dir / f"many_{i:02d}.png" for i in range(40)]
+        for filepath in many:
+            Image.new("RGB", (20, 20)).save(filepath, "PNG")
+        started_before_first = []
+
+        def slow_first(input_path, *args, **kwargs):
+            started.append(input_path)
+            if input_path == many[0]:
+                time.sleep(0.3)
+                started_before_first.append(len(started))
+            return original_resize(input_path, *args, **kwargs)
+
+        self.processor.resize = slow_first
+        started.clear()
+        ordered = [
+            r.input_path
+            for r in handler.iter_batch(many, self.output_dir, 10, 10, "px", "px", ResizeMode.FIT, ordered=True)
+        ]
+        self.assertEqual(ordered, many)
+        self.assertLess(started_before_first[0], 20)
+        self.processor.resize = uneven_resize
+
+        with self.assertRaises(ValidationError) as context:
+            next(BatchHandler(processor=self.processor, schedule="largest_first").iter_batch(
+                files, self.output_dir, 20, 20, "px", "px", ResizeMode.FIT, ordered=True
+            ))
+        self.assertEqual(context.exception.code, "ORDERED_SCHEDULE")
+
+        started.clear()
+        stream = handler.iter_batch(iter(files), self.output_dir, 20, 20, "px", "px", ResizeMode.FIT)
+        first = next(stream)
+        self.assertTrue(first.success)
+        stream.close()
+        self.assertLess(len(started), len(files))
+
+    def test_pipeline_matches_direct_processing(self):
+        """Verifica que el pipeline por etapas produzca los mismos archivos y solape lecturas lentas."""
+        from src.core import batch_handler
+        from src.core.batch_handler import PipelineConfig
+
+        files = []
+        for i in range(12):
+            filepath = self.input_dir / f"pipe_{i:02d}.jpg"
+            Image.effect_noise((160, 120), 40).convert("RGB").save(filepath, "JPEG")
+            files.append(filepath)
+
+        with BatchHandler(processor=self.processor, max_workers=2) as direct:
+            direct_results = direct.process_batch(files, self.output_dir / "direct", 80, 80, "px", "px", ResizeMode.FIT)
+
+        original_read = batch_handler._read_file
+
+        def slow_read(file_path):
+            # Simula una unidad de red
+            time.sleep(0.1)
+            return original_read(file_path)
+
+        batch_handler._read_file = slow_read
+        try:
+            piped = BatchHandler(
+                processor=self.processor,
+                max_workers=1,
+                pipeline=PipelineConfig(read_workers=6, read_queue=12, write_workers=2, write_queue=4),
+            )
+            self.addCleanup(piped.close)
+            start = time.perf_counter()
+            piped_results = piped.process_batch(files, self.output_dir / "piped", 80, 80, "px", "px", ResizeMode.FIT)
+            elapsed = time.perf_counter() - start
+        finally:
+            batch_handler._read_file = original_read
+
+        self.assertLess(elapsed, 0.1 * len(files) * 0.7)
+        for a, b in zip(direct_results, piped_results):
+            self.assertTrue(b.success, b.error_message)
+            self.assertEqual(a.final_size, b.final_size)
+            self.assertEqual(a.output_path.read_bytes(), b.output_path.read_bytes())
+            self.assertIn("read", b.timings)
+            self.assertIn("write", b.timings)
+
+        missing = self.input_dir / "missing.jpg"
+        results = piped.process_batch([missing], self.output_dir / "piped", 80, 80, "px", "px", ResizeMode.FIT)
+        self.assertIn("FILE_NOT_FOUND", results[0].error_message)
+
+        with self.assertRaises(ValidationError) as context:
+            BatchHandler(processor=self.processor, pipeline=PipelineConfig(read_queue=0))
+        self.assertEqual(context.exception.code, "INVALID_PIPELINE")
+
+    def test_process_backend(self):
+        """Verifica que el backend de procesos, con y sin pipeline, produzca los mismos resultados que el de hilos."""
+        from src.core.batch_handler import PipelineConfig
+
+        files = [self._create_test_image(f"proc_{i}.jpg", color=(0, i * 40, 0)) for i in range(4)]
+
+        outputs = {}
+        for backend, pipeline in (("threads", None), ("processes", None), ("processes", PipelineConfig())):
+            with BatchHandler(processor=ImageProcessor(), max_workers=2, backend=backend, pipeline=pipeline) as handler:
+                results = handler.process_batch(
+                    input_files=files,
+                    output_dir=self.output_dir / f"{backend}_{pipeline is not None}",
+                    width=50,
+                    height=50,
+                    width_unit="px",
+                    height_unit="px",
+                    mode=ResizeMode.FIT,
+                )
+            self.assertTrue(all(r.success for r in results))
+            outputs[(backend, pipeline)] = [(r.input_path, r.original_size, r.final_size) for r in results]
+            self.assertIn("encode", results[0].timings)
+
+        self.assertEqual(len(set(map(tuple, outputs.values()))), 1)
+
+        with self.assertRaises(ValidationError) as context:
+            BatchHandler(processor=ImageProcessor(), backend="gpu")
+        self.assertEqual(context.exception.code, "INVALID_BACKEND")
+
+    def test_incremental_skips_unchanged(self):
+        """Verifica que el modo incremental omita salidas vigentes y repita las que cambiaron."""
+        files = [self._create_test_image(f"inc_{i}.jpg", color=(i * 60, 0, 0)) for i in range(3)]
+        handler = BatchHandler(processor=self.processor, max_workers=2)
+        self.addCleanup(handler.close)
+
+        def run(batch=handler, width=50, **kwargs):
+            results = batch.process_batch(
+                files, self.output_dir, width, 50, "px", "px", ResizeMode.FIT, incremental=True, **kwargs
+            )
+            self.assertTrue(all(r.success for r in results))
+            return [r.skipped for r in results]
+
+        self.assertEqual(run(), [False, False, False])
+        first = self.output_dir / "inc_0_resized.jpg"
+        self.assertEqual(run(), [True, True, True])
+        results = handler.process_batch(files, self.output_dir, 50, 50, "px", "px", ResizeMode.FIT, incremental=True)
+        self.assertEqual(results[0].output_path, first)
+        self.assertEqual(results[0].final_size, (50, 37))
+
+        # Entrada modificada, salida borrada y parametros distintos
+        stat = files[1].stat()
+        os.utime(files[1], ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+        (self.output_dir / "inc_2_resized.jpg").unlink()
+        self.assertEqual(run(), [True, False, False])
+        self.assertEqual(run(width=60), [False, False, False])
+        with BatchHandler(processor=ImageProcessor(dpi=300, quality=80), max_workers=2) as other:
+            self.assertEqual(run(other, width=60), [False, False, False])
+
+        # Con hash, una entrada tocada sin cambios de contenido no se repite
+        self.assertEqual(run(width=70, hash_inputs=True), [False, False, False])
+        stat = files[0].stat()
+        os.utime(files[0], ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+        self.assertEqual(run(width=70, hash_inputs=True), [True, True, True])
+        self.assertEqual(run(width=70), [False, True, True])
+
+    def test_dedup_identical_inputs(self):
+        """Verifica que cada contenido repetido se procese una vez y sus copias se enlacen o copien."""
+        import shutil
+
+        original = self.input_dir / "dup_a.bmp"
+        Image.new("RGB", (60, 40), (10, 20, 30)).save(original, "BMP")
+        copies = [self.input_dir / f"dup_{name}.bmp" for name in ("b", "c")]
+        for copy in copies:
+            shutil.copyfile(original, copy)
+        # Mismo tamano en bytes, distinto contenido
+        other = self.input_dir / "dup_d.bmp"
+        Image.new("RGB", (60, 40), (200, 20, 30)).save(other, "BMP")
+        files = [original, *copies, other]
+
+        original_resize = self.processor.resize
+        rendered = []
+
+        def counting_resize(input_path, *args, **kwargs):
+            rendered.append(input_path)
+            return original_resize(input_path, *args, **kwargs)
+
+        self.processor.resize = counting_resize
+        for mode in ("hardlink", "copy"):
+            rendered.clear()
+            output_dir = self.output_dir / mode
+            with BatchHandler(processor=self.processor, max_workers=2, dedup=mode) as handler:
+                results = handler.process_batch(files, output_dir, 30, 30, "px", "px", ResizeMode.FIT)
+
+            self.assertEqual(sorted(rendered), [original, other])
+            self.assertTrue(all(r.success for r in results))
+            self.assertEqual([r.duplicate_of for r in results], [None, original, original, None])
+            first = results[0].output_path
+            for result in results[1:3]:
+                self.assertEqual(result.final_size, results[0].final_size)
+                self.assertEqual(result.output_path.read_bytes(), first.read_bytes())
+                self.assertEqual(result.output_path.samefile(first), mode == "hardlink")
+            self.assertNotEqual(results[3].output_path.read_bytes(), first.read_bytes())
+        del self.processor.resize
+
+        # Con hash_inputs cada entrada se hashea una sola vez, fuera del hilo que recibe los resultados
+        from src.core import dedup, manifest
+
+        hashed = []
+        original_digest = manifest.file_digest
+
+        def counting_digest(path):
+            hashed.append((path, threading.current_thread() is threading.main_thread()))
+            return original_digest(path)
+
+        manifest.file_digest = dedup.file_digest = counting_digest
+        try:
+            with BatchHandler(processor=self.processor, max_workers=2, dedup="copy") as handler:
+                results = handler.process_batch(
+                    files, self.output_dir / "hashed", 30, 30, "px", "px", ResizeMode.FIT,
+                    incremental=True, hash_inputs=True,
+                )
+        finally:
+            manifest.file_digest = dedup.file_digest = original_digest
+        self.assertTrue(all(r.success for r in results))
+        self.assertEqual(sorted(path for path, _ in hashed), sorted(files))
+        self.assertFalse(any(on_main for _, on_main in hashed))
+
+        with self.assertRaises(ValidationError) as context:
+            BatchHandler(processor=self.processor, dedup="symlink")
+        self.assertEqual(context.exception.code, "INVALID_DEDUP")
+
+    def test_resume_from_journal(self):
+        """Verifica que un lote interrumpido se reanude desde su diario y que se puedan repetir los fallidos."""
+        from src.core.journal import BatchJournal
+
+        files = [self._create_test_image(f"job_{i}.jpg", color=(0, 0, i * 30)) for i in range(8)]
+        broken = self.input_dir / "job_broken.jpg"
+        broken.write_bytes(b"not an image")
+        files.insert(4, broken)
+
+        jobs_dir = Path(self.temp_dir.name) / "jobs"
+        handler = BatchHandler(processor=self.processor, max_workers=1, jobs_dir=jobs_dir)
+        self.addCleanup(handler.close)
+        stream = handler.iter_batch(
+            files, self.output_dir, 40, 40, "px", "px", ResizeMode.FIT, ordered=True, job_id="nightly"
+        )
+        first = [next(stream) for _ in range(3)]
+        stream.close()
+
+        journal_path = jobs_dir / "nightly.jsonl"
+        # Linea cortada como la que deja una caida durante la escritura
+        with open(journal_path, "a", encoding="utf-8") as f:
+            f.write('{"type":"done","pa')
+        state = BatchJournal.load(journal_path)
+        self.assertEqual(state.inputs, files)
+        self.assertTrue(all(state.done[r.input_path] for r in first))
+        self.assertLess(len(state.done), len(files))
+
+        results = handler.resume("nightly")
+        self.assertEqual(sorted(r.input_path for r in results), sorted(state.remaining))
+        state = BatchJournal.load(journal_path)
+        self.assertEqual(state.remaining, [])
+        self.assertEqual(state.failed, [broken])
+        self.assertTrue(all((self.output_dir / f"job_{i}_resized.jpg").exists() for i in range(8)))
+
+        Image.new("RGB", (80, 60)).save(broken, "JPEG")
+        results = handler.resume("nightly", only_failed=True)
+        self.assertEqual([(r.input_path, r.success, r.final_size) for r in results], [(broken, True, (40, 30))])
+        self.assertEqual(BatchJournal.load(journal_path).failed, [])
+
+        with self.assertRaises(ValidationError) as context:
+            handler.resume("missing")
+        self.assertEqual(context.exception.code, "JOB_NOT_FOUND")
+
+        # Otro procesador daria salidas distintas dentro del mismo trabajo
+        with BatchHandler(processor=ImageProcessor(dpi=300, quality=70), max_workers=1, jobs_dir=jobs_dir) as other:
+            with self.assertRaises(ValidationError) as context:
+                other.resume("nightly", only_failed=True)
+        self.assertEqual(context.exception.code, "JOB_SETTINGS_CHANGED")
+        self.assertIn("quality", str(context.exception))
+
+    def test_resume_keeps_batch_options(self):
+        """Verifica que un lote reanudado conserve el formato de salida y el perfil del codificador del original."""
+        from src.core.journal import BatchJournal
+
+        files = []
+        for i in range(4):
+            filepath = self.input_dir / f"fmt_{i}.png"
+            Image.new("RGB", (200, 100), (i * 50, 0, 0)).save(filepath, "PNG")
+            files.append(filepath)
+
+        handler = BatchHandler(processor=self.processor, max_workers=1, jobs_dir=Path(self.temp_dir.name) / "jobs")
+        self.addCleanup(handler.close)
+        # El perfil del procesador cuenta aunque el lote no lo sustituya
+        self.processor.encoder_profile = "smallest"
+        stream = handler.iter_batch(
+            files, self.output_dir, 40, 40, "px", "px", ResizeMode.FIT, ordered=True, job_id="webp_job",
+            output_format="WEBP",
+        )
+        next(stream)
+        stream.close()
+        # Al cancelar puede haber terminado algun archivo mas que el primero
+        remaining = BatchJournal.load(Path(self.temp_dir.name) / "jobs" / "webp_job.jsonl").remaining
+        self.assertTrue(remaining)
+
+        self.processor.encoder_profile = "fastest"
+        profiles = []
+        original_encode = self.processor.encode
+
+        def tracking_encode(rendered, output_path, encoder_profile=None):
+            profiles.append(encoder_profile)
+            return original_encode(rendered, output_path, encoder_profile)
+
+        self.processor.encode = tracking_encode
+        try:
+            results = handler.resume("webp_job")
+        finally:
+            del self.processor.encode
+        self.assertEqual(profiles, ["smallest"] * len(remaining))
+        self.assertEqual(sorted(r.input_path for r in results), sorted(remaining))
+        for result in results:
+            self.assertTrue(result.success)
+            self.assertEqual(result.output_path.suffix, ".webp")
+            with Image.open(result.output_path) as img:
+                self.assertEqual(img.format, "WEBP")
+        self.assertEqual(list(self.output_dir.glob("*.png")), [])
+
+    def test_schedule_policies(self):
+        """Verifica el orden de procesamiento de cada politica de planificacion."""
+        sizes = [(40, 30), (400, 300), (100, 80), (400, 300), (20, 20)]
+        files = []
+        for i, size in enumerate(sizes):
+            filepath = self.input_dir / f"sched_{i}.png"
+            Image.new("RGB", size, (i, 0, 0)).save(filepath, "PNG")
+            files.append(filepath)
+
+        original_resize = self.processor.resize
+        started = []
+
+        def recording_resize(input_path, *args, **kwargs):
+            started.append(input_path)
+            return original_resize(input_path, *args, **kwargs)
+
+        self.processor.resize = recording_resize
+        expected = {
+            "fifo": [0, 1, 2, 3, 4],
+            "largest_first": [1, 3, 2, 0, 4],
+            "smallest_first": [4, 0, 2, 1, 3],
+        }
+        for schedule, order in expected.items():
+            started.clear()
+            with BatchHandler(processor=self.processor, max_workers=1, schedule=schedule) as handler:
+                results = handler.process_batch(files, self.output_dir, 10, 10, "px", "px", ResizeMode.FIT)
+            self.assertTrue(all(r.success for r in results))
+            self.assertEqual(started, [files[i] for i in order], schedule)
+
+        with self.assertRaises(ValidationError) as context:
+            BatchHandler(processor=self.processor, schedule="random")
+        self.assertEqual(context.exception.code, "INVALID_SCHEDULE")
+
+    def test_async_api(self):
+        """Verifica aiter_batch/process_batch_async, la cancelacion de tareas y el limite de hilos con muchos lotes."""
+        import asyncio
+        from concurrent.futures import ThreadPoolExecutor
+        from src.core.batch_handler import BatchProgress, ProcessingResult
+        from src.utils import DEFAULT_ASYNC_BATCHES
+
+        files = []
+        for i in range(10):
+            filepath = self.input_dir / f"async_{i}.png"
+            Image.new("RGB", (60, 40), (i, 0, 0)).save(filepath, "PNG")
+            files.append(filepath)
+
+        original_resize = self.processor.resize
+        started = []
+
+        def slow_resize(input_path, *args, **kwargs):
+            started.append(input_path)
+            time.sleep(0.02)
+            return original_resize(input_path, *args, **kwargs)
+
+        self.processor.resize = slow_resize
+
+        async def stream_all():
+            with BatchHandler(processor=self.processor, max_workers=2) as handler:
+                return [r async for r in handler.aiter_batch(files, self.output_dir, 30, 30, "px", "px", ResizeMode.FIT, ordered=True)]
+
+        results = asyncio.run(stream_all())
+        self.assertEqual([r.input_path for r in results], files)
+        self.assertTrue(all(r.success for r in results))
+
+        async def with_progress():
+            progress = []
+            loop_thread = threading.get_ident()
+            on_progress = lambda done, total, name: progress.append((done, total, threading.get_ident() == loop_thread))
+            with BatchHandler(processor=self.processor, max_workers=2) as handler:
+                await handler.process_batch_async(
+                    files, self.output_dir / "progress", 30, 30, "px", "px", ResizeMode.FIT, progress_callback=on_progress
+                )
+            return progress
+
+        progress = asyncio.run(with_progress())
+        self.assertEqual(progress, [(i + 1, len(files), True) for i in range(len(files))])
+
+        async def progress_stream():
+            with BatchHandler(processor=self.processor, max_workers=2) as handler:
+                return [
+                    item async for item in handler.aiter_batch(
+                        files, self.output_dir / "stream", 30, 30, "px", "px", ResizeMode.FIT, with_progress=True
+                    )
+                ]
+
+        # Cada resultado llega precedido de su avance, en el mismo flujo
+        items = asyncio.run(progress_stream())
+        self.assertEqual([type(item) for item in items], [BatchProgress, ProcessingResult] * len(files))
+        self.assertEqual([item.done for item in items[::2]], list(range(1, len(files) + 1)))
+        self.assertEqual([item.filename for item in items[::2]], [r.input_path.name for r in items[1::2]])
+
+        # Con un solo worker el archivo se procesa en el hilo que conduce el lote
+        threads = []
+
+        def named_resize(*args, **kwargs):
+            threads.append(threading.current_thread().name)
+            return slow_resize(*args, **kwargs)
+
+        async def own_pool():
+            with ThreadPoolExecutor(max_workers=1, thread_name_prefix="own-async") as pool:
+                with BatchHandler(processor=self.processor, max_workers=1, async_executor=pool) as handler:
+                    await handler.process_batch_async(files[:2], self.output_dir / "own", 30, 30, "px", "px", ResizeMode.FIT)
+
+        self.processor.resize = named_resize
+        asyncio.run(own_pool())
+        self.processor.resize = slow_resize
+        self.assertEqual(len(threads), 2)
+        self.assertTrue(all(name.startswith("own-async") for name in threads))
+
+        async def cancel_midway():
+            handler = BatchHandler(processor=self.processor, max_workers=1, schedule="largest_first")
+            self.addCleanup(handler.close)
+            received = []
+
+            async def consume():
+                async for result in handler.aiter_batch(files, self.output_dir / "cancel", 30, 30, "px", "px", ResizeMode.FIT):
+                    received.append(result)
+
+            task = asyncio.create_task(consume())
+            while not received:
+                await asyncio.sleep(0.005)
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+            return received
+
+        started.clear()
+        received = asyncio.run(cancel_midway())
+        self.assertGreaterEqual(len(received), 1)
+        self.assertLess(len(started), len(files))
+
+        async def many_batches():
+            baseline = threading.active_count()
+            peak = [baseline]
+
+            def track(*_):
+                peak[0] = max(peak[0], threading.active_count())
+
+            async def run_one(i):
+                # Cada manejador conserva su pool hasta close()
+                with BatchHandler(processor=self.processor, max_workers=2, progress_callback=track) as handler:
+                    return await handler.process_batch_async(
+                        files[:3], self.output_dir / f"many_{i}", 30, 30, "px", "px", ResizeMode.FIT
+                    )
+
+            batches = await asyncio.gather(*(run_one(i) for i in range(12)))
+            return batches, peak[0] - baseline
+
+        batches, extra_threads = asyncio.run(many_batches())
+        self.assertTrue(all(r.success for batch in batches for r in batch))
+        self.assertLessEqual(extra_threads, DEFAULT_ASYNC_BATCHES * 3)
+
+    def test_file_timeout(self):
+        """Verifica que un archivo colgado falle con TIMEOUT sin detener el resto del lote."""
+        files = [self._create_test_image(f"slow_{i}.jpg") for i in range(6)]
+        hanging = self._create_test_image("hang.jpg")
+        files.insert(2, hanging)
+
+        for backend in ("threads", "processes"):
+            output_dir = self.output_dir / backend
+            with BatchHandler(processor=_HangingProcessor(), max_workers=2, backend=backend, file_timeout=0.5) as handler:
+                start = time.perf_counter()
+                results = handler.process_batch(files, output_dir, 40, 40, "px", "px", ResizeMode.FIT)
+                elapsed = time.perf_counter() - start
+
+            by_path = {r.input_path: r for r in results}
+            self.assertEqual(len(results), len(files))
+            self.assertEqual(by_path[hanging].error_code, "TIMEOUT")
+            self.assertTrue(all(r.success for path, r in by_path.items() if path != hanging), backend)
+            self.assertLess(elapsed, 2.0 if backend == "threads" else 6.0)
+
+        # El hilo abandonado termina sin escribir su salida
+        time.sleep(2.0)
+        self.assertFalse((self.output_dir / "threads" / "hang_resized.jpg").exists())
+
+        # Tampoco si expira mientras codifica, ya renderizado
+        with BatchHandler(processor=_HangingEncoder(), max_workers=2, file_timeout=0.5) as handler:
+            results = handler.process_batch(files, self.output_dir / "encode", 40, 40, "px", "px", ResizeMode.FIT)
+        self.assertEqual({r.input_path: r for r in results}[hanging].error_code, "TIMEOUT")
+        time.sleep(2.0)
+        self.assertEqual(
+            [p.name for p in (self.output_dir / "encode").iterdir() if p.name.startswith(("hang", ".tmp_"))], []
+        )
+
+        results = self.handler.process_batch([self.input_dir / "missing.jpg"], self.output_dir, 40, 40, "px", "px", ResizeMode.FIT)
+        self.assertEqual(results[0].error_code, "FILE_NOT_FOUND")
+
+        with self.assertRaises(ValidationError) as context:
+            BatchHandler(processor=self.processor, file_timeout=-1)
+        self.assertEqual(context.exception.code, "INVALID_TIMEOUT")
+
+    def test_persistent_executor(self):
+        """Verifica que el pool se reutilice entre lotes, se renueve al cambiar la configuracion y se cierre."""
+        files = [self._create_test_image(f"warm_{i}.jpg", color=(i * 50, 90, 30)) for i in range(4)]
+        processor = ImageProcessor(dpi=300)
+        cancel_next = []
+
+        def progress(current, total, name):
+            if cancel_next:
+                handler.cancel()
+
+        with BatchHandler(
+            processor=processor, max_workers=2, backend="processes", warm_up=True, progress_callback=progress
+        ) as handler:
+            run = lambda name: handler.process_batch(files, self.output_dir / name, 60, 60, "px", "px", ResizeMode.FIT)
+            first = run("first")
+            pool = handler._executor
+            self.assertTrue(all(r.success for r in first))
+
+            cancel_next.append(True)
+            cancelled = run("cancelled")
+            self.assertTrue(any(r.error_code == "CANCELLED" for r in cancelled))
+            cancel_next.clear()
+            self.assertTrue(all(r.success for r in run("second")))
+            self.assertIs(handler._executor, pool)
+
+            # Los procesos tienen una copia del procesador: otra calidad exige otro pool
+            processor.quality = 20
+            third = run("third")
+            self.assertIsNot(handler._executor, pool)
+            self.assertLess(third[0].output_path.stat().st_size, first[0].output_path.stat().st_size)
+
+        self.assertIsNone(handler._executor)
+
     def test_directory_validation(self):
         """Verifica que la prueba estática de permisos de directorio funcione."""
         # Directorio valido
@@ -0,0 +1,338 @@
+"""Tests del codificador: perfiles, limites de tamano, calidad por SSIM, formatos y copias directas."""
+
+import io
+import sys
+import os
+import unittest
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PIL import Image, ImageDraw
+
+from src.core.batch_handler import BatchHandler
+from src.core.image_processor import ImageProcessor, ResizeMode
+from src.core.ssim import luma_plane, ssim
+from src.utils import ProcessingError, ValidationError
+
+
+class TestEncoding(unittest.TestCase):
+    """Pruebas de la codificacion de salida del procesador y de sus opciones por lote."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.input_dir = Path(self.temp_dir.name) / "input"
+        self.output_dir = Path(self.temp_dir.name) / "output"
+        self.input_dir.mkdir()
+        self.output_dir.mkdir()
+        self.processor = ImageProcessor(dpi=300)
+        self.handler = BatchHandler(processor=self.processor, max_workers=1)
+
+    def tearDown(self):
+        self.handler.close()
+        self.temp_dir.cleanup()
+
+    def _create_test_image(self, filename="test.jpg", color=(255, 0, 0)):
+        filepath = self.input_dir / filename
+        Image.new("RGB", (800, 600), color).save(filepath, "JPEG", exif=b"fake_exif", icc_profile=b"fake_icc")
+        return filepath
+
+    def test_encoder_profiles(self):
+        """Verifica los perfiles del codificador, los ajustes por formato y el perfil por lote."""
+        source = self.input_dir / "drawing.png"
+        img = Image.linear_gradient("L").resize((400, 300)).convert("RGB")
+        ImageDraw.Draw(img).ellipse((50, 50, 250, 200), fill=(200, 30, 60))
+        img.save(source, "PNG")
+
+        sizes = {}
+        for profile in ("fastest", "balanced", "smallest"):
+            out = self.output_dir / f"{profile}.png"
+            ImageProcessor(encoder_profile=profile).resize(source, out, 300, 300)
+            sizes[profile] = out.stat().st_size
+        self.assertGreater(sizes["fastest"], sizes["balanced"])
+        self.assertGreaterEqual(sizes["balanced"], sizes["smallest"])
+
+        processor = ImageProcessor(encoder_profile="smallest", encoder_options={"jpeg": {"progressive": False}})
+        self.assertEqual(processor.encoder_settings("JPEG"), {"optimize": True, "progressive": False})
+        self.assertEqual(processor.encoder_settings("PNG", "fastest"), {"optimize": False, "compress_level": 1})
+        processor.resize(source, self.output_dir / "plain.jpg", 300, 300)
+        with Image.open(self.output_dir / "plain.jpg") as img:
+            self.assertFalse(img.info.get("progressive"))
+
+        with self.assertRaises(ValidationError) as context:
+            ImageProcessor(encoder_profile="tiny")
+        self.assertEqual(context.exception.code, "INVALID_ENCODER_PROFILE")
+        with self.assertRaises(ValidationError) as context:
+            ImageProcessor(encoder_options={"PNG": {"quality": 10}})
+        self.assertEqual(context.exception.code, "INVALID_ENCODER_OPTION")
+
+        results = self.handler.process_batch(
+            [source], self.output_dir / "batch", 300, 300, "px", "px", ResizeMode.FIT, encoder_profile="fastest"
+        )
+        self.assertEqual(results[0].output_path.stat().st_size, sizes["fastest"])
+        with self.assertRaises(ValidationError) as context:
+            self.handler.process_batch([source], self.output_dir, 300, 300, "px", "px", ResizeMode.FIT, encoder_profile="x")
+        self.assertEqual(context.exception.code, "INVALID_ENCODER_PROFILE")
+
+    def test_max_bytes_quality_search(self):
+        """Verifica que max_bytes busque la calidad en memoria y escriba una sola vez el resultado."""
+        source = self.input_dir / "detail.png"
+        Image.effect_noise((600, 400), 40).convert("RGB").save(source, "PNG")
+        unlimited = self.output_dir / "unlimited.jpg"
+        ImageProcessor().resize(source, unlimited, 600, 400)
+        limit = unlimited.stat().st_size // 3
+
+        processor = ImageProcessor(quality=90, max_bytes=limit)
+        encodes = []
+        original_save = Image.Image.save
+
+        def counting_save(image, fp, *args, **kwargs):
+            encodes.append(kwargs.get("quality"))
+            return original_save(image, fp, *args, **kwargs)
+
+        Image.Image.save = counting_save
+        try:
+            for name in ("limited.jpg", "limited.webp"):
+                encodes.clear()
+                out = self.output_dir / name
+                processor.resize(source, out, 600, 400)
+                self.assertLessEqual(out.stat().st_size, limit)
+                self.assertGreater(out.stat().st_size, limit // 2)
+                self.assertLessEqual(len(encodes), 8)
+                # La busqueda parte de la calidad del procesador y no la supera
+                self.assertEqual(encodes[0], processor.quality)
+                self.assertLessEqual(max(encodes), processor.quality)
+
+            # Si cabe con la calidad configurada, se codifica una sola vez con ella
+            encodes.clear()
+            roomy = ImageProcessor(quality=90, max_bytes=limit * 10)
+            rendered = roomy.render(source, 600, 400)
+            roomy.encode(rendered, self.output_dir / "roomy.webp")
+            self.assertEqual(encodes, [90])
+            self.assertEqual(rendered.result.quality, 90)
+        finally:
+            Image.Image.save = original_save
+        self.assertEqual([p.name for p in self.output_dir.iterdir() if p.name.startswith(".tmp_")], [])
+
+        with self.assertRaises(ProcessingError) as context:
+            ImageProcessor(max_bytes=200).resize(source, self.output_dir / "tiny.jpg", 600, 400)
+        self.assertEqual(context.exception.code, "MAX_BYTES_EXCEEDED")
+        self.assertFalse((self.output_dir / "tiny.jpg").exists())
+
+        with self.assertRaises(ValidationError) as context:
+            ImageProcessor(max_bytes=-1)
+        self.assertEqual(context.exception.code, "INVALID_MAX_BYTES")
+
+    def test_target_ssim(self):
+        """Verifica que target_ssim elija la calidad mas baja que alcanza el objetivo y la informe."""
+        source = self.input_dir / "scene.jpg"
+        img = Image.linear_gradient("L").resize((640, 480)).convert("RGB")
+        ImageDraw.Draw(img).ellipse((100, 80, 400, 300), fill=(30, 140, 200))
+        img = Image.blend(img, Image.effect_noise((640, 480), 25).convert("RGB"), 0.15)
+        img.save(source, "JPEG", quality=98)
+
+        fixed = self.output_dir / "fixed.jpg"
+        ImageProcessor().resize(source, fixed, 640, 480)
+
+        processor = ImageProcessor(target_ssim=0.97)
+        with BatchHandler(processor=processor, max_workers=1) as handler:
+            results = handler.process_batch([source], self.output_dir / "ssim", 640, 480, "px", "px", ResizeMode.FIT)
+        result = results[0]
+        self.assertTrue(result.success)
+        self.assertLess(result.quality, 95)
+        self.assertGreaterEqual(result.ssim, 0.97)
+        self.assertLess(result.output_path.stat().st_size, fixed.stat().st_size)
+
+        # Una calidad menos ya no alcanza el objetivo
+        rendered = processor.render(source, 640, 480)
+        lower = io.BytesIO()
+        rendered.image.save(lower, "JPEG", quality=result.quality - 1)
+        with Image.open(lower) as candidate:
+            self.assertLess(ssim(luma_plane(rendered.image), luma_plane(candidate)), 0.97)
+
+        # max_bytes manda sobre el objetivo de SSIM
+        rendered = processor.render(source, 640, 480)
+        limited = ImageProcessor(target_ssim=0.97, max_bytes=result.output_path.stat().st_size // 2)
+        limited.encode(rendered, self.output_dir / "limited.jpg")
+        self.assertLess(rendered.result.quality, result.quality)
+        self.assertLess(rendered.result.ssim, 0.97)
+
+        # En WebP la busqueda tambien llega hasta la calidad del procesador
+        webp = processor.render(source, 640, 480)
+        processor.encode(webp, self.output_dir / "ssim.webp")
+        self.assertLessEqual(webp.result.quality, processor.quality)
+        self.assertGreaterEqual(webp.result.ssim, 0.97)
+        unreachable = ImageProcessor(quality=92, target_ssim=1.0)
+        webp = unreachable.render(source, 640, 480)
+        unreachable.encode(webp, self.output_dir / "unreachable.webp")
+        self.assertEqual(webp.result.quality, 92)
+        self.assertLess(webp.result.ssim, 1.0)
+
+        with self.assertRaises(ValidationError) as context:
+            ImageProcessor(target_ssim=1.5)
+        self.assertEqual(context.exception.code, "INVALID_TARGET_SSIM")
+
+    def test_output_format_transcoding(self):
+        """Verifica la conversion de formato y de modo (alfa, paleta, CMYK) sobre la imagen ya reducida."""
+        scan = self.input_dir / "scan.bmp"
+        Image.new("RGB", (800, 600), (20, 120, 220)).save(scan, "BMP")
+        cutout = self.input_dir / "cutout.png"
+        rgba = Image.new("RGBA", (800, 600), (0, 0, 0, 0))
+        ImageDraw.Draw(rgba).rectangle((200, 150, 600, 450), fill=(200, 0, 0, 255))
+        rgba.save(cutout, "PNG")
+        palette = self.input_dir / "palette.png"
+        rgba.convert("P").save(palette, "PNG", transparency=0)
+        print_file = self.input_dir / "print.jpg"
+        Image.new("CMYK", (800, 600), (0, 255, 255, 0)).save(print_file, "JPEG")
+
+        converted = []
+        original_convert = Image.Image.convert
+
+        def tracking_convert(image, *args, **kwargs):
+            converted.append((image.mode, image.size))
+            return original_convert(image, *args, **kwargs)
+
+        Image.Image.convert = tracking_convert
+        try:
+            results = self.handler.process_batch(
+                [scan, cutout, palette, print_file], self.output_dir / "webp", 200, 200, "px", "px",
+                ResizeMode.FIT, output_format="webp",
+            )
+        finally:
+            Image.Image.convert = original_convert
+        self.assertTrue(all(r.success for r in results))
+        self.assertEqual({r.output_path.suffix for r in results}, {".webp"})
+        # CMYK y paleta se convierten sobre la imagen reducida, nunca a resolucion completa
+        self.assertNotIn(("CMYK", (800, 600)), converted)
+        self.assertNotIn(("P", (800, 600)), converted)
+
+        # La calidad del procesador se aplica tambien a WebP, no la de Pillow por defecto
+        self.assertEqual({r.quality for r in results}, {self.processor.quality})
+
+        by_name = {r.input_path.name: r.output_path for r in results}
+        with Image.open(by_name["palette.png"]) as img:
+            self.assertEqual(img.mode, "RGBA")
+        with Image.open(by_name["print.jpg"]) as img:
+            self.assertEqual(img.mode, "RGB")
+            r, g, b = img.getpixel((100, 75))
+            self.assertGreater(r, 200)
+            self.assertLess(g, 60)
+
+        # Sin alfa en JPEG: la transparencia se aplana sobre el fondo, no sobre negro
+        jpeg = self.handler.process_batch(
+            [cutout], self.output_dir / "jpeg", 200, 200, "px", "px", ResizeMode.FIT, output_format="JPEG"
+        )[0]
+        with Image.open(jpeg.output_path) as img:
+            self.assertEqual(img.format, "JPEG")
+            self.assertGreater(min(img.getpixel((5, 5))), 245)
+
+        # FILL con imagenes en escala de grises (antes fallaba al crear el lienzo)
+        gray = self.input_dir / "gray.png"
+        Image.new("LA", (300, 100), (90, 255)).save(gray, "PNG")
+        filled = self.handler.process_batch([gray], self.output_dir / "gray", 120, 120, "px", "px", ResizeMode.FILL)[0]
+        self.assertTrue(filled.success, filled.error_message)
+        with Image.open(filled.output_path) as img:
+            self.assertEqual(img.size, (120, 120))
+            self.assertEqual(img.getpixel((60, 5)), (255, 255))
+
+        with self.assertRaises(ValidationError) as context:
+            self.handler.process_batch([scan], self.output_dir, 100, 100, "px", "px", ResizeMode.FIT, output_format="jxl")
+        self.assertEqual(context.exception.code, "INVALID_OUTPUT_FORMAT")
+
+    def test_output_format_keep_modes(self):
+        """Verifica que keep conserve CMYK en JPEG y que los grises de 32 bits se escalen en vez de recortarse."""
+        print_file = self.input_dir / "print.jpg"
+        Image.new("CMYK", (800, 600), (0, 255, 255, 0)).save(print_file, "JPEG", icc_profile=b"fake_cmyk")
+        deep = self.input_dir / "deep.tif"
+        Image.linear_gradient("L").resize((400, 300)).convert("I").point(lambda v: v * 280).save(deep, "TIFF")
+        with Image.open(deep) as img:
+            self.assertEqual((img.mode, img.getextrema()[1]), ("I", 255 * 280))
+
+        kept = self.handler.process_batch([print_file], self.output_dir / "keep", 200, 200, "px", "px", ResizeMode.FIT)[0]
+        self.assertTrue(kept.success, kept.error_message)
+        with Image.open(kept.output_path) as img:
+            self.assertEqual(img.mode, "CMYK")
+            self.assertEqual(img.info.get("icc_profile"), b"fake_cmyk")
+
+        png = self.handler.process_batch(
+            [deep], self.output_dir / "png", 200, 200, "px", "px", ResizeMode.FIT, output_format="PNG"
+        )[0]
+        self.assertTrue(png.success, png.error_message)
+        with Image.open(png.output_path) as img:
+            self.assertEqual(img.mode, "I;16")
+            low, high = img.getextrema()
+            # El maximo llega al tope de 16 bits y el degradado se conserva
+            self.assertEqual(high, 65535)
+            self.assertLess(low, 1000)
+            self.assertLess(img.getpixel((10, 75)), img.getpixel((10, 140)))
+
+    def test_passthrough(self):
+        """Verifica que las entradas que ya cumplen el tamano se copien sin decodificar, parcheando solo los DPI."""
+        from src.core.batch_handler import PipelineConfig
+
+        exact = self._create_test_image("exact.jpg")
+        small = self.input_dir / "small.png"
+        Image.new("RGB", (300, 200), (0, 90, 0)).save(small, "PNG", dpi=(72, 72))
+        large = self._create_test_image("large.jpg")
+        processor = ImageProcessor(dpi=300, passthrough="copy", allow_upscale=False)
+
+        decoded = []
+        original_load = Image.Image.load
+
+        def tracking_load(image):
+            decoded.append(image.size)
+            return original_load(image)
+
+        Image.Image.load = tracking_load
+        try:
+            same = processor.resize(exact, self.output_dir / "exact.jpg", 800, 600, mode=ResizeMode.STRETCH)
+            upscale = processor.resize(small, self.output_dir / "small.png", 1200, 1200, mode=ResizeMode.FIT)
+        finally:
+            Image.Image.load = original_load
+        self.assertNotIn((800, 600), decoded)
+        self.assertNotIn((300, 200), decoded)
+        self.assertTrue(same.passthrough and upscale.passthrough)
+        self.assertEqual(upscale.final_size, (300, 200))
+        self.assertIn("copy", same.timings)
+
+        source, copied = exact.read_bytes(), (self.output_dir / "exact.jpg").read_bytes()
+        # Solo cambian las unidades y la densidad del segmento JFIF
+        self.assertEqual((source[:13], source[18:]), (copied[:13], copied[18:]))
+        for path, output in ((exact, "exact.jpg"), (small, "small.png")):
+            with Image.open(path) as before, Image.open(self.output_dir / output) as after:
+                self.assertEqual(tuple(round(v) for v in after.info["dpi"]), (300, 300))
+                self.assertEqual(before.tobytes(), after.tobytes())
+        with Image.open(self.output_dir / "exact.jpg") as img:
+            self.assertEqual(img.info.get("icc_profile"), b"fake_icc")
+
+        # Otro tamano u otro formato: camino normal
+        self.assertFalse(processor.resize(large, self.output_dir / "large.jpg", 400, 300).passthrough)
+        self.assertFalse(processor.resize(small, self.output_dir / "small.webp", 300, 200).passthrough)
+        self.assertFalse(ImageProcessor(dpi=300, passthrough="copy").resize(
+            small, self.output_dir / "up.png", 600, 600).passthrough)
+
+        if hasattr(os, "link"):
+            linked = ImageProcessor(dpi=72, passthrough="hardlink")
+            self.assertTrue(linked.resize(small, self.output_dir / "link.png", 300, 200).passthrough)
+            self.assertTrue(os.path.samefile(small, self.output_dir / "link.png"))
+
+        for backend, pipeline in (("threads", PipelineConfig()), ("processes", PipelineConfig())):
+            with BatchHandler(processor=processor, max_workers=2, backend=backend, pipeline=pipeline) as handler:
+                results = handler.process_batch(
+                    [exact, large], self.output_dir / backend, 800, 600, "px", "px", ResizeMode.FIT
+                )
+            by_name = {r.input_path.name: r for r in results}
+            self.assertTrue(by_name["exact.jpg"].passthrough, backend)
+            self.assertTrue(by_name["large.jpg"].passthrough, backend)
+            self.assertEqual(
+                (self.output_dir / backend / "exact_resized.jpg").read_bytes(), copied
+            )
+
+        with self.assertRaises(ValidationError) as context:
+            ImageProcessor(passthrough="reflink")
+        self.assertEqual(context.exception.code, "INVALID_PASSTHROUGH")
+
+
+if __name__ == "__main__":
+    unittest.main()
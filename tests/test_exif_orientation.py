@@ -0,0 +1,97 @@
+"""Tests de equivalencia al aplicar la orientacion EXIF despues del redimensionado."""
+
+import sys
+import os
+import unittest
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PIL import Image, ImageChops, ImageOps
+
+from src.core.image_processor import ImageProcessor, ResizeMode
+
+
+TARGETS = [(150, 90), (90, 150), (41, 29)]
+
+
+class TestExifOrientation(unittest.TestCase):
+    """Compara la transposicion diferida con transponer la imagen completa primero."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.tmp = Path(self.temp_dir.name)
+        # Ruido + degradado: cualquier error de orientacion o de remuestreo cambia pixeles
+        noise = Image.effect_noise((321, 241), 60)
+        gradient = Image.linear_gradient("L").resize((321, 241))
+        self.source = Image.merge("RGB", (noise, gradient, noise.transpose(Image.Transpose.FLIP_LEFT_RIGHT)))
+        self.processor = ImageProcessor(dpi=300, draft_gap=None)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def _assert_equivalent(self, orientation, image_mode="RGB", fmt="PNG"):
+        exif = Image.Exif()
+        exif[0x0112] = orientation
+        input_path = self.tmp / f"orient_{orientation}.{fmt.lower()}"
+        self.source.convert(image_mode).save(input_path, fmt, exif=exif.tobytes())
+
+        for mode in ResizeMode:
+            for width, height in TARGETS:
+                output_path = self.tmp / "out.png"
+                result = self.processor.resize(input_path, output_path, width, height, mode=mode)
+
+                with Image.open(input_path) as img:
+                    expected_img = ImageOps.exif_transpose(img)
+                    final_size = self.processor._calculate_dimensions(expected_img.size, width, height, mode)
+                    expected = self.processor._apply_resize(
+                        expected_img, final_size, mode, Image.Resampling.LANCZOS, (255, 255, 255, 255)
+                    )
+
+                with Image.open(output_path) as out:
+                    actual = out.convert(expected.mode)
+
+                self.assertEqual(result.original_size, expected_img.size)
+                self.assertEqual(actual.size, expected.size, f"{mode.name} {width}x{height}")
+                self.assertIsNone(
+                    ImageChops.difference(actual, expected).getbbox(),
+                    f"Pixeles distintos en orientacion {orientation}, {mode.name} {width}x{height}",
+                )
+
+    def test_orientation_1(self):
+        self._assert_equivalent(1)
+
+    def test_orientation_2(self):
+        self._assert_equivalent(2)
+
+    def test_orientation_3(self):
+        self._assert_equivalent(3)
+
+    def test_orientation_4(self):
+        self._assert_equivalent(4)
+
+    def test_orientation_5(self):
+        self._assert_equivalent(5)
+
+    def test_orientation_6(self):
+        self._assert_equivalent(6)
+
+    def test_orientation_7(self):
+        self._assert_equivalent(7)
+
+    def test_orientation_8(self):
+        self._assert_equivalent(8)
+
+    def test_rotated_rgba_alpha(self):
+        """Verifica la equivalencia con alfa premultiplicado en las orientaciones que rotan."""
+        for orientation in (6, 8):
+            self._assert_equivalent(orientation, image_mode="RGBA")
+
+    def test_rotated_jpeg(self):
+        """Verifica la equivalencia con una entrada JPEG real."""
+        self._assert_equivalent(6, fmt="JPEG")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,155 @@
+"""Tests del lector de cabeceras y su indice persistente."""
+
+import sys
+import os
+import unittest
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PIL import Image, ImageFile
+
+from src.core import probe as probe_module
+from src.core.probe import ImageProbe
+from src.utils import ValidationError
+
+
+class TestImageProbe(unittest.TestCase):
+    """Pruebas de lectura de cabeceras sin decodificacion y del indice en disco."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.tmp = Path(self.temp_dir.name)
+        self.index_path = self.tmp / "cache" / "index.sqlite3"
+
+        exif = Image.Exif()
+        exif[0x0112] = 6
+        self.rotated = self.tmp / "rotated.jpg"
+        Image.new("RGB", (640, 480), (255, 0, 0)).save(self.rotated, "JPEG", exif=exif.tobytes(), dpi=(150, 150))
+        self.plain = self.tmp / "plain.png"
+        Image.new("RGBA", (320, 200)).save(self.plain, "PNG")
+        self.broken = self.tmp / "broken.jpg"
+        self.broken.write_bytes(b"NOT AN IMAGE")
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_header_only(self):
+        """Verifica metadatos con la orientacion aplicada y sin decodificar pixeles."""
+        loads = []
+        original_load = ImageFile.ImageFile.load
+
+        def counting_load(image):
+            if image.tile:
+                loads.append(image)
+            return original_load(image)
+
+        ImageFile.ImageFile.load = counting_load
+        try:
+            with ImageProbe() as probe:
+                results = probe.probe([self.rotated, self.plain, self.broken, self.tmp / "missing.jpg"])
+        finally:
+            ImageFile.ImageFile.load = original_load
+
+        self.assertEqual(loads, [])
+        rotated = results[self.rotated]
+        self.assertEqual(rotated.size, (480, 640))
+        self.assertEqual(rotated.orientation, 6)
+        self.assertEqual(rotated.format, "JPEG")
+        self.assertEqual(rotated.mode, "RGB")
+        self.assertEqual(rotated.dpi, (150.0, 150.0))
+        self.assertEqual(results[self.plain].size, (320, 200))
+        self.assertEqual(results[self.plain].mode, "RGBA")
+        self.assertIsNone(results[self.broken])
+        self.assertIsNone(results[self.tmp / "missing.jpg"])
+
+    def test_persistent_index(self):
+        """Verifica que una segunda ejecucion use el indice y solo relea archivos modificados."""
+        with ImageProbe(self.index_path) as probe:
+            probe.probe([self.rotated, self.plain])
+
+        opened = []
+        original_open = probe_module.Image.open
+
+        def counting_open(fp, *args, **kwargs):
+            opened.append(Path(fp))
+            return original_open(fp, *args, **kwargs)
+
+        probe_module.Image.open = counting_open
+        try:
+            with ImageProbe(self.index_path) as probe:
+                results = probe.probe([self.rotated, self.plain])
+                self.assertEqual(opened, [])
+                self.assertEqual(results[self.rotated].size, (480, 640))
+
+                Image.new("RGB", (100, 50)).save(self.plain, "PNG")
+                stat = self.plain.stat()
+                os.utime(self.plain, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10_000_000))
+                self.assertEqual(probe.probe_one(self.plain).size, (100, 50))
+                self.assertEqual(opened, [self.plain])
+        finally:
+            probe_module.Image.open = original_open
+
+    def test_batch_handler_index(self):
+        """Verifica que BatchHandler guarde las cabeceras en probe_index y no las relea en el lote siguiente."""
+        from src.core.batch_handler import BatchHandler
+        from src.core.image_processor import ImageProcessor, ResizeMode
+
+        files = [self.rotated, self.plain]
+        with BatchHandler(ImageProcessor(), max_workers=2, probe_index=self.index_path) as handler:
+            handler.process_batch(files, self.tmp / "first", 50, 50, "px", "px", ResizeMode.FIT)
+        self.assertTrue(self.index_path.exists())
+
+        reads = []
+        original_read = ImageProbe._read_header
+
+        def counting_read(path, stat):
+            reads.append(path)
+            return original_read(path, stat)
+
+        ImageProbe._read_header = staticmethod(counting_read)
+        try:
+            with BatchHandler(ImageProcessor(), max_workers=2, probe_index=self.index_path) as handler:
+                results = handler.process_batch(files, self.tmp / "second", 50, 50, "px", "px", ResizeMode.FIT)
+        finally:
+            ImageProbe._read_header = staticmethod(original_read)
+        self.assertTrue(all(r.success for r in results))
+        self.assertEqual(reads, [])
+
+        # Sin probe_index el manejador no escribe en la cache del usuario
+        with BatchHandler(ImageProcessor(), max_workers=2) as handler:
+            handler.process_batch(files, self.tmp / "third", 50, 50, "px", "px", ResizeMode.FIT)
+            self.assertIsNone(handler._owned_probe)
+
+    def test_prune_index(self):
+        """Verifica que al abrir el indice se quiten los archivos borrados y las entradas que exceden el tope."""
+        extra = []
+        for i in range(3):
+            path = self.tmp / f"extra_{i}.png"
+            Image.new("RGB", (10 + i, 10)).save(path, "PNG")
+            extra.append(path)
+        with ImageProbe(self.index_path) as probe:
+            probe.probe([self.rotated, self.plain])
+            probe.probe(extra)
+        self.plain.unlink()
+
+        with ImageProbe(self.index_path, max_entries=2) as probe:
+            kept = set(probe._lookup([self.rotated, self.plain] + extra))
+        # Se descarta el borrado y, del resto, las lecturas mas antiguas
+        self.assertEqual(kept, {str(extra[1]), str(extra[2])})
+
+    def test_probe_one_errors(self):
+        """Verifica los errores de un archivo inexistente o que no es imagen."""
+        with ImageProbe() as probe:
+            with self.assertRaises(ValidationError) as context:
+                probe.probe_one(self.tmp / "missing.jpg")
+            self.assertEqual(context.exception.code, "FILE_NOT_FOUND")
+
+            with self.assertRaises(ValidationError) as context:
+                probe.probe_one(self.broken)
+            self.assertEqual(context.exception.code, "UNSUPPORTED_FORMAT")
+
+
+if __name__ == "__main__":
+    unittest.main()
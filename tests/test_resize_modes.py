@@ -5,7 +5,7 @@ import os
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from pathlib import Path
-from PIL import Image
+from PIL import Image, ImageChops, ImageStat
 import tempfile
 
 from src.core.image_processor import ImageProcessor, ResizeMode
@@ -82,7 +82,46 @@ def test_ratio_edge_cases():
             assert result[1] > 0
 
 
+def test_jpeg_draft_tolerance():
+    """Validate that JPEG draft decoding stays within tolerance of the full decode."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        tmp = Path(tmpdir)
+        source = Image.radial_gradient("L").resize((2400, 1800)).convert("RGB")
+        source = ImageChops.add(source, Image.effect_noise((2400, 1800), 40).convert("RGB"), 2)
+        source.save(tmp / "source.jpg", quality=90)
+
+        for mode in ResizeMode:
+            full = ImageProcessor(dpi=300, draft_gap=None)
+            draft = ImageProcessor(dpi=300, draft_gap=2.0)
+            full.resize(tmp / "source.jpg", tmp / "full.png", 300, 200, mode=mode)
+            draft.resize(tmp / "source.jpg", tmp / "draft.png", 300, 200, mode=mode)
+
+            with Image.open(tmp / "full.png") as a, Image.open(tmp / "draft.png") as b:
+                assert a.size == b.size
+                diff = ImageChops.difference(a.convert("RGB"), b.convert("RGB"))
+                assert max(ImageStat.Stat(diff).mean) < 1.0
+
+
+def test_reducing_gap_error_bounds():
+    """Validate the two-stage reduce() pipeline against single-pass LANCZOS."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        tmp = Path(tmpdir)
+        source = Image.radial_gradient("L").resize((1600, 1200)).convert("RGB")
+        source = ImageChops.add(source, Image.effect_noise((1600, 1200), 40).convert("RGB"), 2)
+        source.save(tmp / "source.png")
+
+        for mode in ResizeMode:
+            ImageProcessor(dpi=300, reducing_gap=None).resize(tmp / "source.png", tmp / "exact.png", 100, 90, mode=mode)
+            ImageProcessor(dpi=300, reducing_gap=3.0).resize(tmp / "source.png", tmp / "reduced.png", 100, 90, mode=mode)
+
+            with Image.open(tmp / "exact.png") as a, Image.open(tmp / "reduced.png") as b:
+                assert a.size == b.size
+                assert max(ImageStat.Stat(ImageChops.difference(a, b)).mean) < 0.5
+
+
 if __name__ == "__main__":
     test_calculate_dimensions()
     test_apply_resize_visual()
     test_ratio_edge_cases()
+    test_jpeg_draft_tolerance()
+    test_reducing_gap_error_bounds()
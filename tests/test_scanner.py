@@ -0,0 +1,116 @@
+"""Tests de la busqueda de imagenes con os.scandir."""
+
+import sys
+import os
+import time
+import unittest
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.core import scanner
+from src.core.batch_handler import BatchHandler
+from src.core.scanner import iter_images, scan_images
+from src.utils import FileSystemError, ValidationError
+
+
+class TestScanner(unittest.TestCase):
+    """Pruebas de recorrido recursivo, filtros, enlaces simbolicos y entrega incremental."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.root = Path(self.temp_dir.name) / "photos"
+        for relative in (
+            "a.jpg", "b.PNG", "notes.txt",
+            "2024/c.jpg", "2024/d.webp", "2024/thumbs/e.jpg",
+            "2025/raw/f.tiff", "2025/raw/g.cr2",
+        ):
+            path = self.root / relative
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_bytes(b"")
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def _names(self, paths):
+        return sorted(p.relative_to(self.root).as_posix() for p in paths)
+
+    def test_recursive_and_flat(self):
+        """Verifica que se encuentren solo imagenes, en el directorio o en todo el arbol."""
+        self.assertEqual(self._names(scan_images(self.root)), ["a.jpg", "b.PNG"])
+        self.assertEqual(
+            self._names(scan_images(self.root, recursive=True)),
+            ["2024/c.jpg", "2024/d.webp", "2024/thumbs/e.jpg", "2025/raw/f.tiff", "a.jpg", "b.PNG"],
+        )
+        self.assertEqual(BatchHandler.scan_directory(self.root, recursive=True), scan_images(self.root, True))
+
+        with self.assertRaises(FileSystemError) as context:
+            BatchHandler.scan_directory(self.root / "missing")
+        self.assertEqual(context.exception.code, "DIR_NOT_FOUND")
+
+    def test_include_exclude(self):
+        """Verifica los patrones por nombre y por ruta relativa, y la poda de directorios excluidos."""
+        found = scan_images(self.root, recursive=True, exclude=["thumbs", "*.webp"])
+        self.assertEqual(self._names(found), ["2024/c.jpg", "2025/raw/f.tiff", "a.jpg", "b.PNG"])
+
+        # Como en fnmatch, "*" tambien abarca "/"
+        found = scan_images(self.root, recursive=True, include=["2024/*"])
+        self.assertEqual(self._names(found), ["2024/c.jpg", "2024/d.webp", "2024/thumbs/e.jpg"])
+
+        found = scan_images(self.root, recursive=True, include=["*.jpg"], exclude=["2024/*"])
+        self.assertEqual(self._names(found), ["a.jpg"])
+
+    @unittest.skipIf(sys.platform == "win32", "Los enlaces simbolicos requieren privilegios en Windows")
+    def test_symlink_policies(self):
+        """Verifica las politicas de enlaces simbolicos y que un ciclo no se recorra sin fin."""
+        (self.root / "link.jpg").symlink_to(self.root / "a.jpg")
+        (self.root / "2025/linked").symlink_to(self.root / "2024", target_is_directory=True)
+        (self.root / "2024/loop").symlink_to(self.root, target_is_directory=True)
+
+        skip = self._names(scan_images(self.root, recursive=True, symlinks="skip"))
+        files = self._names(scan_images(self.root, recursive=True, symlinks="files"))
+        follow = self._names(scan_images(self.root, recursive=True, symlinks="follow"))
+
+        self.assertNotIn("link.jpg", skip)
+        self.assertIn("link.jpg", files)
+        self.assertFalse(any(name.startswith("2025/linked/") for name in files))
+        # El arbol enlazado se recorre una sola vez, por la ruta que se encuentre primero
+        self.assertEqual(len(follow), len(files))
+        self.assertEqual(len(set(follow)), len(follow))
+
+        with self.assertRaises(ValidationError) as context:
+            scan_images(self.root, symlinks="always")
+        self.assertEqual(context.exception.code, "INVALID_SYMLINK_POLICY")
+
+    def test_streaming(self):
+        """Verifica que las primeras imagenes lleguen antes de terminar de recorrer el arbol."""
+        for i in range(20):
+            folder = self.root / "many" / f"dir_{i:02d}"
+            folder.mkdir(parents=True)
+            (folder / "img.jpg").write_bytes(b"")
+
+        original_scan = scanner._scan_dir
+        scanned = []
+
+        def slow_scan(directory, *args):
+            scanned.append(directory)
+            if "dir_" in directory:
+                # Simula una unidad de red lenta
+                time.sleep(0.05)
+            return original_scan(directory, *args)
+
+        scanner._scan_dir = slow_scan
+        try:
+            stream = iter_images(self.root, recursive=True, max_workers=2)
+            first = next(stream)
+            stream.close()
+        finally:
+            scanner._scan_dir = original_scan
+
+        self.assertIn(first.suffix.lower(), (".jpg", ".png"))
+        self.assertLess(len(scanned), 20)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,109 @@
+"""Tests de la deteccion de formato por firma."""
+
+import io
+import sys
+import os
+import unittest
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PIL import Image
+
+from src.core import image_processor as processor_module
+from src.core.batch_handler import BatchHandler
+from src.core.image_processor import ImageProcessor, ResizeMode
+from src.core.scanner import scan_images
+from src.core.sniff import SNIFF_BYTES, sniff_format, sniff_header
+from src.utils import ValidationError
+
+
+class TestSniff(unittest.TestCase):
+    """Pruebas de firmas, de imagenes mal nombradas y del rechazo barato de lo que no es imagen."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.tmp = Path(self.temp_dir.name)
+        self.processor = ImageProcessor(dpi=300)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_signatures(self):
+        """Verifica cada formato soportado y que el texto o una cabecera parecida no pasen por imagen."""
+        for image_format in ("JPEG", "PNG", "WEBP", "TIFF", "GIF", "BMP"):
+            buffer = io.BytesIO()
+            Image.new("RGB", (8, 8)).save(buffer, image_format)
+            self.assertEqual(sniff_header(buffer.getvalue()[:SNIFF_BYTES]), image_format)
+
+        self.assertIsNone(sniff_header(b""))
+        self.assertIsNone(sniff_header(b"NOT AN IMAGE"))
+        self.assertIsNone(sniff_header(b"BMW 320i, revision de 2019"))
+        self.assertIsNone(sniff_header(b"RIFF\x24\x00\x00\x00WAVEfmt "))
+
+        with self.assertRaises(OSError):
+            sniff_format(self.tmp / "missing.jpg")
+
+    def test_misnamed_and_non_images(self):
+        """Verifica que una imagen mal nombrada se procese y que un no-imagen no llegue a Image.open."""
+        misnamed = self.tmp / "photo.dat"
+        Image.new("RGB", (200, 100), (0, 128, 0)).save(misnamed, "PNG")
+        bare = self.tmp / "IMG_0001"
+        Image.new("RGB", (200, 100), (0, 0, 128)).save(bare, "JPEG")
+        fake = self.tmp / "notes.jpg"
+        fake.write_bytes(b"Lista de la compra: pan, leche")
+
+        output_dir = self.tmp / "out"
+        output_dir.mkdir()
+
+        opened = []
+        original_open = processor_module.Image.open
+
+        def counting_open(fp, *args, **kwargs):
+            opened.append(fp)
+            return original_open(fp, *args, **kwargs)
+
+        processor_module.Image.open = counting_open
+        try:
+            with BatchHandler(processor=self.processor, max_workers=1) as handler:
+                results = handler.process_batch([misnamed, bare, fake], output_dir, 50, 50, "px", "px", ResizeMode.FIT)
+        finally:
+            processor_module.Image.open = original_open
+
+        by_input = {r.input_path: r for r in results}
+        self.assertTrue(by_input[misnamed].success)
+        self.assertEqual(by_input[misnamed].output_path.name, "photo_resized.png")
+        self.assertTrue(by_input[bare].success)
+        self.assertEqual(by_input[bare].output_path.name, "IMG_0001_resized.jpg")
+        with Image.open(by_input[bare].output_path) as img:
+            self.assertEqual(img.format, "JPEG")
+
+        self.assertFalse(by_input[fake].success)
+        self.assertEqual(by_input[fake].error_code, "UNSUPPORTED_FORMAT")
+        self.assertNotIn(fake, opened)
+
+        with self.assertRaises(ValidationError) as context:
+            self.processor.render(fake, 50, 50, data=fake.read_bytes())
+        self.assertEqual(context.exception.code, "UNSUPPORTED_FORMAT")
+
+    def test_scanner_sniff(self):
+        """Verifica que la busqueda acepte imagenes sin extension de imagen solo con sniff."""
+        Image.new("RGB", (8, 8)).save(self.tmp / "a.jpg", "JPEG")
+        Image.new("RGB", (8, 8)).save(self.tmp / "scan_0001", "PNG")
+        Image.new("RGB", (8, 8)).save(self.tmp / "b.tif", "TIFF")
+        (self.tmp / "readme.txt").write_text("texto")
+        # Extension de imagen: se acepta sin leer su contenido
+        (self.tmp / "empty.png").write_bytes(b"")
+
+        names = lambda paths: sorted(p.name for p in paths)
+        self.assertEqual(names(scan_images(self.tmp)), ["a.jpg", "empty.png"])
+        self.assertEqual(names(scan_images(self.tmp, sniff=True)), ["a.jpg", "b.tif", "empty.png", "scan_0001"])
+        self.assertEqual(names(scan_images(self.tmp, sniff=True, extensions=(".png",))), ["empty.png", "scan_0001"])
+        # Las busquedas de carpetas del gestor de lotes detectan el formato por defecto
+        self.assertEqual(names(BatchHandler.scan_directory(self.tmp)), ["a.jpg", "b.tif", "empty.png", "scan_0001"])
+        self.assertEqual(names(BatchHandler.scan_directory(self.tmp, sniff=False)), ["a.jpg", "empty.png"])
+
+
+if __name__ == "__main__":
+    unittest.main()